@@ -0,0 +1,157 @@
+"""Answer a file of canned questions against the published knowledge base, without the UI.
+
+For quality checks after a re-index. Questions are read from JSONL, one per
+line, either as a string or as {"id", "question", "mood", "min_views"}. All of
+them are embedded in one batch and searched with batched FAISS calls; the LLM
+calls then fan out over a bounded thread pool. One JSONL record per question is
+written in input order with the answer, the retrieved ids and per-stage
+latencies.
+
+    python batch_qa.py questions.jsonl -o answers.jsonl --concurrency 8
+
+The answer cache is off by default so every question reaches the LLM.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from index_builder import EMBED_BATCH_SIZE, EMBED_THREADS, EMBEDDING_MODEL, INDEX_ROOT
+from llm_gateway import LLMError, get_gateway
+from rag_engine.answer_cache import AnswerCache
+from rag_engine.embedder import EmbeddingEngine
+from rag_engine.engine import RAGEngine, Retrieval
+
+load_dotenv()
+MODEL_NAME = os.getenv('RAG_MODEL', "llama-3.3-70b-versatile")
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+STAGES = ("embed_ms", "search_ms", "context_ms", "first_token_ms", "llm_ms", "total_ms")
+
+
+def load_questions(path: str) -> List[Dict[str, object]]:
+    """Questions from a JSONL file; plain-string lines get their line number as id."""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            if not isinstance(item, dict) or not str(item.get("question") or "").strip():
+                raise ValueError(f"{path}:{number}: expected a question string or an object with a question")
+            questions.append({"id": item.get("id", number), "question": str(item["question"]).strip(),
+                              "mood": item.get("mood") or None, "min_views": int(item.get("min_views") or 0)})
+    return questions
+
+
+def create_engine(index_root: str = INDEX_ROOT, use_cache: bool = False) -> RAGEngine:
+    """The engine with a batch-sized embedding model (same knobs as rag_service.py otherwise)."""
+    embeddings = EmbeddingEngine(EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE, num_threads=EMBED_THREADS)
+    client = get_gateway().client("groq", api_key=os.getenv('GROQ_API_KEY', ''))
+    return RAGEngine(index_root, embeddings, client, MODEL_NAME, answer_cache=AnswerCache() if use_cache else None,
+                     context_token_budget=CONTEXT_TOKEN_BUDGET, timeout=LLM_TIMEOUT)
+
+
+def _answer(engine: RAGEngine, item: Dict[str, object], retrieval: Retrieval, shared: Dict[str, float],
+            use_cache: bool) -> Dict[str, object]:
+    started = time.perf_counter()
+    latency = dict(shared)
+    record = {"id": item["id"], "question": item["question"], "answer": None, "cached": False,
+              "retrieved_ids": retrieval.doc_ids, "version": os.path.basename(retrieval.version[0]),
+              "latency_ms": latency, "error": None}
+    try:
+        answer = engine.answer(item["question"], retrieval, use_cache=use_cache)
+        latency["context_ms"] = (time.perf_counter() - started) * 1000
+        record["answer"] = "".join(answer.tokens).strip()
+        record["cached"] = answer.cached
+        if answer.timing is not None:
+            latency["first_token_ms"] = answer.timing.first_token_ms
+            latency["llm_ms"] = answer.timing.total_ms
+    except Exception as e:
+        # One bad question or dropped connection must not lose the rest of the batch
+        record["error"] = str(e) if isinstance(e, LLMError) else f"{type(e).__name__}: {e}"
+    latency["total_ms"] = shared["embed_ms"] + shared["search_ms"] + (time.perf_counter() - started) * 1000
+    record["latency_ms"] = {stage: round(latency[stage], 1) if latency.get(stage) is not None else None for stage in STAGES}
+    return record
+
+
+def run_batch(engine: RAGEngine, questions: List[Dict[str, object]], concurrency: int = BATCH_CONCURRENCY,
+              k: Optional[int] = None, use_cache: bool = False) -> Iterator[Dict[str, object]]:
+    """Answer `questions`, yielding one record per question in input order as the answers complete.
+
+    Embedding and search run once for the whole batch, so their latencies are
+    the batch's time spread evenly over its questions.
+    """
+    if not questions:
+        return
+    timing: Dict[str, float] = {}
+    retrievals = engine.search_batch([item["question"] for item in questions], moods=[item["mood"] for item in questions],
+                                     min_views=[item["min_views"] for item in questions], k=k, timing=timing)
+    shared = {stage: ms / len(questions) for stage, ms in timing.items()}
+    with ThreadPoolExecutor(max(1, concurrency), thread_name_prefix="batch-qa") as executor:
+        yield from executor.map(lambda pair: _answer(engine, pair[0], pair[1], shared, use_cache), zip(questions, retrievals))
+
+
+def summarize(records: List[Dict[str, object]], wall_seconds: float) -> Dict[str, object]:
+    """Run totals and exact per-stage latency percentiles (the service's histograms are too coarse offline)."""
+    latency = {}
+    for stage in STAGES:
+        values = [record["latency_ms"][stage] for record in records if record["latency_ms"][stage] is not None]
+        if values:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            latency[stage] = {"count": len(values), "mean_ms": round(float(np.mean(values)), 1),
+                              "p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1), "p99_ms": round(float(p99), 1)}
+    return {
+        "questions": len(records),
+        "errors": sum(record["error"] is not None for record in records),
+        "cached": sum(record["cached"] for record in records),
+        "wall_seconds": round(wall_seconds, 2),
+        "questions_per_second": round(len(records) / wall_seconds, 2) if wall_seconds else None,
+        "latency": latency,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions for offline evaluation")
+    parser.add_argument("questions", help="JSONL: question strings or {\"id\", \"question\", \"mood\", \"min_views\"}")
+    parser.add_argument("-o", "--output", default="-", help="JSONL answers (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="LLM calls in flight at once")
+    parser.add_argument("--k", type=int, default=None, help="Documents retrieved per question")
+    parser.add_argument("--use-cache", action="store_true", help="Reuse answers to near-identical questions in the batch")
+    parser.add_argument("--root", default=INDEX_ROOT)
+    args = parser.parse_args(argv)
+
+    questions = load_questions(args.questions)
+    engine = create_engine(args.root, use_cache=args.use_cache)
+    if engine.version is None:
+        print(f"No knowledge base under {args.root} yet; run index_builder.py first", file=sys.stderr)
+        return 2
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    started = time.perf_counter()
+    records = []
+    try:
+        for record in run_batch(engine, questions, args.concurrency, args.k, args.use_cache):
+            records.append(record)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    summary = summarize(records, time.perf_counter() - started)
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import json
-import requests
-import spacy
 from dotenv import load_dotenv
 import os
 from datetime import datetime
 import hashlib
 import pymongo
 from pymongo import MongoClient
+from llm_gateway import LLMError, get_gateway
+from rag_engine.rollup import RollupCube
+from rag_engine.lazy import LazyResource
 
 # Load environment variables
 load_dotenv()
@@ -18,10 +19,17 @@ MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "youtube_data")
 MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION", "videos")
 
-# Load NLP model
-nlp = spacy.load("en_core_web_sm")
+def load_nlp():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+@st.cache_resource
+def get_nlp():
+    # spaCy loads in a background thread while the page renders; the first question waits for it if needed
+    return LazyResource(load_nlp, name="spaCy en_core_web_sm").warm()
 
 st.set_page_config(page_title="Smart Data Analyzer | Ayush Mandowara & The Vibe Coder", layout="wide")
+get_nlp()
 st.title("🧠 Smart Data Analyzer — Ayush Mandowara & The Vibe Coder")
 
 # Initialize session state for context memory
@@ -164,6 +172,26 @@ def load_youtube_data_from_mongodb():
         st.error(f"Error loading data from MongoDB: {str(e)}")
         return pd.DataFrame()
 
+# Date columns that might come from MongoDB, in order of preference
+DATE_COLUMNS = ['published_at', 'publishedAt', 'upload_date', 'date', 'created_at']
+
+def find_date_column(frame):
+    return next((col for col in DATE_COLUMNS if col in frame.columns), None)
+
+@st.cache_data(ttl=300)
+def load_label_month_rollup():
+    """Record Label × Month view totals, built once per data load.
+
+    Revenue is linear in views, so monthly revenue for any label and RPM is
+    read off this cube instead of re-grouping the label's videos every rerun.
+    """
+    videos = load_youtube_data_from_mongodb()
+    videos = videos.dropna(subset=["view_count"])
+    date_column = find_date_column(videos)
+    months = pd.to_datetime(videos[date_column], errors="coerce").dt.to_period("M").astype(str) if date_column else "Unknown"
+    frame = pd.DataFrame({"Record Label": videos["Record Label"], "Month": months, "view_count": videos["view_count"]})
+    return RollupCube.build(frame, ["Record Label", "Month"], ["view_count"])
+
 def get_mongodb_stats():
     """Get statistics about the MongoDB collection"""
     try:
@@ -193,7 +221,7 @@ def detect_months_and_confidence(text):
         "january", "february", "march", "april", "may", "june",
         "july", "august", "september", "october", "november", "december"
     ]
-    found = {token.text for token in nlp(text.lower()) if token.text in months}
+    found = {token.text for token in get_nlp().get()(text.lower()) if token.text in months}
     confidence = len(found) / 12
     return list(found), confidence
 
@@ -269,17 +297,19 @@ If this is a follow-up question, explicitly connect it to previous analysis and
 
 def get_mistral_analysis(prompt, api_key):
     try:
-        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-        payload = {
-            "model": "mistralai/mistral-7b-instruct:free",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
-            "max_tokens": 1500
-        }
-        response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=60)
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"], None
-        return "", f"Error {response.status_code}"
+        # Pooled connection, 429 backoff and a 60s deadline across retries
+        content = get_gateway().chat(
+            "openrouter",
+            [{"role": "user", "content": prompt}],
+            "mistralai/mistral-7b-instruct:free",
+            api_key=api_key,
+            timeout=60,
+            temperature=0.7,
+            max_tokens=1500,
+        )
+        return content, None
+    except LLMError as e:
+        return "", f"Error {e.status}" if e.status else str(e)
     except Exception as e:
         return "", str(e)
 
@@ -362,14 +392,7 @@ if uploaded_file:
     else:
         actual_total = 0
 
-    # Handle different date column names that might come from MongoDB
-    date_columns = ['published_at', 'publishedAt', 'upload_date', 'date', 'created_at']
-    date_column = None
-    
-    for col in date_columns:
-        if col in label_videos.columns:
-            date_column = col
-            break
+    date_column = find_date_column(label_videos)
     
     if date_column:
         label_videos[date_column] = pd.to_datetime(label_videos[date_column], errors="coerce")
@@ -378,7 +401,9 @@ if uploaded_file:
         st.warning("⚠️ No date column found. Monthly analysis will be limited.")
         label_videos["Month"] = "Unknown"
     
-    monthly_revenue = label_videos.groupby("Month")["Estimated Revenue INR"].sum().reset_index()
+    rollup = load_label_month_rollup()
+    monthly_views = rollup.select(rollup.cells["Record Label"] == selected_label).rollup("Month", "view_count")
+    monthly_revenue = (monthly_views / 1_000_000 * rpm).rename("Estimated Revenue INR").reset_index()
     label_videos["RPV_Estimated"] = label_videos["Estimated Revenue INR"] / label_videos["view_count"]
     top_rpv = label_videos.nlargest(10, "RPV_Estimated")[["title", "view_count", "Estimated Revenue INR", "RPV_Estimated"]]
 
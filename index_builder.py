@@ -0,0 +1,148 @@
+"""Background builder for the knowledge base served by rag.py.
+
+Builds each new index version next to the live one and switches the CURRENT
+pointer when it is complete (see rag_engine.builder), so the app keeps
+answering from the previous version for the whole build. Run it once after a
+scrape, as a watcher, or let the app start it when it sees new data:
+
+    python index_builder.py --once
+    python index_builder.py --watch --interval 300
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from rag_engine.index_config import IndexConfig
+from rag_engine.builder import (LOG_FILE, BuildLock, build_index_version, check_rebuild_needed, read_build_status,
+                                write_build_status)
+
+INDEX_ROOT = os.getenv('RAG_INDEX_ROOT', 'faiss_index')
+DATA_DIR = os.getenv('RAG_DATA_DIR', 'scraped_data')
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Rebuild-time embedding throughput knobs (CPU nodes)
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '64'))
+EMBED_THREADS = int(os.getenv('EMBED_THREADS', '0')) or None
+EMBED_WORKERS = int(os.getenv('EMBED_WORKERS', '1'))
+# Index type and search knobs, e.g. RAG_INDEX_KIND=hnsw RAG_INDEX_EF_SEARCH=128
+INDEX_CONFIG = IndexConfig.from_env()
+# After a failed build the app waits this long before starting another, doubling per failure up to the cap
+BUILD_RETRY_SECONDS = float(os.getenv('BUILD_RETRY_SECONDS', '60'))
+BUILD_RETRY_MAX_SECONDS = float(os.getenv('BUILD_RETRY_MAX_SECONDS', '3600'))
+# A started builder that has not recorded an outcome by then is assumed dead
+BUILD_START_GRACE_SECONDS = float(os.getenv('BUILD_START_GRACE_SECONDS', '120'))
+
+logger = logging.getLogger(__name__)
+
+
+def build_once(root: str = INDEX_ROOT, directory: str = DATA_DIR, full: bool = False) -> dict:
+    """Build and publish one index version if the sources changed (or `full`)."""
+    from rag_engine.embedder import EmbeddingEngine
+    from rag_engine.embedding_cache import EmbeddingCache
+
+    previous = read_build_status(root)
+    try:
+        # Lives outside the index root so full rebuilds keep the vectors
+        cache = EmbeddingCache(".embedding_cache", model_name=EMBEDDING_MODEL)
+        engine = EmbeddingEngine(EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE, num_threads=EMBED_THREADS, num_workers=EMBED_WORKERS)
+        try:
+            stats = build_index_version(root, engine, directory, cache=cache, config=INDEX_CONFIG, full=full)
+        finally:
+            engine.close()
+    except Exception as e:
+        write_build_status(root, {"state": "failed", "finished": time.time(), "failures": previous.get("failures", 0) + 1,
+                                  "error": f"{type(e).__name__}: {e}"})
+        raise
+    if stats["mode"] != "busy":
+        write_build_status(root, {"state": "ok", "finished": time.time(), "failures": 0, "version": stats.get("version")})
+    if stats["mode"] not in ("busy", "noop"):
+        cache_stats = cache.stats()
+        logger.info("cache %d hits / %d misses | %s docs/s", cache_stats["hits"], cache_stats["misses"], engine.stats()["docs_per_sec"])
+    return stats
+
+
+def retry_after(status: dict, now: Optional[float] = None) -> float:
+    """Seconds until the app may start another builder, given the last build status."""
+    now = time.time() if now is None else now
+    if status.get("state") == "starting":
+        return max(0.0, status["started"] + BUILD_START_GRACE_SECONDS - now)
+    if status.get("state") == "failed":
+        delay = min(BUILD_RETRY_SECONDS * 2 ** (status.get("failures", 1) - 1), BUILD_RETRY_MAX_SECONDS)
+        return max(0.0, status["finished"] + delay - now)
+    return 0.0
+
+
+def start_background_build(root: str = INDEX_ROOT, full: bool = False, force: bool = False) -> bool:
+    """Start `index_builder.py --once` detached from the caller.
+
+    False when a build is already running, was just started, or (unless
+    `force`, for an explicit user request) failed recently, so app reruns do
+    not keep spawning builders that die the same way.
+    """
+    if BuildLock(root).is_held():
+        return False
+    status = read_build_status(root)
+    if retry_after(status) > 0 and not (force and status.get("state") == "failed"):
+        return False
+    write_build_status(root, {**status, "state": "starting", "started": time.time()})
+    command = [sys.executable, os.path.abspath(__file__), "--once", "--root", root]
+    if full:
+        command.append("--full")
+    with open(os.path.join(root, LOG_FILE), 'ab') as log:
+        subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    return True
+
+
+def build_status(root: str = INDEX_ROOT) -> str:
+    return "building" if BuildLock(root).is_held() else "idle"
+
+
+def last_build_failure(root: str = INDEX_ROOT) -> Optional[str]:
+    """Why the last build failed and when the app tries again, or None when it did not fail."""
+    status = read_build_status(root)
+    if not status.get("failures"):
+        return None
+    wait = retry_after(status)
+    return (f"{status.get('error', 'unknown error')} ({status['failures']} failed in a row; "
+            + (f"retrying in {wait:.0f}s)" if wait else "retrying on the next check)"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the RAG knowledge base in the background and swap it in atomically")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="Build one version if the scraped data changed, then exit (default)")
+    mode.add_argument("--watch", action="store_true", help="Keep checking the scraped data and rebuild when it changes")
+    parser.add_argument("--interval", type=float, default=300.0, help="Seconds between checks with --watch")
+    parser.add_argument("--full", action="store_true", help="Re-index every video instead of only the changed ones")
+    parser.add_argument("--root", default=INDEX_ROOT)
+    parser.add_argument("--data", default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.watch:
+        stats = build_once(args.root, args.data, full=args.full)
+        logger.info("%s", stats)
+        return 1 if stats["mode"] == "busy" else 0
+
+    full = args.full
+    try:
+        while True:
+            needed, reason, changes = check_rebuild_needed(args.root, args.data)
+            if needed or full or (changes is not None and changes.stale_manifest):
+                logger.info("Rebuilding: %s", reason)
+                try:
+                    logger.info("%s", build_once(args.root, args.data, full=full))
+                    full = False
+                except Exception:
+                    # The live version is untouched; try again on the next check
+                    logger.exception("Build failed")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
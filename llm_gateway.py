@@ -0,0 +1,361 @@
+"""Shared async gateway for every LLM call made by the Streamlit apps.
+
+One background event loop owns a pooled httpx.AsyncClient per provider, caps
+in-flight requests per provider with a semaphore, retries 429 / 5xx / transport
+errors with jittered exponential backoff (honouring Retry-After), never lets a
+request or its retries run past the caller's deadline, and keeps a latency
+histogram per provider. Sync wrappers let Streamlit scripts call it directly.
+"""
+import asyncio
+import bisect
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# What reading a body that is not the expected completion JSON raises
+MALFORMED_ERRORS = (ValueError, KeyError, IndexError, TypeError, AttributeError)
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+@dataclass
+class Provider:
+    """An OpenAI-compatible chat completions endpoint."""
+    name: str
+    base_url: str
+    api_key_env: str
+    max_concurrency: int = 4
+    max_retries: int = 4
+    timeout: float = 60.0
+
+    @property
+    def api_key(self) -> str:
+        return os.getenv(self.api_key_env, "").strip()
+
+
+def default_providers() -> Dict[str, Provider]:
+    """Groq and OpenRouter, with base URLs and limits overridable from the environment."""
+    return {
+        "groq": Provider("groq", os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"), "GROQ_API_KEY",
+                         max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))),
+        "openrouter": Provider("openrouter", os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"), "OPENROUTER_API_KEY",
+                               max_concurrency=int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "2"))),
+    }
+
+
+class LLMError(Exception):
+    """A chat completion failed for good (non-retryable status, retries exhausted or deadline hit)."""
+
+    def __init__(self, message: str, provider: str = "", status: Optional[int] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are reported as bucket upper bounds."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.total:
+            return None
+        rank = q / 100 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return float(self.bounds[i]) if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 1) if self.total else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": dict(zip([f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"], self.counts)),
+        }
+
+
+class _ProviderState:
+    def __init__(self, provider: Provider, client: httpx.AsyncClient):
+        self.provider = provider
+        self.client = client
+        self.semaphore = asyncio.Semaphore(provider.max_concurrency)
+        self.latency = LatencyHistogram()
+        self.first_token = LatencyHistogram()
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.in_flight = 0
+
+
+class LLMGateway:
+    """Pooled, rate-limited, retrying client for OpenAI-compatible chat completions."""
+
+    def __init__(self, providers: Optional[Dict[str, Provider]] = None, max_connections: int = 20,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.providers = providers or default_providers()
+        self.max_connections = max_connections
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._transport = transport
+        self._states: Dict[str, _ProviderState] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+
+    # --- async API (runs on the gateway loop) ---
+
+    def _state(self, name: str) -> _ProviderState:
+        state = self._states.get(name)
+        if state is None:
+            if name not in self.providers:
+                raise LLMError(f"Unknown LLM provider '{name}'", provider=name)
+            provider = self.providers[name]
+            client = httpx.AsyncClient(
+                base_url=provider.base_url,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                transport=self._transport,
+            )
+            state = self._states[name] = _ProviderState(provider, client)
+        return state
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            # The server's wait is honoured in full; the caller gives up if it runs past the deadline
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+        # Full jitter: spreads retries of concurrent callers instead of synchronising them
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _remaining(deadline: float, name: str) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMError("Deadline exceeded", provider=name)
+        return remaining
+
+    async def _acquire(self, state: _ProviderState, deadline: float):
+        """Wait for one of the provider's concurrency slots, but not past `deadline`."""
+        try:
+            await asyncio.wait_for(state.semaphore.acquire(), self._remaining(deadline, state.provider.name))
+        except asyncio.TimeoutError:
+            raise LLMError("Deadline exceeded waiting for a free slot", provider=state.provider.name) from None
+
+    async def _open(self, state: _ProviderState, payload: Dict, api_key: Optional[str], deadline: float):
+        """Send the request, retrying until a 200 response arrives; returns the open response."""
+        provider = state.provider
+        api_key = api_key or provider.api_key
+        # Local stand-ins (mock_server.py) need no key; "Bearer " alone is not a valid header
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        for attempt in range(provider.max_retries + 1):
+            timeout = min(provider.timeout, self._remaining(deadline, provider.name))
+            response = None
+            state.requests += 1
+            try:
+                request = state.client.build_request("POST", "/chat/completions", json=payload, headers=headers,
+                                                     timeout=httpx.Timeout(timeout))
+                response = await state.client.send(request, stream=True)
+                if response.status_code == 200:
+                    return response
+                await response.aread()
+                await response.aclose()
+                if response.status_code == 429:
+                    state.rate_limited += 1
+                if response.status_code not in RETRY_STATUSES:
+                    state.errors += 1
+                    raise LLMError(f"Error {response.status_code}: {response.text[:200]}", provider.name, response.status_code)
+            except httpx.TransportError as e:
+                if attempt == provider.max_retries:
+                    state.errors += 1
+                    raise LLMError(f"{type(e).__name__}: {e}", provider.name) from e
+            if attempt == provider.max_retries:
+                break
+            delay = self._backoff(attempt, response)
+            if time.monotonic() + delay >= deadline:
+                break
+            state.retries += 1
+            await asyncio.sleep(delay)
+        state.errors += 1
+        status = response.status_code if response is not None else None
+        raise LLMError(f"Giving up after {attempt + 1} attempts" + (f" (last status {status})" if status else ""),
+                       provider.name, status)
+
+    async def astream(self, provider: str, messages: List[Dict[str, str]], model: str, timeout: Optional[float] = None,
+                      deadline: Optional[float] = None, api_key: Optional[str] = None, **params) -> AsyncIterator[str]:
+        """Yield text deltas of a streamed completion.
+
+        `deadline` is an absolute time.monotonic() value (or pass `timeout` seconds)
+        covering queueing, retries and the whole stream.
+        """
+        state = self._state(provider)
+        deadline = deadline or time.monotonic() + (timeout or state.provider.timeout)
+        payload = {"model": model, "messages": messages, "stream": True, **params}
+        started = time.perf_counter()
+        await self._acquire(state, deadline)
+        state.in_flight += 1
+        try:
+            response = await self._open(state, payload, api_key, deadline)
+            try:
+                first = True
+                async for line in response.aiter_lines():
+                    self._remaining(deadline, provider)
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        choices = json.loads(data).get("choices") or [{}]
+                        delta = (choices[0].get("delta") or {}).get("content")
+                    except MALFORMED_ERRORS as e:
+                        state.errors += 1
+                        raise LLMError(f"Malformed stream chunk: {data[:200]}", provider) from e
+                    if delta:
+                        if first:
+                            state.first_token.observe((time.perf_counter() - started) * 1000)
+                            first = False
+                        yield delta
+            except httpx.TransportError as e:
+                # Mid-stream: deltas were already yielded, so this is not retried
+                state.errors += 1
+                raise LLMError(f"{type(e).__name__}: {e}", provider) from e
+            finally:
+                await response.aclose()
+            state.latency.observe((time.perf_counter() - started) * 1000)
+        finally:
+            state.in_flight -= 1
+            state.semaphore.release()
+
+    async def achat(self, provider: str, messages: List[Dict[str, str]], model: str, timeout: Optional[float] = None,
+                    deadline: Optional[float] = None, api_key: Optional[str] = None, **params) -> str:
+        """Full text of a (non-streamed) completion; see astream() for `deadline`."""
+        state = self._state(provider)
+        deadline = deadline or time.monotonic() + (timeout or state.provider.timeout)
+        payload = {"model": model, "messages": messages, **params}
+        started = time.perf_counter()
+        await self._acquire(state, deadline)
+        state.in_flight += 1
+        try:
+            response = await self._open(state, payload, api_key, deadline)
+            try:
+                body = await asyncio.wait_for(response.aread(), self._remaining(deadline, provider))
+            except asyncio.TimeoutError:
+                state.errors += 1
+                raise LLMError("Deadline exceeded reading the response", provider) from None
+            except httpx.TransportError as e:
+                state.errors += 1
+                raise LLMError(f"{type(e).__name__}: {e}", provider) from e
+            finally:
+                await response.aclose()
+        finally:
+            state.in_flight -= 1
+            state.semaphore.release()
+        try:
+            content = json.loads(body)["choices"][0]["message"]["content"]
+        except MALFORMED_ERRORS as e:
+            state.errors += 1
+            raise LLMError(f"Malformed completion: {body[:200]!r}", provider) from e
+        state.latency.observe((time.perf_counter() - started) * 1000)
+        return content
+
+    # --- sync wrappers (callable from any thread, e.g. Streamlit script runs) ---
+
+    def run(self, coro):
+        """Run `coro` on the gateway loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def chat(self, provider: str, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        return self.run(self.achat(provider, messages, model, **kwargs))
+
+    def stream(self, provider: str, messages: List[Dict[str, str]], model: str, **kwargs) -> Iterator[str]:
+        agen = self.astream(provider, messages, model, **kwargs)
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Closing early (consumer stopped reading) releases the connection and semaphore
+            self.run(agen.aclose())
+
+    def client(self, provider: str, api_key: Optional[str] = None) -> "ChatClient":
+        return ChatClient(self, provider, api_key)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """Per-provider counters and latency histograms."""
+        return {
+            name: {
+                "requests": s.requests, "retries": s.retries, "rate_limited": s.rate_limited, "errors": s.errors,
+                "in_flight": s.in_flight, "latency": s.latency.snapshot(), "first_token": s.first_token.snapshot(),
+            }
+            for name, s in self._states.items()
+        }
+
+    def close(self):
+        async def _close():
+            for state in self._states.values():
+                await state.client.aclose()
+        self.run(_close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+class ChatClient:
+    """Drop-in for the groq / openai SDK's `client.chat.completions.create(...)`, routed through the gateway."""
+
+    def __init__(self, gateway: LLMGateway, provider: str, api_key: Optional[str] = None):
+        self._gateway = gateway
+        self._provider = provider
+        self._api_key = api_key
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, model, stream: bool = False, **params):
+        if stream:
+            return (SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+                    for delta in self._gateway.stream(self._provider, messages, model, api_key=self._api_key, **params))
+        content = self._gateway.chat(self._provider, messages, model, api_key=self._api_key, **params)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """The process-wide gateway, created on first use."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
@@ -0,0 +1,484 @@
+"""Local stand-in for the Groq / OpenRouter chat APIs and the YouTube Data API.
+
+Serves OpenAI-compatible `/chat/completions` (JSON and SSE streams) under any
+prefix, plus `search`, `videos`, `channels` and `playlistItems` list calls under
+`/youtube/v3/`. Videos are replayed from scraped_data/*.json dumps or generated
+synthetically; chat replies are synthetic unless a replies file matches the
+question. Latency, injected error rates and the daily YouTube quota are
+configurable, so load tests and benchmarks run offline and reproducibly.
+
+    python mock_server.py --port 8765 --latency-ms 120 --error-rate 0.05 --quota 10000
+
+    GROQ_BASE_URL=http://127.0.0.1:8765/openai/v1 \\
+    OPENROUTER_BASE_URL=http://127.0.0.1:8765/api/v1 \\
+    YOUTUBE_API_BASE_URL=http://127.0.0.1:8765 streamlit run rag.py
+
+`GET /mock/stats` reports request counts and quota use; `POST /mock/reset` clears them.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# YouTube Data API v3 quota cost per list call
+QUOTA_COSTS = {"search": 100, "videos": 1, "channels": 1, "playlistItems": 1}
+MAX_RESULTS = 50
+SYNTHETIC_CHANNELS = ("T-Series", "Zee Music Company", "Sony Music India", "Tips Music", "Saregama Music")
+SYNTHETIC_SONGS = ("Kesariya", "Tum Hi Ho", "Kala Chashma", "Apna Bana Le", "Raataan Lambiyan", "Chaleya", "Heeriye",
+                   "Satranga", "Tere Vaaste", "Jhoome Jo Pathaan", "Malang Sajna", "Pehle Bhi Main", "Sahiba", "Tere Hawaale")
+SYNTHETIC_VERSIONS = ("8K Video Song", "(Lyrical)", "Full Audio", "Official Music Video", "Lofi Mix")
+
+
+def _stable_id(text: str, length: int) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:length]
+
+
+def _squash(name: str) -> str:
+    # "@TSeries", "T-Series" and "t series" all name the same channel
+    return "".join(c for c in name.lower() if c.isalnum())
+
+
+def channel_id_for(name: str) -> str:
+    return "UC" + _stable_id(f"channel:{name}", 22)
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0           # added to every response
+    jitter_ms: float = 0.0            # uniform +/- around latency_ms
+    token_delay_ms: float = 0.0       # between streamed chat chunks
+    error_rate: float = 0.0           # fraction of requests answered with an error status
+    error_statuses: Tuple[int, ...] = (429, 503)
+    quota: Optional[int] = 10000      # YouTube units before 403 quotaExceeded; None = unlimited
+    seed: Optional[int] = None
+
+
+class Catalog:
+    """Videos and channels served by the YouTube endpoints, in the scraped_data record format."""
+
+    def __init__(self, videos: List[Dict]):
+        self.videos = sorted(videos, key=lambda v: v.get("published_at", ""), reverse=True)
+        self.by_id = {v["video_id"]: v for v in self.videos}
+        self.channels: Dict[str, Dict] = {}
+        for video in self.videos:
+            channel = self.channels.setdefault(video["channel_id"], {
+                "id": video["channel_id"], "title": video.get("channel_name", ""),
+                "subscriber_count": int(video.get("channel_subscriber_count") or 0), "videos": [],
+            })
+            channel["videos"].append(video)
+
+    @classmethod
+    def from_scraped(cls, paths: List[str]) -> "Catalog":
+        """Replay videos recorded by the scrapers (dicts with a "videos" list, or bare lists)."""
+        videos = {}
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            records = data.get("videos", []) if isinstance(data, dict) else data
+            default_channel = data.get("channel_name", "") if isinstance(data, dict) else ""
+            for record in records:
+                if not record.get("video_id"):
+                    continue
+                video = dict(record)
+                video.setdefault("channel_name", default_channel)
+                video["channel_id"] = video.get("channel_id") or channel_id_for(video["channel_name"])
+                videos[video["video_id"]] = video
+        return cls(list(videos.values()))
+
+    @classmethod
+    def synthetic(cls, videos_per_channel: int = 120, channels=SYNTHETIC_CHANNELS, seed: int = 0) -> "Catalog":
+        rng = random.Random(seed)
+        start = datetime(2026, 4, 18, tzinfo=timezone.utc)
+        videos = []
+        for name in channels:
+            subscribers = rng.randint(10, 300) * 1_000_000
+            for i in range(videos_per_channel):
+                song = rng.choice(SYNTHETIC_SONGS)
+                views = int(rng.lognormvariate(12, 2))
+                videos.append({
+                    "video_id": _stable_id(f"{name}:{i}", 11),
+                    "title": f"{song} {rng.choice(SYNTHETIC_VERSIONS)} | {name}",
+                    "description": f"Presenting \"{song}\".\n\nSong: {song}\nMusic Label: {name}",
+                    "published_at": (start - timedelta(hours=7 * i + rng.randint(0, 6))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "channel_id": channel_id_for(name),
+                    "channel_name": name,
+                    "channel_subscriber_count": str(subscribers),
+                    "view_count": views,
+                    "like_count": views // rng.randint(20, 80),
+                    "comment_count": views // rng.randint(300, 2000),
+                    "duration": f"PT{rng.randint(2, 6)}M{rng.randint(0, 59)}S",
+                })
+        return cls(videos)
+
+    def find_channel(self, name: str) -> Optional[Dict]:
+        wanted = _squash(name)
+        for channel in self.channels.values():
+            if _squash(channel["title"]) == wanted:
+                return channel
+        return None
+
+
+def _thumbnails(video_id: str) -> Dict:
+    return {size: {"url": f"https://i.ytimg.com/vi/{video_id}/{name}.jpg"}
+            for size, name in (("default", "default"), ("medium", "mqdefault"), ("high", "hqdefault"))}
+
+
+def _video_snippet(video: Dict) -> Dict:
+    return {
+        "publishedAt": video.get("published_at", ""), "channelId": video["channel_id"],
+        "title": video.get("title", ""), "description": video.get("description", ""),
+        "thumbnails": _thumbnails(video["video_id"]), "channelTitle": video.get("channel_name", ""),
+    }
+
+
+def _channel_resource(channel: Dict, parts: set) -> Dict:
+    item = {"kind": "youtube#channel", "id": channel["id"]}
+    if "snippet" in parts:
+        item["snippet"] = {"title": channel["title"], "description": f"Official channel of {channel['title']}.",
+                           "publishedAt": "2010-01-01T00:00:00Z", "thumbnails": _thumbnails(channel["id"])}
+    if "statistics" in parts:
+        item["statistics"] = {"subscriberCount": str(channel["subscriber_count"]),
+                              "videoCount": str(len(channel["videos"])),
+                              "viewCount": str(sum(int(v.get("view_count") or 0) for v in channel["videos"]))}
+    if "contentDetails" in parts:
+        item["contentDetails"] = {"relatedPlaylists": {"uploads": "UU" + channel["id"][2:]}}
+    return item
+
+
+def _page(items: List, params: Dict[str, str], default_size: int = 5) -> Tuple[List, Dict]:
+    size = max(0, min(int(params.get("maxResults") or default_size), MAX_RESULTS))
+    offset = int(params.get("pageToken") or 0)
+    body = {"pageInfo": {"totalResults": len(items), "resultsPerPage": size}}
+    if offset + size < len(items):
+        body["nextPageToken"] = str(offset + size)
+    if offset:
+        body["prevPageToken"] = str(max(0, offset - size))
+    return items[offset:offset + size], body
+
+
+class MockState:
+    """Configuration, catalog, chat replies and counters shared by all handler threads."""
+
+    def __init__(self, config: MockConfig, catalog: Catalog, replies: Optional[List[Dict]] = None):
+        self.config = config
+        self.catalog = catalog
+        self.replies = replies or []
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.quota_used = 0
+            self.requests: Dict[str, int] = {}
+            self.errors = 0
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def latency(self) -> float:
+        with self.lock:
+            jitter = self.rng.uniform(-self.config.jitter_ms, self.config.jitter_ms) if self.config.jitter_ms else 0.0
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+    def injected_error(self) -> Optional[int]:
+        with self.lock:
+            if self.config.error_rate and self.rng.random() < self.config.error_rate:
+                self.errors += 1
+                return self.rng.choice(self.config.error_statuses)
+        return None
+
+    def charge(self, cost: int) -> bool:
+        """Spend `cost` YouTube quota units; False once the quota is exhausted."""
+        with self.lock:
+            if self.config.quota is not None and self.quota_used + cost > self.config.quota:
+                return False
+            self.quota_used += cost
+            return True
+
+    def reply_for(self, messages: List[Dict]) -> str:
+        question = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        for reply in self.replies:
+            if reply.get("match", "").lower() in question.lower():
+                return reply["content"]
+        topic = " ".join(question.split()[:12]) or "your question"
+        return (f"Mock answer about {topic}. Based on the catalogue, the most viewed matches are "
+                f"listed above; this reply comes from the local stand-in server.")
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"requests": dict(self.requests), "errors": self.errors,
+                    "quota_used": self.quota_used, "quota": self.config.quota}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockAPI/1.0"
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, reason: str, message: str):
+        # Both the YouTube and OpenAI clients read error.message; YouTube callers also check errors[].reason
+        headers = {"Retry-After": "1"} if status == 429 else None
+        self._send_json(status, {"error": {"code": status, "message": message, "type": reason,
+                                           "errors": [{"reason": reason, "message": message}]}}, headers)
+
+    def _delay_and_maybe_fail(self) -> bool:
+        time.sleep(self.state.latency())
+        status = self.state.injected_error()
+        if status:
+            self._send_error(status, "rateLimitExceeded" if status == 429 else "backendError", f"Injected error {status}")
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/mock/stats":
+            return self._send_json(200, self.state.stats())
+        if url.path in ("/health", "/mock/health"):
+            return self._send_json(200, {"status": "ok"})
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+        if not url.path.startswith("/youtube/v3/") or resource not in QUOTA_COSTS:
+            return self._send_error(404, "notFound", f"No mock for GET {url.path}")
+        self.state.count(resource)
+        if self._delay_and_maybe_fail():
+            return
+        if not self.state.charge(QUOTA_COSTS[resource]):
+            return self._send_error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+        parts = set(params.get("part", "snippet").split(","))
+        handler = getattr(self, f"_youtube_{resource}")
+        status, body = handler(params, parts)
+        self._send_json(status, body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/mock/reset":
+            self.state.reset()
+            return self._send_json(200, self.state.stats())
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_error(400, "invalid_request_error", "Body is not JSON")
+        if not url.path.endswith("/chat/completions"):
+            return self._send_error(404, "notFound", f"No mock for POST {url.path}")
+        self.state.count("chat.completions")
+        if self._delay_and_maybe_fail():
+            return
+        if "messages" not in payload:
+            return self._send_error(400, "invalid_request_error", "'messages' is required")
+        content = self.state.reply_for(payload.get("messages") or [])
+        if payload.get("stream"):
+            self._stream_chat(payload.get("model", "mock"), content)
+        else:
+            self._send_json(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                "model": payload.get("model", "mock"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"completion_tokens": len(content) // 4 + 1},
+            })
+
+    def _stream_chat(self, model: str, content: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write(data: str):
+            chunk = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+            self.wfile.flush()
+
+        # Word-sized deltas, like real token streams
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            delta = word if i == len(words) - 1 else word + " "
+            write(json.dumps({"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model,
+                              "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}))
+            if self.state.config.token_delay_ms:
+                time.sleep(self.state.config.token_delay_ms / 1000)
+        write("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    # --- YouTube Data API v3 list calls; each returns (status, body) ---
+
+    def _youtube_search(self, params: Dict[str, str], parts: set):
+        catalog = self.state.catalog
+        query = params.get("q", "").lower()
+        if params.get("type") == "channel":
+            channels = [c for c in catalog.channels.values() if query in c["title"].lower()]
+            items = [{"kind": "youtube#searchResult", "id": {"kind": "youtube#channel", "channelId": c["id"]},
+                      "snippet": {"channelId": c["id"], "title": c["title"], "channelTitle": c["title"],
+                                  "description": "", "thumbnails": _thumbnails(c["id"])}} for c in channels]
+        else:
+            videos = catalog.channels.get(params["channelId"], {"videos": []})["videos"] if "channelId" in params else catalog.videos
+            after, before = params.get("publishedAfter"), params.get("publishedBefore")
+            videos = [v for v in videos
+                      if (not query or query in v.get("title", "").lower() or query in v.get("description", "").lower())
+                      and (not after or v.get("published_at", "") >= after)
+                      and (not before or v.get("published_at", "") <= before)]
+            if params.get("order") == "viewCount":
+                videos = sorted(videos, key=lambda v: int(v.get("view_count") or 0), reverse=True)
+            items = [{"kind": "youtube#searchResult", "id": {"kind": "youtube#video", "videoId": v["video_id"]},
+                      "snippet": _video_snippet(v)} for v in videos]
+        page, body = _page(items, params)
+        return 200, {"kind": "youtube#searchListResponse", **body, "items": page}
+
+    def _youtube_videos(self, params: Dict[str, str], parts: set):
+        items = []
+        for video_id in params.get("id", "").split(",")[:MAX_RESULTS]:
+            video = self.state.catalog.by_id.get(video_id)
+            if video is None:
+                continue
+            item = {"kind": "youtube#video", "id": video_id}
+            if "snippet" in parts:
+                item["snippet"] = _video_snippet(video)
+            if "statistics" in parts:
+                item["statistics"] = {"viewCount": str(video.get("view_count", 0)), "likeCount": str(video.get("like_count", 0)),
+                                      "commentCount": str(video.get("comment_count", 0))}
+            if "contentDetails" in parts:
+                item["contentDetails"] = {"duration": video.get("duration", "PT0S")}
+            items.append(item)
+        return 200, {"kind": "youtube#videoListResponse", "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+                     "items": items}
+
+    def _youtube_channels(self, params: Dict[str, str], parts: set):
+        catalog = self.state.catalog
+        if "id" in params:
+            channels = [catalog.channels[c] for c in params["id"].split(",") if c in catalog.channels]
+        else:
+            channel = catalog.find_channel(params.get("forHandle") or params.get("forUsername") or "")
+            channels = [channel] if channel else []
+        items = [_channel_resource(c, parts) for c in channels]
+        return 200, {"kind": "youtube#channelListResponse", "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+                     "items": items}
+
+    def _youtube_playlistItems(self, params: Dict[str, str], parts: set):
+        playlist_id = params.get("playlistId", "")
+        channel = self.state.catalog.channels.get("UC" + playlist_id[2:]) if playlist_id.startswith("UU") else None
+        if channel is None:
+            return 404, {"error": {"code": 404, "message": "The playlist identified with the request's playlistId parameter cannot be found.",
+                                   "errors": [{"reason": "playlistNotFound"}]}}
+        items = []
+        for position, video in enumerate(channel["videos"]):
+            item = {"kind": "youtube#playlistItem", "id": f"{playlist_id}.{video['video_id']}"}
+            if "snippet" in parts:
+                item["snippet"] = {**_video_snippet(video), "playlistId": playlist_id, "position": position,
+                                   "resourceId": {"kind": "youtube#video", "videoId": video["video_id"]}}
+            if "contentDetails" in parts:
+                item["contentDetails"] = {"videoId": video["video_id"], "videoPublishedAt": video.get("published_at", "")}
+            items.append(item)
+        page, body = _page(items, params)
+        return 200, {"kind": "youtube#playlistItemListResponse", **body, "items": page}
+
+
+class MockServer:
+    """The stand-in server on a background thread; use as a context manager in tests and benchmarks."""
+
+    def __init__(self, config: Optional[MockConfig] = None, catalog: Optional[Catalog] = None,
+                 replies: Optional[List[Dict]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.state = MockState(config or MockConfig(), catalog or Catalog.synthetic(), replies)
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Base-URL environment variables that point every client in the repo at this server."""
+        return {"GROQ_BASE_URL": f"{self.url}/openai/v1", "OPENROUTER_BASE_URL": f"{self.url}/api/v1",
+                "YOUTUBE_API_BASE_URL": self.url}
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq/OpenRouter chat APIs and the YouTube Data API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", nargs="*", default=None,
+                        help="Scraped JSON files to replay (default: scraped_data/*.json, synthetic if none)")
+    parser.add_argument("--synthetic", action="store_true", help="Serve generated videos instead of scraped data")
+    parser.add_argument("--replies", help="JSON list of {\"match\": ..., \"content\": ...} chat replies")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--token-delay-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, default=10000, help="YouTube quota units; 0 for unlimited")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    paths = args.data if args.data is not None else sorted(glob.glob("scraped_data/*.json"))
+    catalog = Catalog.from_scraped(paths) if paths and not args.synthetic else Catalog([])
+    if not catalog.videos:
+        catalog = Catalog.synthetic(seed=args.seed or 0)
+    replies = None
+    if args.replies:
+        with open(args.replies, "r", encoding="utf-8") as f:
+            replies = json.load(f)
+    config = MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, token_delay_ms=args.token_delay_ms,
+                        error_rate=args.error_rate, quota=args.quota or None, seed=args.seed)
+
+    server = MockServer(config, catalog, replies, host=args.host, port=args.port)
+    logger.info("Serving %d videos from %d channels on %s", len(catalog.videos), len(catalog.channels), server.url)
+    for name, value in server.env().items():
+        logger.info("  export %s=%s", name, value)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
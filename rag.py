@@ -1,19 +1,31 @@
 import streamlit as st
 import json
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from groq import Groq
 import random
 import os
-import glob
-import re
 from datetime import datetime
 from dotenv import load_dotenv
 
-from yt_scrape.utils import clean_title, deduplicate_videos, prepare_leaderboard, calculate_engagement_score
+from yt_scrape.utils import clean_title, prepare_leaderboard
+from rag_engine.manifest import document_hash
+from rag_engine.query_cache import QueryCache
+from rag_engine.answer_cache import AnswerCache
+from rag_engine.streaming import CompletionTiming, stream_completion
+from rag_engine.engine import IndexNotReady, RAGEngine
+from rag_engine.client import RAGServiceClient
+from rag_engine.snapshot import ARTISTS, MOODS, load_artist_tags, load_rollup, load_video_frame, mood_mask, source_fingerprint
+from rag_engine.rollup import min_views_bucket
+from rag_engine.builder import check_rebuild_needed, current_index_path
+from rag_engine.lazy import LazyResource, lazy_import
+from llm_gateway import LLMError, get_gateway
+from index_builder import EMBEDDING_MODEL, INDEX_CONFIG, INDEX_ROOT, build_status, last_build_failure, start_background_build
+
+# faiss and langchain_core load when the knowledge base is first opened, not before the first paint
+build_index = lazy_import("rag_engine.ann", "build_index")
+save_index_config = lazy_import("rag_engine.ann", "save_index_config")
+KnowledgeBase = lazy_import("rag_engine.store", "KnowledgeBase")
+save_knowledge_base = lazy_import("rag_engine.store", "save_knowledge_base")
+LazyEmbeddings = lazy_import("rag_engine.lazy_embeddings", "LazyEmbeddings")
 
 # Set page config for a wider dashboard look
 st.set_page_config(page_title="Bollywood Analytics | Ayush Mandowara & The Vibe Coder", layout="wide", page_icon="🎬")
@@ -21,46 +33,25 @@ st.set_page_config(page_title="Bollywood Analytics | Ayush Mandowara & The Vibe
 # Load environment variables
 load_dotenv()
 
-# Configure Groq
+# Configure Groq (pooled, rate-limited and retried by the shared LLM gateway)
 API_KEY = os.getenv('GROQ_API_KEY', 'SET YOUR OWN API KEY')
-client = Groq(api_key=API_KEY)
+client = get_gateway().client("groq", api_key=API_KEY)
+# Deadline for one answer, covering queueing, retries and streaming
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
 MODEL_NAME = "llama-3.3-70b-versatile"
-
-# Helper to infer channel name from description for legacy data
-def infer_channel_name(row):
-    channel_name = row.get('channel_name') if isinstance(row, dict) else row['channel_name']
-    if channel_name and str(channel_name).strip() != "" and str(channel_name).lower() != "nan":
-        return channel_name
-    title = row.get('title', '') if isinstance(row, dict) else row['title']
-    description = row.get('description', '') if isinstance(row, dict) else row['description']
-    desc_title = f"{title} {description}".lower()
-    if "t-series" in desc_title: return "T-Series"
-    if "zee music" in desc_title: return "Zee Music Company"
-    if "sony music" in desc_title: return "Sony Music India"
-    if "tips" in desc_title: return "Tips Music"
-    if "saregama" in desc_title: return "Saregama Music"
-    if "eros now" in desc_title: return "Eros Now"
-    if "yrf" in desc_title or "yash raj" in desc_title: return "YRF"
-    return "Other/Legacy"
-
-# Helper to extract artist/singer/movie from description
-def extract_metadata(text, title):
-    metadata = {"singers": [], "movie": "Unknown", "tags": []}
-    singer_match = re.search(r"Singer[s]?:\s*([^\n|]+)", text, re.IGNORECASE)
-    if singer_match:
-        metadata["singers"] = [s.strip() for s in re.split(r",|&", singer_match.group(1))]
-    movie_match = re.search(r"Movie:\s*([^\n|]+)", text, re.IGNORECASE)
-    if movie_match:
-        metadata["movie"] = movie_match.group(1).strip()
-    if any(k in (text + title).lower() for k in ["rap", "hip hop", "honey singh", "badshah", "raftaar"]):
-        metadata["tags"].append("Rap/Hip-Hop")
-    if any(k in (text + title).lower() for k in ["sad", "dard", "judai", "broken"]):
-        metadata["tags"].append("Emotional/Sad")
-    if any(k in (text + title).lower() for k in ["party", "dance", "club", "nachta"]):
-        metadata["tags"].append("Party/Dance")
-    if any(k in (text + title).lower() for k in ["bhakti", "bhajan", "devotional"]):
-        metadata["tags"].append("Devotional")
-    return metadata
+# Set to a rag_service.py URL to search and answer there instead of in this process
+RAG_SERVICE_URL = os.getenv('RAG_SERVICE_URL', '').strip()
+# Seconds between checks for a finished build while there is no index yet
+BUILD_POLL_SECONDS = float(os.getenv('BUILD_POLL_SECONDS', '5'))
+# Query vector + top-k rows per (question, mood, filters), shared by all sessions
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '1024'))
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', '600'))
+# Answers reused for near-duplicate questions over (mostly) the same documents
+ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92'))
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '512'))
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '3600'))
+# Rough token cap for the retrieved context sent to Groq
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
 
 # Legacy function for testing
 def extract_text_from_json(json_data):
@@ -78,94 +69,105 @@ def extract_text_from_json(json_data):
         texts.append(text)
     return texts
 
-@st.cache_data
-def load_all_scraped_data(directory="scraped_data"):
-    all_videos = []
-    json_files = glob.glob(os.path.join(directory, "*.json"))
-    if not json_files: return []
-    for json_path in json_files:
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if isinstance(data, dict): all_videos.extend(data.get("videos", []))
-                elif isinstance(data, list): all_videos.extend(data)
-        except Exception as e: st.warning(f"⚠️ Could not load {json_path}: {e}")
-    return deduplicate_videos(all_videos)
-
 @st.cache_resource
-def get_embeddings():
+def load_video_snapshot(fingerprint, directory="scraped_data"):
+    # Keyed on the source fingerprint, so a new scrape yields a fresh frame, artist tags and rollup
+    frame = load_video_frame(directory, on_error=lambda path, e: st.warning(f"⚠️ Could not load {path}: {e}"))
+    return frame, load_artist_tags(num_rows=len(frame)), load_rollup()
+
+def load_embedding_model():
+    # torch + transformers take seconds to import; nothing at module level pulls them in
     import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
     device = "cuda" if torch.cuda.is_available() else "cpu"
     if device == "cpu" and torch.backends.mps.is_available(): device = "mps"
-    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2", model_kwargs={'device': device})
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, model_kwargs={'device': device})
+
+@st.cache_resource
+def get_embedding_model():
+    # One per process, warming in a background thread while the first page renders
+    return LazyResource(load_embedding_model, name="embedding model").warm()
+
+def get_embeddings():
+    return get_embedding_model().get()
 
 def create_faiss_vector_store(texts, path="faiss_index"):
-    vector_store = FAISS.from_texts(texts, embedding=get_embeddings())
-    vector_store.save_local(path)
+    index = build_index(get_embeddings().embed_documents(texts), INDEX_CONFIG)
+    save_knowledge_base(path, index, [{"id": document_hash(t), "page_content": t} for t in texts])
+    save_index_config(path, INDEX_CONFIG)
 
 @st.cache_resource
-def load_faiss_vector_store(path="faiss_index"):
-    return FAISS.load_local(path, get_embeddings(), allow_dangerous_deserialization=True)
+def get_query_cache():
+    # Dropped automatically when the knowledge base is rebuilt (new index version)
+    return QueryCache(max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
 
-def perform_rebuild(videos):
-    if not videos: return False
-    texts = []
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    for i, video in enumerate(videos):
-        if i % 500 == 0:
-            progress_bar.progress(i / len(videos))
-            status_text.text(f"📝 Indexing video {i}/{len(videos)}...")
-        raw_title = video.get("title", "")
-        title = clean_title(raw_title)
-        desc = str(video.get("description", ""))
-        meta = extract_metadata(desc, title)
-        singers = ", ".join(meta["singers"]) if meta["singers"] else "N/A"
-        tags = ", ".join(meta["tags"]) if meta["tags"] else "General"
-        published_at = video.get("published_at", "")
-        year = published_at[:4] if published_at else "Unknown"
-        # Use inference logic for channel name
-        channel = infer_channel_name(video)
-        
-        # Calculate engagement score for "Viral" detection
-        viral_score = calculate_engagement_score(
-            video.get('view_count', 0), 
-            video.get('like_count', 0), 
-            video.get('comment_count', 0)
-        )
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache(threshold=ANSWER_CACHE_THRESHOLD, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL)
 
-        text = f"TITLE: {title}\nSINGERS: {singers}\nMOVIE: {meta['movie']}\nTAGS: {tags}\nCHANNEL: {channel}\nYEAR: {year}\nVIEWS: {video.get('view_count', 0)}\nVIRAL SCORE: {viral_score}\nDESCRIPTION: {desc[:500]}\n\n"
-        texts.append(text)
-    create_faiss_vector_store(texts)
-    progress_bar.progress(1.0)
-    status_text.text("✅ Knowledge Base Rebuilt!")
-    return True
+@st.cache_resource(max_entries=2)
+def load_faiss_vector_store(path=INDEX_ROOT):
+    # Memory-mapped index + row-keyed docstore: nothing is unpickled and only hits are decoded.
+    # Keyed on the version directory, so a newly published build is opened on the next rerun
+    # while sessions still holding the previous one keep a valid copy.
+    return KnowledgeBase(path, LazyEmbeddings(get_embedding_model()))
 
-def check_rebuild_needed(directory="scraped_data", index_path="faiss_index"):
-    if not os.path.exists(index_path): return True, "Index missing"
-    json_files = glob.glob(os.path.join(directory, "*.json"))
-    if not json_files: return False, "No data"
-    latest_data_time = max(os.path.getmtime(f) for f in json_files)
-    index_file = os.path.join(index_path, "index.faiss")
-    if not os.path.exists(index_file): return True, "Index file missing"
-    if latest_data_time > os.path.getmtime(index_file): return True, "New data detected"
-    return False, "Up to date"
+@st.cache_resource
+def get_engine():
+    if RAG_SERVICE_URL:
+        return RAGServiceClient(RAG_SERVICE_URL, timeout=LLM_TIMEOUT)
+    return RAGEngine(INDEX_ROOT, LazyEmbeddings(get_embedding_model()), client, MODEL_NAME,
+                     query_cache=get_query_cache(), answer_cache=get_answer_cache(),
+                     context_token_budget=CONTEXT_TOKEN_BUDGET, timeout=LLM_TIMEOUT, loader=load_faiss_vector_store)
+
+@st.fragment(run_every=BUILD_POLL_SECONDS)
+def wait_for_first_build():
+    if current_index_path(INDEX_ROOT) is not None:
+        st.rerun()
+    needed = check_rebuild_needed(INDEX_ROOT)[0]
+    if needed:
+        start_background_build()  # no-op while a build runs or after a recent failure
+    failure = last_build_failure(INDEX_ROOT)
+    if failure:
+        st.warning(f"⚠️ Building the knowledge base failed: {failure}. See {INDEX_ROOT}/build.log.")
+    elif not needed:
+        st.info("📭 No scraped data yet. Run the scraper and the knowledge base is built automatically.")
+    else:
+        st.info("⏳ Building the knowledge base in the background. The assistant opens as soon as it is ready.")
 
 # --- UI LOGIC ---
 st.markdown("<h1 style='text-align: center; color: #E50914;'>✨ Bollywood Analytics Engine ✨</h1>", unsafe_allow_html=True)
 
-rebuild_required, reason = check_rebuild_needed()
+engine = get_engine()
+if RAG_SERVICE_URL:
+    # The service and its builder own the index; this process only renders
+    rebuild_required, reason, build_started, index_path = False, "", False, None
+else:
+    get_embedding_model()
+    rebuild_required, reason, source_changes = check_rebuild_needed(INDEX_ROOT)
+    # Built by a separate process into a new version; this run keeps serving the current one.
+    # Only-touched sources get a builder too: it alone may refresh the live manifest.
+    build_started = ((rebuild_required or (source_changes is not None and source_changes.stale_manifest))
+                     and start_background_build())
+    index_path = current_index_path(INDEX_ROOT)
 with st.sidebar:
     st.header("⚙️ Data Engine")
     if st.button("🎭 Mogambo Khush Hua!", use_container_width=True):
         st.balloons()
         st.toast("Super Hit! 🍿🎬")
-    if st.button("🔄 Rebuild Everything", type="primary", use_container_width=True):
-        import shutil
-        if os.path.exists("faiss_index"): shutil.rmtree("faiss_index")
-        st.cache_data.clear()
-        st.cache_resource.clear()
-        st.rerun()
+    if RAG_SERVICE_URL:
+        st.caption(f"📦 Index {engine.version or 'not built yet'} · served by {RAG_SERVICE_URL}")
+    else:
+        if st.button("🔄 Rebuild Everything", type="primary", use_container_width=True):
+            if start_background_build(full=True, force=True):
+                st.toast("Full rebuild started; the current index stays live until it is done. 🎬")
+            else:
+                st.toast("A rebuild is already running.")
+        status = "building" if build_started else build_status()
+        st.caption(f"📦 Index {os.path.basename(index_path) if index_path else 'not built yet'} · builder {status}"
+                   + (f" ({reason})" if rebuild_required and status == "building" else ""))
+        build_failure = last_build_failure(INDEX_ROOT)
+        if build_failure: st.caption(f"⚠️ Last build failed: {build_failure}")
     st.divider()
     st.header("🎯 Filters")
     view_range = st.slider("Min Views filter", 0, 10000000, 0, 100000)
@@ -179,38 +181,41 @@ with st.sidebar:
         "Indie-pop is now rivaling Bollywood tracks for #1!"
     ]
     st.info(random.choice(facts))
+    engine_stats = engine.stats()
+    query_stats = engine_stats['query_cache']
+    if query_stats: st.caption(f"🧠 Retrieval cache: {query_stats['hits']} hits / {query_stats['misses']} misses ({query_stats['hit_rate']:.0%})")
+    use_answer_cache = st.toggle("⚡ Reuse answers for similar questions", value=True)
+    answer_stats = engine_stats['answer_cache']
+    if answer_stats: st.caption(f"⚡ Answer cache: {answer_stats['hits']} hits / {answer_stats['misses']} misses ({answer_stats['hit_rate']:.0%})")
 
-if not os.path.exists("faiss_index"):
-    videos = load_all_scraped_data()
-    if perform_rebuild(videos): st.rerun()
-
-all_videos = load_all_scraped_data()
-df = pd.DataFrame(all_videos)
-if not df.empty:
-    df['channel_name'] = df.apply(infer_channel_name, axis=1)
-    df['view_count'] = pd.to_numeric(df['view_count'], errors='coerce').fillna(0)
+# Typed columnar snapshot: channel names inferred and counts parsed at build time
+df, artist_tags, rollup = load_video_snapshot(json.dumps(source_fingerprint()))
 
 tab1, tab2 = st.tabs(["🤖 Bollywood AI Assistant", "📈 Analytics"])
 
 with tab2:
     if not df.empty:
-        filtered_df = df[df['view_count'] >= view_range]
-        mood = st.radio("Vibe Picker:", ["All", "Party/Dance", "Emotional/Sad", "Rap/Hip-Hop", "Devotional"], horizontal=True)
+        mask = df['view_count'].to_numpy() >= view_range
+        # Metrics and charts sum rollup cells (channel × month × mood × 100k-view bucket), never videos
+        cells = rollup.cells['view_bucket'].to_numpy() >= min_views_bucket(view_range)
+        mood = st.radio("Vibe Picker:", ["All", *MOODS], horizontal=True)
         if mood != "All":
-            pattern = '|'.join(mood.lower().split('/'))
-            filtered_df = filtered_df[filtered_df['title'].str.contains(pattern, case=False, na=False) | filtered_df['description'].str.contains(pattern, case=False, na=False)]
+            # Moods are tagged at snapshot build time; no text scan here
+            mask &= mood_mask(df['moods'].to_numpy(), mood)
+            cells &= mood_mask(rollup.cells['moods'].to_numpy(), mood)
+        filtered_df = df[mask]
+        cube = rollup.select(cells)
+        videos_per_label = cube.rollup('channel_name')
         
         c1, c2, c3 = st.columns(3)
-        c1.metric("Videos", f"{len(filtered_df):,}")
-        c2.metric("Views", f"{filtered_df['view_count'].sum():,}")
-        c3.metric("Top Label", filtered_df['channel_name'].value_counts().idxmax() if not filtered_df.empty else "N/A")
+        c1.metric("Videos", f"{cube.total():,}")
+        c2.metric("Views", f"{cube.total('view_count'):,}")
+        c3.metric("Top Label", videos_per_label.idxmax() if len(cube) else "N/A")
         
         col_a, col_b = st.columns(2)
-        fig = px.pie(filtered_df, values='view_count', names='channel_name', title='View Distribution', hole=.3)
+        fig = px.pie(cube.rollup('channel_name', 'view_count').reset_index(), values='view_count', names='channel_name', title='View Distribution', hole=.3)
         col_a.plotly_chart(fig, use_container_width=True)
-        filtered_df['pub_date'] = pd.to_datetime(filtered_df['published_at'])
-        df_month = filtered_df.groupby(filtered_df['pub_date'].dt.to_period('M')).size().reset_index(name='count')
-        df_month['pub_date'] = df_month['pub_date'].astype(str)
+        df_month = cube.rollup('pub_month').reset_index(name='count').rename(columns={'pub_month': 'pub_date'})
         fig2 = px.bar(df_month, x='pub_date', y='count', title='Velocity', color_discrete_sequence=['#E50914'])
         col_b.plotly_chart(fig2, use_container_width=True)
         
@@ -219,22 +224,16 @@ with tab2:
         
         with col_art:
             st.subheader(f"🔥 Top {top_n} Trending Artists")
-            artists = ["Arijit Singh", "Diljit Dosanjh", "Shreya Ghoshal", "Jubin Nautiyal", "Karan Aujla", "Vishal Mishra", "Neha Kakkar", "Sonu Nigam", "Badshah"]
-            artist_stats = []
-            for a in artists:
-                a_df = filtered_df[filtered_df['title'].str.contains(a, case=False, na=False)]
-                if not a_df.empty: artist_stats.append({"Artist": a, "Videos": len(a_df), "Total Views": a_df['view_count'].sum()})
+            # Group-by over the precomputed video × artist tags
+            videos_per_artist, views_per_artist = artist_tags.totals(mask, df['view_count'].to_numpy())
+            artist_stats = [{"Artist": a, "Videos": int(n), "Total Views": int(v)}
+                            for a, n, v in zip(artist_tags.labels, videos_per_artist, views_per_artist) if n]
             if artist_stats: st.dataframe(prepare_leaderboard(artist_stats).head(top_n), hide_index=True, use_container_width=True)
 
         with col_vir:
             st.subheader("🚀 Viral Hits (High Engagement)")
             if not filtered_df.empty:
-                # Add score for display
-                filtered_df['Viral Score'] = filtered_df.apply(
-                    lambda x: calculate_engagement_score(x['view_count'], x.get('like_count', 0), x.get('comment_count', 0)), 
-                    axis=1
-                )
-                viral_df = filtered_df.sort_values("Viral Score", ascending=False).head(5)
+                viral_df = filtered_df.nlargest(5, 'engagement_score').rename(columns={'engagement_score': 'Viral Score'})
                 st.dataframe(viral_df[['title', 'Viral Score', 'channel_name']], hide_index=True, use_container_width=True)
 
 with tab1:
@@ -249,29 +248,47 @@ with tab1:
             if rv.get('thumbnail_url'): st.image(rv['thumbnail_url'], width=250)
             
     with col_s.expander("🌟 Artist Spotlight"):
-        sa = st.selectbox("Pick an Artist:", artists)
+        sa = st.selectbox("Pick an Artist:", ARTISTS)
         if st.button("Spotlight!"):
-            with st.spinner("Searching..."):
-                res = client.chat.completions.create(messages=[{"role": "user", "content": f"Filmy Spotlight for {sa} in 2026. 2 sentences. Emojis!"}], model=MODEL_NAME)
-                st.success(res.choices[0].message.content)
+            timing = CompletionTiming()
+            st.write_stream(stream_completion(client, [{"role": "user", "content": f"Filmy Spotlight for {sa} in 2026. 2 sentences. Emojis!"}], MODEL_NAME, timing, timeout=LLM_TIMEOUT))
+            st.caption(timing.summary())
 
+    if index_path is None and not RAG_SERVICE_URL:
+        wait_for_first_build()
+        st.stop()
     if "chat_history" not in st.session_state: st.session_state.chat_history = []
-    vector_store = load_faiss_vector_store()
     question = st.text_input("🎤 Ask your Bollywood AI:", placeholder=f"Ask about a {mood_vibe} song...")
 
+    streamed = False
     if question:
+        try:
+            # Year / channel named in the question and the sidebar Min Views narrow the search up front
+            answer = engine.ask(question, mood=mood_vibe, min_views=view_range, use_cache=use_answer_cache)
+        except IndexNotReady:
+            st.info("⏳ The knowledge base is still being built. Ask again in a moment.")
+            st.stop()
+        except LLMError as e:
+            st.error(f"The answer could not be generated: {e}")
+            st.stop()
         st.session_state.chat_history.append({"role": "user", "content": question})
-        retriever = vector_store.as_retriever(search_kwargs={"k": 12})
-        docs = retriever.invoke(f"{question} {mood_vibe} mood")
-        context = "\n---\n".join([doc.page_content for doc in docs])
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "system", "content": "You are AssistantBot, a Bollywood Analyst. NEVER say you don't know if context has a mention. Provide details HERE. If date is 2026, celebrate it!"},
-                      {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}],
-            model=MODEL_NAME,
-        )
-        st.session_state.chat_history.append({"role": "assistant", "content": chat_completion.choices[0].message.content})
+        if not answer.cached:
+            # Render tokens as they arrive; the newest message sits above the history anyway
+            with st.chat_message("assistant", avatar="🎬"):
+                try:
+                    st.write_stream(answer.tokens)
+                except LLMError as e:
+                    st.error(f"The answer was cut off: {e}")
+                    st.session_state.chat_history.pop()
+                    st.stop()
+                st.caption(answer.note)
+            streamed = True
+        st.session_state.chat_history.append({"role": "assistant", "content": answer.text, "note": answer.note})
 
-    for msg in reversed(st.session_state.chat_history):
-        st.chat_message(msg["role"], avatar="🎬" if msg["role"]=="assistant" else None).write(msg["content"])
+    history = st.session_state.chat_history[:-1] if streamed else st.session_state.chat_history
+    for msg in reversed(history):
+        with st.chat_message(msg["role"], avatar="🎬" if msg["role"]=="assistant" else None):
+            st.write(msg["content"])
+            if msg.get("note"): st.caption(msg["note"])
 
 st.markdown("<hr><p style='text-align: center;'>Data Engine Powered by Groq & Gemini CLI | © 2026 Ayush Mandowara & The Vibe Coder</p>", unsafe_allow_html=True)
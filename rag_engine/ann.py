@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+# The config lives in a faiss-free module so the app can read it; re-exported here for the index code
+from rag_engine.index_config import IndexConfig, load_index_config, save_index_config
+
+def create_index(config: IndexConfig, dim: int, n_train: Optional[int] = None) -> faiss.Index:
+    """Create an empty (possibly untrained) FAISS index for `config`."""
+    if config.kind == "flat":
+        if config.sq8:
+            return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+        return faiss.IndexFlatL2(dim)
+    if config.kind == "hnsw":
+        if config.sq8:
+            index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, config.hnsw_m)
+        else:
+            index = faiss.IndexHNSWFlat(dim, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+        return index
+
+    # FAISS wants ~39 training points per cell; shrink nlist for small corpora
+    nlist = config.nlist
+    if n_train:
+        nlist = max(1, min(nlist, n_train // 39))
+    quantizer = faiss.IndexFlatL2(dim)
+    if config.kind == "ivf_pq":
+        nbits = config.pq_nbits
+        if n_train:
+            while nbits > 1 and n_train < 39 * (1 << nbits):
+                nbits -= 1
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, config.pq_m, nbits)
+    if config.sq8:
+        return faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, faiss.ScalarQuantizer.QT_8bit)
+    return faiss.IndexIVFFlat(quantizer, dim, nlist)
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, config: IndexConfig, seed: int = 0):
+    """Train `index` on at most config.train_size randomly sampled rows of `vectors`."""
+    if index.is_trained:
+        return
+    if len(vectors) > config.train_size:
+        rows = np.random.default_rng(seed).choice(len(vectors), config.train_size, replace=False)
+        vectors = vectors[rows]
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def apply_search_params(index, config: Optional[IndexConfig]):
+    """Set nprobe / efSearch on a built or freshly loaded index."""
+    if config is None:
+        return
+    if config.kind.startswith("ivf"):
+        faiss.extract_index_ivf(index).nprobe = config.nprobe
+    elif config.kind == "hnsw":
+        index.hnsw.efSearch = config.ef_search
+
+
+def filtered_search_params(config: Optional[IndexConfig], mask: np.ndarray):
+    """SearchParameters that restrict a search to rows where `mask` is True.
+
+    Per-call parameters replace the index's own nprobe / efSearch, so the
+    configured values are copied in.
+    """
+    bits = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bits))
+    kind = config.kind if config else "flat"
+    if kind.startswith("ivf"):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=config.nprobe)
+    elif kind == "hnsw":
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=config.ef_search)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    # The selector reads `bits` in place; keep both alive as long as the params
+    params.referenced_objects = [selector, bits]
+    return params
+
+
+def build_index(vectors: np.ndarray, config: IndexConfig) -> faiss.Index:
+    """Create, train and fill an index for `vectors` in one go."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = create_index(config, vectors.shape[1], n_train=min(len(vectors), config.train_size))
+    train_index(index, vectors, config)
+    index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+
+def evaluate_configs(vectors: np.ndarray, configs: List[IndexConfig], k: int = 12, n_queries: int = 500, seed: int = 0) -> List[Dict]:
+    """Recall@k and per-query latency of each config against exact flat search.
+
+    Queries are corpus rows sampled at random, the usual self-query protocol when
+    no labelled query set is at hand.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)]
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    report = []
+    for config in configs:
+        start = time.perf_counter()
+        index = build_index(vectors, config)
+        build_seconds = time.perf_counter() - start
+        latencies = []
+        found = np.empty_like(truth)
+        for i, query in enumerate(queries):
+            t = time.perf_counter()
+            _, ids = index.search(query[None, :], k)
+            latencies.append((time.perf_counter() - t) * 1000)
+            found[i] = ids[0]
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        report.append({
+            "config": asdict(config),
+            f"recall@{k}": round(float(recall), 4),
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)), 4),
+            "latency_ms_p95": round(float(np.percentile(latencies, 95)), 4),
+            "build_seconds": round(build_seconds, 3),
+            "index_bytes": int(faiss.serialize_index(index).size),
+        })
+    return report
+
+
+def main(argv=None):
+    """Print a recall@k vs latency report for candidate index settings."""
+    parser = argparse.ArgumentParser(description="Compare FAISS index types against exact search")
+    parser.add_argument("--index", default="faiss_index", help="Index root (or knowledge-base directory) holding a flat index.faiss to take vectors from")
+    parser.add_argument("-k", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 128])
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args(argv)
+
+    from rag_engine.builder import current_index_path
+    flat = faiss.read_index(os.path.join(current_index_path(args.index) or args.index, "index.faiss"))
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+    configs = [IndexConfig("flat"), IndexConfig("flat", sq8=True)]
+    configs += [IndexConfig("hnsw", ef_search=ef) for ef in args.ef_search]
+    configs += [IndexConfig("ivf_flat", nprobe=n) for n in args.nprobe]
+    configs += [IndexConfig("ivf_pq", nprobe=n) for n in args.nprobe]
+
+    report = evaluate_configs(vectors, configs, k=args.k, n_queries=args.queries)
+    for row in report:
+        c = row["config"]
+        label = c["kind"] + (" sq8" if c["sq8"] else "") + (f" nprobe={c['nprobe']}" if c["kind"].startswith("ivf") else "") + (f" efSearch={c['ef_search']}" if c["kind"] == "hnsw" else "")
+        print(f"{label:<28} recall@{args.k}={row[f'recall@{args.k}']:.3f}  p50={row['latency_ms_p50']:.3f}ms  p95={row['latency_ms_p95']:.3f}ms  size={row['index_bytes'] / 1e6:.1f}MB")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional
+
+import numpy as np
+
+
+class AnswerCache:
+    """Semantic cache of LLM answers for near-duplicate questions.
+
+    An answer is reused when the new question's embedding has cosine similarity
+    >= `threshold` with a stored one, the two retrieved mostly the same
+    documents (Jaccard overlap of doc ids >= `min_doc_overlap`) and both ran
+    against the same knowledge-base version. Least recently used entries are
+    evicted beyond `max_entries`; entries older than `ttl` seconds are ignored.
+    """
+
+    def __init__(self, threshold: float = 0.92, min_doc_overlap: float = 0.5, max_entries: int = 512, ttl: float = 3600.0):
+        self.threshold = threshold
+        self.min_doc_overlap = min_doc_overlap
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version: Optional[Hashable] = None
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: Hashable):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def lookup(self, vector, doc_ids: Iterable[str], version: Hashable) -> Optional[str]:
+        """Stored answer for a question similar to `vector`, or None."""
+        doc_ids = frozenset(doc_ids)
+        with self._lock:
+            self._check_version(version)
+            now = time.monotonic()
+            for key in [key for key, entry in self._entries.items() if entry["expires"] < now]:
+                del self._entries[key]
+            best_key, best_score = None, self.threshold
+            if self._entries:
+                keys = list(self._entries)
+                scores = np.stack([self._entries[key]["vector"] for key in keys]) @ self._unit(vector)
+                # Most similar first; the doc-id check only runs on the few above threshold
+                for i in np.argsort(-scores):
+                    if scores[i] < best_score:
+                        break
+                    stored = self._entries[keys[i]]["doc_ids"]
+                    union = len(stored | doc_ids)
+                    if union == 0 or len(stored & doc_ids) / union >= self.min_doc_overlap:
+                        best_key, best_score = keys[i], float(scores[i])
+                        break
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key]["answer"]
+
+    def put(self, vector, doc_ids: Iterable[str], answer: str, version: Hashable):
+        with self._lock:
+            self._check_version(version)
+            self._entries[next(self._ids)] = {
+                "vector": self._unit(vector),
+                "doc_ids": frozenset(doc_ids),
+                "answer": answer,
+                "expires": time.monotonic() + self.ttl,
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since this cache object was created."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
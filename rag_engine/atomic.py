@@ -0,0 +1,19 @@
+import os
+import tempfile
+from typing import Callable
+
+
+def replace_with(path: str, write: Callable[[str], None]):
+    """Have `write` fill a private temp file next to `path`, then rename it over `path`.
+
+    Private, so processes rebuilding the same file at once do not write into
+    each other's temp file, and readers only ever see a complete file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from rag_engine.ann import IndexConfig
+from rag_engine.builder import build_index_version, current_index_path
+from rag_engine.documents import extract_metadata
+from rag_engine.snapshot import read_scraped_videos
+from rag_engine.store import KnowledgeBase
+from yt_scrape.utils import clean_title
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_KS = (1, 5, 10)
+# Higher is better for quality, lower for everything else; cost metrics are noisy, hence the looser default
+QUALITY_METRICS = ("mrr",)
+COST_METRICS = ("build_seconds", "index_bytes", "peak_rss_mb", "latency_ms.total.p50", "latency_ms.total.p95",
+                "latency_ms.total.p99")
+
+
+def synthetic_videos(videos: List[dict], scale: int, seed: int = 0) -> List[dict]:
+    """`videos` plus scale - 1 perturbed copies of each, for measuring a corpus larger than the scrape.
+
+    Copies get their own ids, shuffled title words and jittered counts, so they
+    act as near-duplicate distractors for queries labelled with the originals.
+    """
+    rng = random.Random(seed)
+    scaled = list(videos)
+    for copy in range(1, max(1, scale)):
+        for video in videos:
+            words = str(video.get("title", "")).split()
+            rng.shuffle(words)
+            scaled.append({**video, "video_id": f"{video.get('video_id')}~{copy}", "title": " ".join(words),
+                           "view_count": int(int(video.get("view_count") or 0) * rng.uniform(0.5, 1.5))})
+    return scaled
+
+
+def generate_queries(videos: List[dict], n: int = 200, seed: int = 0) -> List[Dict[str, object]]:
+    """A labelled query set derived from the data itself.
+
+    "title" queries are the first words of a cleaned title and expect that
+    video; "singer" queries ask for a singer with 2-10 songs and expect all of
+    them. Seeded, so the same data always gives the same set.
+    """
+    rng = random.Random(seed)
+    titled = [v for v in videos if v.get("video_id") and len(clean_title(v.get("title", "")).split()) >= 2]
+    by_singer: Dict[str, List[str]] = {}
+    for video in titled:
+        for singer in extract_metadata(str(video.get("description", "")), "")["singers"]:
+            if singer:
+                by_singer.setdefault(singer, []).append(video["video_id"])
+
+    queries = []
+    for video in rng.sample(titled, min(len(titled), n - n // 4)):
+        words = clean_title(video["title"]).split("|")[0].split()
+        queries.append({"query": " ".join(words[:6]), "relevant": [video["video_id"]], "kind": "title"})
+    singers = sorted(s for s, ids in by_singer.items() if 2 <= len(set(ids)) <= 10)
+    for singer in rng.sample(singers, min(len(singers), n - len(queries))):
+        queries.append({"query": f"songs sung by {singer}", "relevant": sorted(set(by_singer[singer])), "kind": "singer"})
+    return queries
+
+
+def load_queries(path: str) -> List[Dict[str, object]]:
+    """A labelled query set from JSONL: {"query", "relevant": [video ids], "kind"?} per line."""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not item.get("query") or not item.get("relevant"):
+                raise ValueError(f"{path}:{number}: each query needs \"query\" and \"relevant\"")
+            queries.append({"query": item["query"], "relevant": list(item["relevant"]), "kind": item.get("kind", "labelled")})
+    return queries
+
+
+def ranking_metrics(ranked: Sequence[Sequence[str]], relevant: Sequence[Sequence[str]],
+                    ks: Sequence[int] = DEFAULT_KS) -> Dict[str, float]:
+    """Mean recall@k (share of a query's relevant ids in its top k) and MRR over the queries."""
+    if not ranked:
+        return {}
+    recall = {k: [] for k in ks}
+    reciprocal = []
+    for found, wanted in zip(ranked, relevant):
+        wanted = set(wanted)
+        for k in ks:
+            recall[k].append(len(wanted.intersection(found[:k])) / len(wanted))
+        rank = next((i for i, doc_id in enumerate(found, 1) if doc_id in wanted), None)
+        reciprocal.append(1 / rank if rank else 0.0)
+    metrics = {f"recall@{k}": round(float(np.mean(values)), 4) for k, values in recall.items()}
+    metrics["mrr"] = round(float(np.mean(reciprocal)), 4)
+    return metrics
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+            "mean": round(float(np.mean(values)), 3)}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process and its finished children (embedding workers), in MB."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS, KiB elsewhere
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(base, name)) for base, _, names in os.walk(path) for name in names)
+
+
+def query_set_id(queries: List[Dict[str, object]]) -> str:
+    """Fingerprint of a query set: results are only comparable when it matches."""
+    payload = json.dumps([[q["query"], sorted(q["relevant"])] for q in queries], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def run_benchmark(videos: List[dict], queries: List[Dict[str, object]], embeddings, workdir: str,
+                  config: Optional[IndexConfig] = None, ks: Sequence[int] = DEFAULT_KS, hybrid: bool = True,
+                  warmup: int = 5) -> Dict[str, object]:
+    """Build a knowledge base from `videos` under `workdir`, run `queries` one at a time and report.
+
+    Build time covers rendering, embedding (no embedding cache) and indexing.
+    Every query is embedded and searched on its own, as in the app, with the
+    query cache out of the way; the first `warmup` queries run once unmeasured.
+    """
+    config = config or IndexConfig()
+    data_dir = os.path.join(workdir, "data")
+    root = os.path.join(workdir, "index")
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "videos.json"), 'w', encoding='utf-8') as f:
+        json.dump({"videos": videos}, f)
+
+    start = time.perf_counter()
+    build_index_version(root, embeddings, data_dir, config=config, full=True)
+    build_seconds = time.perf_counter() - start
+    path = current_index_path(root)
+    kb = KnowledgeBase(path, embeddings)
+
+    k = max(ks)
+    for item in queries[:warmup]:
+        kb.retrieve(item["query"], k=k, hybrid=hybrid)
+    embed_ms, search_ms, total_ms, ranked = [], [], [], []
+    for item in queries:
+        t0 = time.perf_counter()
+        vectors = kb.embed_queries([item["query"]])
+        t1 = time.perf_counter()
+        _, rows = kb.retrieve_batch([item["query"]], k=k, hybrid=hybrid, vectors=vectors)
+        t2 = time.perf_counter()
+        embed_ms.append((t1 - t0) * 1000)
+        search_ms.append((t2 - t1) * 1000)
+        total_ms.append((t2 - t0) * 1000)
+        ranked.append([kb.docstore.get(row).id for row in rows[0]])
+
+    kinds = sorted({item["kind"] for item in queries})
+    return {
+        "corpus": {"videos": len(videos), "documents": len(kb)},
+        "queries": len(queries),
+        "query_set": query_set_id(queries),
+        "config": asdict(config),
+        "hybrid": hybrid,
+        "quality": ranking_metrics(ranked, [q["relevant"] for q in queries], ks),
+        "quality_by_kind": {kind: ranking_metrics([r for r, q in zip(ranked, queries) if q["kind"] == kind],
+                                                  [q["relevant"] for q in queries if q["kind"] == kind], ks)
+                            for kind in kinds},
+        "latency_ms": {"embed": _percentiles(embed_ms), "search": _percentiles(search_ms), "total": _percentiles(total_ms)}
+        if queries else {},
+        "build_seconds": round(build_seconds, 3),
+        "index_bytes": _dir_bytes(path),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _metric(result: Dict[str, object], name: str) -> Optional[float]:
+    value = result
+    for part in name.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(result: Dict[str, object], baseline: Dict[str, object], quality_tolerance: float = 0.01,
+            cost_tolerance: float = 0.25) -> List[Dict[str, object]]:
+    """Per-metric diff against a baseline run.
+
+    A quality metric regresses when it drops by more than `quality_tolerance`
+    (absolute); a cost metric (latency, build time, size, memory) when it grows
+    by more than `cost_tolerance` (relative).
+    """
+    quality = [f"quality.{name}" for name in result.get("quality", {}) if name not in QUALITY_METRICS] \
+        + [f"quality.{name}" for name in QUALITY_METRICS]
+    rows = []
+    for name in quality + list(COST_METRICS):
+        current, before = _metric(result, name), _metric(baseline, name)
+        if current is None or before is None:
+            continue
+        if name.startswith("quality."):
+            regressed = current < before - quality_tolerance
+        else:
+            regressed = before > 0 and current > before * (1 + cost_tolerance)
+        rows.append({"metric": name, "baseline": before, "current": current,
+                     "change": round((current - before) / before, 4) if before else None, "regressed": regressed})
+    return rows
+
+
+def main(argv=None):
+    """Benchmark retrieval quality, latency and build cost of the knowledge base; diff against a baseline."""
+    parser = argparse.ArgumentParser(description="Retrieval quality and latency benchmark for the RAG index")
+    parser.add_argument("--data", default="scraped_data")
+    parser.add_argument("--scale", type=int, default=1, help="Grow the corpus to this many times the scrape with synthetic copies")
+    parser.add_argument("--queries", help="Labelled JSONL query set; generated from the data when omitted")
+    parser.add_argument("--n-queries", type=int, default=200, help="Size of the generated query set")
+    parser.add_argument("--write-queries", help="Save the query set used to this JSONL path")
+    parser.add_argument("-k", type=int, nargs="+", default=list(DEFAULT_KS))
+    parser.add_argument("--dense-only", action="store_true", help="Skip the BM25 fusion")
+    parser.add_argument("--model", default=None, help="Embedding model (default: the app's)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workdir", help="Build here instead of a temporary directory")
+    parser.add_argument("--json", help="Write the results to this path")
+    parser.add_argument("--baseline", help="Diff against this earlier --json result; exit 1 on a regression")
+    parser.add_argument("--quality-tolerance", type=float, default=0.01)
+    parser.add_argument("--cost-tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    from rag_engine.embedder import DEFAULT_MODEL, EmbeddingEngine
+
+    videos = read_scraped_videos(args.data)
+    if not videos:
+        print(f"No videos under {args.data}", file=sys.stderr)
+        return 2
+    queries = load_queries(args.queries) if args.queries else generate_queries(videos, args.n_queries)
+    if args.write_queries:
+        with open(args.write_queries, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(q, ensure_ascii=False) + "\n" for q in queries)
+    videos = synthetic_videos(videos, args.scale)
+
+    embeddings = EmbeddingEngine(args.model or DEFAULT_MODEL, batch_size=args.batch_size)
+    try:
+        with tempfile.TemporaryDirectory(prefix="rag-bench-") as tmp:
+            result = run_benchmark(videos, queries, embeddings, args.workdir or tmp, config=IndexConfig.from_env(),
+                                   ks=sorted(set(args.k)), hybrid=not args.dense_only)
+    finally:
+        embeddings.close()
+    result["model"] = args.model or DEFAULT_MODEL
+    result["scale"] = args.scale
+
+    quality = "  ".join(f"{name}={value:.3f}" for name, value in result["quality"].items())
+    total = result["latency_ms"]["total"]
+    print(f"{result['corpus']['videos']} videos, {result['queries']} queries ({result['config']['kind']}"
+          f"{'' if result['hybrid'] else ', dense only'})")
+    print(f"  {quality}")
+    print(f"  query p50={total['p50']:.2f}ms  p95={total['p95']:.2f}ms  p99={total['p99']:.2f}ms"
+          f"  (search p50={result['latency_ms']['search']['p50']:.2f}ms)")
+    print(f"  build {result['build_seconds']:.1f}s  index {result['index_bytes'] / 1e6:.1f}MB  peak RSS {result['peak_rss_mb']}MB")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("query_set") != result["query_set"]:
+        print("  warning: the baseline ran a different query set; quality is not comparable", file=sys.stderr)
+    changed = [key for key in ("model", "scale", "config", "hybrid") if baseline.get(key) != result.get(key)]
+    if changed:
+        print(f"  note: the baseline differs in {', '.join(changed)}", file=sys.stderr)
+    rows = compare(result, baseline, args.quality_tolerance, args.cost_tolerance)
+    for row in rows:
+        change = f"{row['change']:+.1%}" if row["change"] is not None else "n/a"
+        print(f"  {row['metric']:<24} {row['baseline']:>12} -> {row['current']:<12} {change:>8}{'  REGRESSED' if row['regressed'] else ''}")
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
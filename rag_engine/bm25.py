@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag_engine.metadata import document_fields
+
+# Only the short name fields are indexed; descriptions are left to the dense index
+FIELD_NAMES = ("TITLE", "SINGERS", "MOVIE", "CHANNEL")
+PLACEHOLDERS = ("n/a", "unknown")
+TOKEN_PATTERN = re.compile(r"\w+")
+
+VOCAB_FILE = "bm25.vocab.json"
+OFFSETS_FILE = "bm25.offsets.npy"
+ROWS_FILE = "bm25.rows.npy"
+TFS_FILE = "bm25.tfs.npy"
+DOC_LEN_FILE = "bm25.doclen.npy"
+BM25_FILES = (VOCAB_FILE, OFFSETS_FILE, ROWS_FILE, TFS_FILE, DOC_LEN_FILE)
+
+# Postings scored per query, which bounds BM25 latency (~1 ms per 100k postings).
+# Terms are taken rarest first, so the budget only ever drops the most frequent,
+# lowest-idf terms such as "song" or "official"; dense retrieval still covers those.
+MAX_POSTINGS = 100_000
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def field_text(page_content: str) -> str:
+    """The title / singers / movie / channel values of a knowledge-base document."""
+    fields = document_fields(page_content)
+    values = (fields.get(name, "") for name in FIELD_NAMES)
+    return " ".join(v for v in values if v and v.lower() not in PLACEHOLDERS)
+
+
+def has_bm25(path: str) -> bool:
+    return all(os.path.exists(os.path.join(path, name)) for name in BM25_FILES)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[int]], k: int = RRF_K) -> List[int]:
+    """Merge ranked id lists by summing 1 / (k + rank) per list."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+
+class BM25Index:
+    """Inverted index over the name fields of each docstore row.
+
+    Postings are stored term-major (CSR): offsets[t]:offsets[t + 1] slices the
+    ascending row ids and term frequencies of term t. Rows are FAISS row ids, so
+    removals are applied with the same compaction the flat index uses.
+    """
+
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, rows: np.ndarray, tfs: np.ndarray,
+                 doc_len: np.ndarray, k1: float = 1.2, b: float = 0.75, max_postings: int = MAX_POSTINGS):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.rows = rows
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        self.avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, records: Iterable[Dict], **kwargs) -> "BM25Index":
+        index = cls({}, np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32),
+                    np.empty(0, dtype=np.uint16), np.empty(0, dtype=np.float32), **kwargs)
+        index.add(records)
+        return index
+
+    def _term_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int64), np.diff(self.offsets))
+
+    def _set_postings(self, term_ids: np.ndarray, rows: np.ndarray, tfs: np.ndarray):
+        # Stable sort keeps rows ascending within each term
+        order = np.argsort(term_ids, kind="stable")
+        self.rows = np.ascontiguousarray(rows[order], dtype=np.int32)
+        self.tfs = np.ascontiguousarray(tfs[order], dtype=np.uint16)
+        counts = np.bincount(term_ids, minlength=len(self.vocab))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def add(self, records: Iterable[Dict]):
+        """Append records as rows len(self), len(self) + 1, ..."""
+        first_row = len(self)
+        new_terms, new_rows, new_tfs, new_lens = [], [], [], []
+        for row, record in enumerate(records, start=first_row):
+            counts = Counter(tokenize(field_text(record["page_content"])))
+            for term, tf in counts.items():
+                term_id = self.vocab.setdefault(term, len(self.vocab))
+                new_terms.append(term_id)
+                new_rows.append(row)
+                new_tfs.append(min(tf, 65535))
+            new_lens.append(sum(counts.values()))
+        if not new_lens:
+            return
+        self._set_postings(
+            np.concatenate((self._term_ids(), np.asarray(new_terms, dtype=np.int64))),
+            np.concatenate((self.rows, np.asarray(new_rows, dtype=np.int32))),
+            np.concatenate((self.tfs, np.asarray(new_tfs, dtype=np.uint16))),
+        )
+        self.doc_len = np.concatenate((self.doc_len, np.asarray(new_lens, dtype=np.float32)))
+        self.avgdl = float(self.doc_len.mean())
+
+    def remove_rows(self, rows: Iterable[int]):
+        """Drop `rows` and shift later rows down, mirroring IndexFlat.remove_ids."""
+        removed = np.zeros(len(self), dtype=bool)
+        removed[np.asarray(list(rows), dtype=np.int64)] = True
+        if not removed.any():
+            return
+        shift = np.cumsum(removed)
+        keep = ~removed[self.rows]
+        kept_rows = self.rows[keep]
+        self._set_postings(self._term_ids()[keep], kept_rows - shift[kept_rows], self.tfs[keep])
+        self.doc_len = self.doc_len[~removed]
+        self.avgdl = float(self.doc_len.mean()) if len(self.doc_len) else 0.0
+
+    def search(self, query: str, k: int = 50, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, BM25 score) pairs for `query`, among rows where `mask` is True."""
+        n_docs = len(self)
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        spans = sorted(((int(self.offsets[t]), int(self.offsets[t + 1])) for t in term_ids), key=lambda s: s[1] - s[0])
+        spans = [s for s in spans if s[1] > s[0]]
+        if not spans or not n_docs:
+            return []
+
+        scores = np.zeros(n_docs, dtype=np.float32)
+        touched = []
+        scanned = 0
+        for start, end in spans:
+            df = end - start
+            if scanned + df > self.max_postings:
+                break
+            scanned += df
+            rows = self.rows[start:end]
+            tfs = self.tfs[start:end].astype(np.float32)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[rows] / self.avgdl)
+            # Every scored row is > 0, so zeros mark rows no earlier term reached.
+            # Collecting those keeps candidates unique without an O(n_docs) scan.
+            touched.append(rows[scores[rows] == 0] if touched else rows)
+            # Rows are unique within a term, so plain fancy-index accumulation is safe
+            scores[rows] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        if not touched:
+            return []
+        candidates = np.concatenate(touched)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-candidate_scores, k)[:k]
+            candidates, candidate_scores = candidates[top], candidate_scores[top]
+        order = np.argsort(-candidate_scores, kind="stable")
+        return [(int(candidates[i]), float(candidate_scores[i])) for i in order]
+
+    def save(self, path: str):
+        with open(os.path.join(path, VOCAB_FILE), 'w', encoding='utf-8') as f:
+            # Term ids are list positions
+            json.dump(sorted(self.vocab, key=self.vocab.__getitem__), f, ensure_ascii=False)
+        np.save(os.path.join(path, OFFSETS_FILE), self.offsets)
+        np.save(os.path.join(path, ROWS_FILE), self.rows)
+        np.save(os.path.join(path, TFS_FILE), self.tfs)
+        np.save(os.path.join(path, DOC_LEN_FILE), self.doc_len)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, **kwargs) -> Optional["BM25Index"]:
+        """Open the index saved at `path`, or None when there is none."""
+        if not has_bm25(path):
+            return None
+        with open(os.path.join(path, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            vocab = {term: i for i, term in enumerate(json.load(f))}
+        mode = 'r' if mmap else None
+        arrays = [np.load(os.path.join(path, name), mmap_mode=mode) for name in (OFFSETS_FILE, ROWS_FILE, TFS_FILE, DOC_LEN_FILE)]
+        return cls(vocab, *arrays, **kwargs)
@@ -0,0 +1,290 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from rag_engine.documents import build_documents, content_text
+from rag_engine.index_config import INDEX_CONFIG_FILE, IndexConfig
+from rag_engine.layout import DOC_MAP_FILE, KNOWLEDGE_BASE_FILES, LEGACY_FILES, has_knowledge_base
+from rag_engine.manifest import MANIFEST_FILE, SourceChanges, check_sources, manifest_videos, save_manifest, scan_sources
+from rag_engine.snapshot import read_scraped_videos
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an exclusive-create lock file
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Layout of an index root:
+#   CURRENT            name of the live version (replaced atomically)
+#   versions/<name>/   complete knowledge bases, never modified once live
+#   .build.lock        held by the one builder allowed to run
+#   build.log          output of builders started by the app
+#   build.status.json  outcome of the last build, so the app backs off after failures
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+LOCK_FILE = ".build.lock"
+LOG_FILE = "build.log"
+STATUS_FILE = "build.status.json"
+ROOT_FILES = (CURRENT_FILE, VERSIONS_DIR, LOCK_FILE, LOG_FILE, STATUS_FILE)
+# Everything a knowledge-base version directory may hold
+VERSION_FILES = frozenset(KNOWLEDGE_BASE_FILES + LEGACY_FILES + (DOC_MAP_FILE, MANIFEST_FILE, INDEX_CONFIG_FILE))
+BUILDING_SUFFIX = ".building"
+# Live version plus the previous one, which sessions may still have mapped
+KEEP_VERSIONS = 2
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class BuildLock:
+    """Non-blocking, process-wide lock on an index root (flock where available).
+
+    The holder's pid is kept in the lock file, so is_held() can answer without
+    taking the lock and a lock file left by a crashed holder is reclaimed.
+    """
+
+    def __init__(self, root: str):
+        self.path = os.path.join(root, LOCK_FILE)
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> bool:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if fcntl is None:
+            return self._create()
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def _create(self) -> bool:
+        # Linking a file that already holds our pid creates the lock with its content in one step
+        tmp_path = f"{self.path}.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(os.getpid()))
+        try:
+            for _ in range(2):
+                try:
+                    os.link(tmp_path, self.path)
+                except FileExistsError:
+                    if self.holder() is not None:
+                        return False
+                    # Left by a crashed holder. Two processes reclaiming it at the same
+                    # moment could both get through; builders are not started that often.
+                    try:
+                        os.remove(self.path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                self._fd = os.open(self.path, os.O_RDONLY)
+                return True
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is None:
+            os.close(self._fd)
+            os.remove(self.path)
+        else:
+            os.ftruncate(self._fd, 0)
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+    def holder(self) -> Optional[int]:
+        """Pid of the live process holding the lock, or None."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return None
+        return pid if pid and _process_alive(pid) else None
+
+    def is_held(self) -> bool:
+        """True while any process holds the lock.
+
+        Reads the holder's pid instead of probing with the lock itself, which
+        would make a builder starting at that moment report "busy". A holder
+        that has just taken the lock but not yet written its pid reads as free;
+        a second builder started then finds the lock taken and exits.
+        """
+        return self._fd is not None or self.holder() is not None
+
+    def __enter__(self) -> "BuildLock":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def current_index_path(root: str) -> Optional[str]:
+    """Directory of the live knowledge base under `root`, or None when there is none yet.
+
+    Roots written before versioning (a knowledge base directly in `root`) are served as is.
+    """
+    try:
+        with open(os.path.join(root, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            path = os.path.join(root, VERSIONS_DIR, f.read().strip())
+    except OSError:
+        path = root
+    return path if has_knowledge_base(path) else None
+
+
+def check_rebuild_needed(root: str = "faiss_index", directory: str = "scraped_data") -> Tuple[bool, str, Optional[SourceChanges]]:
+    """(needed, reason, source changes); changes is None when the index must be built from scratch."""
+    # A glob, not scan_sources: this runs on every app rerun
+    if not glob.glob(os.path.join(directory, "*.json")):
+        return False, "No data", None
+    current = current_index_path(root)
+    if current is None:
+        return True, "Index missing", None
+    # Content-hash manifest: touched or re-copied files are not "new data"
+    changes = check_sources(directory, current)
+    return changes.has_changes, changes.summary(), changes
+
+
+def read_build_status(root: str) -> Dict[str, object]:
+    """The last recorded build outcome under `root`; empty when nothing was recorded."""
+    try:
+        with open(os.path.join(root, STATUS_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_build_status(root: str, status: Dict[str, object]):
+    os.makedirs(root, exist_ok=True)
+    # Per-process temp name: the app and a builder may both write it
+    tmp_path = os.path.join(root, f"{STATUS_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, os.path.join(root, STATUS_FILE))
+
+
+def _link_or_copy(src: str, dst: str):
+    # Every knowledge-base file is replaced, never rewritten, so versions can share inodes
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _set_current(root: str, name: str):
+    tmp_path = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def _prune(root: str, live: str, keep: int):
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    names = sorted(os.listdir(versions_dir))
+    finished = [n for n in names if not n.endswith(BUILDING_SUFFIX)]
+    # Only called under the lock, so any unfinished build was abandoned by a crash
+    stale = [n for n in names if n.endswith(BUILDING_SUFFIX)] + [n for n in finished[:-keep] if n != live]
+    for name in stale:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+    # Files of a pre-versioning knowledge base in the root itself. Only those: the
+    # root may be a shared directory, and nothing else in it is ours to delete.
+    for name in os.listdir(root):
+        target = os.path.join(root, name)
+        if name.startswith(".staging-") and os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        elif (name in VERSION_FILES or name.removesuffix(".tmp") in VERSION_FILES) and os.path.isfile(target):
+            os.remove(target)
+
+
+def build_index_version(root: str, embeddings, directory: str = "scraped_data", cache=None,
+                        config: Optional[IndexConfig] = None, full: bool = False,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, object]:
+    """Build the next knowledge-base version under `root` and make it live.
+
+    The live version is hard-linked into a private directory and updated
+    incrementally there (or built from scratch with `full`, or when there is
+    none); readers keep using the live version until CURRENT is switched in one
+    rename. Returns the
+    update stats plus "version"; "mode" is "busy" when another builder holds
+    the lock and "noop" when the sources have not changed (a noop still
+    refreshes the live manifest when files were only touched).
+    """
+    from rag_engine.incremental import update_faiss_index
+
+    lock = BuildLock(root)
+    if not lock.acquire():
+        return {"mode": "busy"}
+    with lock:
+        current = current_index_path(root)
+        needed, reason, changes = check_rebuild_needed(root, directory)
+        if not needed and not full:
+            if changes is not None and changes.stale_manifest:
+                # Same bytes, new stat: record it so the next check does not hash them again
+                save_manifest(current, changes.manifest)
+            return {"mode": "noop", "reason": reason, "version": os.path.basename(current) if current else None}
+
+        # Scanned before reading: anything written meanwhile shows up as a change next time
+        manifest = changes.manifest if changes is not None else scan_sources(directory)
+        partial = not full and current is not None and changes is not None and changes.has_baseline
+        videos = read_scraped_videos(directory, on_error=lambda path, e: logger.warning("Could not load %s: %s", path, e))
+        if partial:
+            wanted = set(changes.added_videos) | set(changes.changed_videos)
+            videos = [v for v in videos if v.get("video_id") in wanted]
+        elif not videos:
+            return {"mode": "noop", "reason": "No data", "version": os.path.basename(current) if current else None}
+
+        # Sorts by build time, which is what pruning relies on
+        now = time.time_ns()
+        name = time.strftime("%Y%m%d-%H%M%S", time.localtime(now // 10**9)) + f".{now % 10**9:09d}"
+        versions_dir = os.path.join(root, VERSIONS_DIR)
+        staging = os.path.join(versions_dir, name + BUILDING_SUFFIX)
+        os.makedirs(versions_dir, exist_ok=True)
+        if current is not None and not full:
+            shutil.copytree(current, staging, copy_function=_link_or_copy,
+                            ignore=lambda _, names: [n for n in names if n not in VERSION_FILES])
+        else:
+            os.makedirs(staging)
+        logger.info("Building %s from %d videos (%s)", name, len(videos), reason)
+        docs = build_documents(videos, progress=progress)
+        stats = update_faiss_index(docs, embeddings, path=staging, cache=cache, config=config,
+                                   removed=changes.removed_videos if partial else None)
+        save_manifest(staging, manifest)
+        if cache is not None:
+            # Cache keys are over the embedded text, which leaves out the counts
+            cache.evict(manifest_videos(manifest) if partial else docs.keys(),
+                        current_texts={video_id: content_text(text) for video_id, text in docs.items()})
+
+        os.rename(staging, os.path.join(versions_dir, name))
+        _set_current(root, name)
+        _prune(root, name, KEEP_VERSIONS)
+        logger.info("Version %s is live: %s", name, stats)
+        return {**stats, "version": name}
@@ -0,0 +1,130 @@
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+import httpx
+import numpy as np
+
+from llm_gateway import LLMError
+from rag_engine.engine import Answer, IndexNotReady, Retrieval
+
+
+class ServiceError(RuntimeError):
+    """The RAG service answered with an error."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class RetrievedDocument:
+    """A document as returned by /search: the id and page_content of a langchain Document."""
+    id: str
+    page_content: str
+    metadata: Dict[str, object] = field(default_factory=dict)
+
+
+class RAGServiceClient:
+    """Talks to rag_service.py with the same ask() / search() / stats() surface as RAGEngine.
+
+    Lets the Streamlit UI run as a thin client (RAG_SERVICE_URL) while retrieval
+    and answering scale separately behind a load balancer.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 60.0, transport: Optional[httpx.BaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(base_url=self.base_url, timeout=timeout, transport=transport)
+
+    def _check(self, response: httpx.Response):
+        if response.status_code == 200:
+            return
+        response.read()
+        try:
+            message = response.json().get("error", response.text)
+        except ValueError:
+            message = response.text
+        if response.status_code == 503:
+            raise IndexNotReady(message)
+        if response.status_code == 502:
+            raise LLMError(message, status=502)
+        raise ServiceError(message, response.status_code)
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.health().get("version")
+
+    def health(self) -> Dict[str, object]:
+        try:
+            return self._client.get("/health").json()
+        except (httpx.HTTPError, ValueError) as e:
+            return {"status": "unreachable", "version": None, "error": str(e)}
+
+    def stats(self) -> Dict[str, object]:
+        """Engine stats of the worker that answers; empty when the service cannot be reached."""
+        try:
+            response = self._client.get("/metrics")
+            self._check(response)
+            return response.json()["engine"]
+        except (httpx.HTTPError, ServiceError, ValueError):
+            return {"version": None, "query_cache": None, "answer_cache": None}
+
+    def _send(self, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        # A service that cannot be reached has, as far as the caller can tell, nothing to search yet
+        try:
+            response = self._client.send(request, stream=stream)
+        except httpx.TransportError as e:
+            raise IndexNotReady(f"RAG service at {self.base_url} is unreachable: {e}") from e
+        self._check(response)
+        return response
+
+    def search(self, question: str, mood: Optional[str] = None, min_views: int = 0, k: Optional[int] = None) -> Retrieval:
+        """Retrieved documents, best first. The query vector and rows stay on the service, so both are empty."""
+        payload = {"question": question, "mood": mood, "min_views": min_views, "k": k}
+        body = self._send(self._client.build_request("POST", "/search", json=payload)).json()
+        docs = [RetrievedDocument(result["id"], result["page_content"]) for result in body["results"]]
+        return Retrieval(np.empty(0, dtype=np.float32), [], docs, (body["version"],))
+
+    def ask(self, question: str, mood: Optional[str] = None, min_views: int = 0, use_cache: bool = True) -> Answer:
+        payload = {"question": question, "mood": mood, "min_views": min_views, "use_cache": use_cache, "stream": True}
+        response = self._send(self._client.build_request("POST", "/ask", json=payload), stream=True)
+        events = self._events(response)
+        try:
+            meta = next(events)
+        except StopIteration:
+            raise LLMError("RAG service closed the answer stream before it started") from None
+        answer = Answer(iter(()), cached=meta["cached"], sources=meta["sources"], text=meta.get("text", ""))
+        answer.tokens = self._tokens(answer, events, response)
+        return answer
+
+    @staticmethod
+    def _events(response: httpx.Response) -> Iterator[Dict]:
+        # The service reports a failed completion in-stream; a dropped connection is as much an LLM failure to the UI
+        try:
+            for line in response.iter_lines():
+                if line.startswith("data:"):
+                    event = json.loads(line[5:])
+                    if event["type"] == "error":
+                        raise LLMError(event["error"])
+                    yield event
+        except httpx.TransportError as e:
+            raise LLMError(f"RAG service connection lost mid-answer: {e}") from e
+        finally:
+            response.close()
+
+    @staticmethod
+    def _tokens(answer: Answer, events: Iterator[Dict], response: httpx.Response) -> Iterator[str]:
+        parts = []
+        try:
+            for event in events:
+                if event["type"] == "token":
+                    parts.append(event["text"])
+                    yield event["text"]
+                elif event["type"] == "done":
+                    answer.note = event["note"]
+        finally:
+            response.close()
+        answer.text = "".join(parts)
+
+    def close(self):
+        self._client.close()
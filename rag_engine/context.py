@@ -0,0 +1,187 @@
+import logging
+import re
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag_engine.metadata import document_fields
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION_MARKER = "\nDESCRIPTION: "
+SEPARATOR = "\n---\n"
+# Everything after the song name in re-upload titles: "Sahiba (Lyrical) : ...", "Kesariya - Brahmastra"
+TITLE_CUT_PATTERN = re.compile(r"\s*(?:[(\[:|#@]|\s-\s).*$")
+VERSION_WORDS_PATTERN = re.compile(
+    r"\b(?:8k|4k|hd|full|video|song|songs|lyrical|lyrics|lyric|audio|official|music|visualizer|version|teaser|new)\b", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+MINHASH_THRESHOLD = 0.7
+_MERSENNE = (1 << 61) - 1
+_rng = np.random.default_rng(42)
+_PERM_A = _rng.integers(1, _MERSENNE, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE, NUM_PERM, dtype=np.uint64)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token for this mostly-Latin text)."""
+    return len(text) // 4 + 1
+
+
+def _song_name(title: str) -> str:
+    base = TITLE_CUT_PATTERN.sub("", title)
+    return " ".join(WORD_PATTERN.findall(VERSION_WORDS_PATTERN.sub(" ", base).lower()))
+
+
+def song_key(page_content: str, video_id: Optional[str] = None) -> str:
+    """Song identity of a document: its bare title plus movie, version words dropped.
+
+    A title that is nothing but version words ("Official Video (Lyrical)")
+    names no song, so the document is only itself: its `video_id`, or "" (no
+    key) when that is unknown.
+    """
+    fields = document_fields(page_content)
+    base = _song_name(fields.get("TITLE", ""))
+    if not base:
+        return video_id or ""
+    movie = fields.get("MOVIE", "Unknown")
+    return f"{base}|{movie.lower()}" if movie != "Unknown" else base
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash of the character shingles of `text`, for Jaccard estimates."""
+    text = " ".join(text.lower().split())
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * h + b) mod p over 61-bit values; uint64 wrap-around keeps it a valid hash family
+    return ((hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE).min(axis=0)
+
+
+def minhash_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def _content(page_content: str) -> str:
+    # The field labels and numbers are shared by every document; compare what differs
+    fields = document_fields(page_content)
+    description = page_content.partition(DESCRIPTION_MARKER)[2]
+    return " ".join([fields.get("TITLE", ""), fields.get("SINGERS", ""), fields.get("MOVIE", ""), description])
+
+
+@dataclass
+class ContextStats:
+    docs_in: int = 0
+    docs_out: int = 0
+    duplicates: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+    def summary(self) -> str:
+        return f"context {self.docs_in}→{self.docs_out} docs, ~{self.tokens_saved:,} tokens saved"
+
+
+def collapse_duplicates(texts: Sequence[str], ids: Optional[Sequence[str]] = None) -> List[int]:
+    """Indexes of `texts` to keep (first of each song wins), in input order.
+
+    Two documents are the same song when their song_key matches or the MinHash
+    estimate of their titles' Jaccard similarity reaches MINHASH_THRESHOLD.
+    Titles that name no song are never compared: equal generic titles say
+    nothing about the song. `ids` (optional) are the documents' video ids,
+    row-aligned with `texts`.
+    """
+    keep, keys, signatures = [], set(), []
+    for i, text in enumerate(texts):
+        key = song_key(text, ids[i] if ids is not None else None)
+        title = document_fields(text).get("TITLE", "")
+        signature = minhash_signature(title) if _song_name(title) else None
+        if (key and key in keys) or (signature is not None and
+                                     any(minhash_similarity(signature, s) >= MINHASH_THRESHOLD for s in signatures)):
+            continue
+        keys.add(key)
+        if signature is not None:
+            signatures.append(signature)
+        keep.append(i)
+    return keep
+
+
+def mmr_order(candidates: List[int], vectors: Optional[np.ndarray], texts: Sequence[str], mmr_lambda: float = 0.7) -> List[int]:
+    """Order `candidates` (in retrieval order) by maximal marginal relevance.
+
+    Relevance is the retrieval rank, which already blends dense and BM25
+    evidence. Redundancy is cosine similarity of the document vectors when
+    given, otherwise MinHash similarity of the documents' distinctive fields.
+    """
+    if len(candidates) <= 2:
+        return list(candidates)
+    relevance = 1.0 - np.arange(len(candidates)) / len(candidates)
+    if vectors is not None:
+        unit = vectors[candidates] / np.maximum(np.linalg.norm(vectors[candidates], axis=1, keepdims=True), 1e-12)
+        similarity = unit @ unit.T
+    else:
+        signatures = [minhash_signature(_content(texts[i])) for i in candidates]
+        similarity = np.array([[minhash_similarity(a, b) for b in signatures] for a in signatures])
+
+    chosen = [0]
+    remaining = list(range(1, len(candidates)))
+    while remaining:
+        scores = [mmr_lambda * relevance[i] - (1 - mmr_lambda) * similarity[i, chosen].max() for i in remaining]
+        best = remaining[int(np.argmax(scores))]
+        chosen.append(best)
+        remaining.remove(best)
+    return [candidates[i] for i in chosen]
+
+
+def fit_to_budget(texts: Sequence[str], token_budget: int) -> List[str]:
+    """Keep whole document headers while they fit, then share what is left among the descriptions."""
+    heads, descriptions = [], []
+    used = 0
+    for text in texts:
+        head, _, description = text.partition(DESCRIPTION_MARKER)
+        cost = estimate_tokens(head + SEPARATOR)
+        if heads and used + cost > token_budget:
+            break
+        heads.append(head)
+        descriptions.append(description.strip())
+        used += cost
+
+    spare_chars = max(0, token_budget - used) * 4
+    per_doc = spare_chars // max(1, sum(1 for d in descriptions if d))
+    blocks = []
+    for head, description in zip(heads, descriptions):
+        if description and per_doc > len(DESCRIPTION_MARKER):
+            room = per_doc - len(DESCRIPTION_MARKER)
+            if len(description) > room:
+                description = description[:room].rsplit(" ", 1)[0] + "…"
+            blocks.append(head + DESCRIPTION_MARKER + description)
+        else:
+            blocks.append(head)
+    return blocks
+
+
+def build_context(texts: Sequence[str], vectors: Optional[np.ndarray] = None, token_budget: int = 1500,
+                  mmr_lambda: float = 0.7, ids: Optional[Sequence[str]] = None) -> Tuple[str, ContextStats]:
+    """Assemble the LLM context from ranked retrieved documents.
+
+    Near-duplicate re-uploads are collapsed, the rest are ordered by MMR and
+    descriptions are trimmed so the whole context stays within `token_budget`.
+    `vectors` and `ids` (optional) are the documents' embeddings and video
+    ids, row-aligned with `texts`.
+    """
+    stats = ContextStats(docs_in=len(texts), tokens_before=estimate_tokens(SEPARATOR.join(texts)) if texts else 0)
+    kept = collapse_duplicates(texts, ids)
+    stats.duplicates = len(texts) - len(kept)
+    ordered = mmr_order(kept, vectors, texts, mmr_lambda)
+    blocks = fit_to_budget([texts[i] for i in ordered], token_budget)
+    context = SEPARATOR.join(blocks)
+    stats.docs_out = len(blocks)
+    stats.tokens_after = estimate_tokens(context) if blocks else 0
+    logger.info("Built %s (%d duplicates collapsed, %d -> %d tokens)",
+                stats.summary(), stats.duplicates, stats.tokens_before, stats.tokens_after)
+    return context, stats
@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from yt_scrape.utils import clean_title, calculate_engagement_score, infer_channel_name
+from rag_engine.context import DESCRIPTION_MARKER
+from rag_engine.manifest import document_hash
+from rag_engine.metadata import TAG_KEYWORDS
+
+SINGER_PATTERN = re.compile(r"Singer[s]?:\s*([^\n|]+)", re.IGNORECASE)
+MOVIE_PATTERN = re.compile(r"Movie:\s*([^\n|]+)", re.IGNORECASE)
+SINGER_SPLIT_PATTERN = re.compile(r",|&")
+# Counts that change on every scrape. They stay in the stored text (the LLM and the
+# metadata side index read them) but out of what is embedded and compared, so a
+# re-scrape only re-embeds videos whose content changed.
+VOLATILE_FIELDS = ("VIEWS", "VIRAL SCORE")
+
+
+def extract_metadata(text, title):
+    """Extract singers, movie and mood tags from a video's description and title."""
+    metadata = {"singers": [], "movie": "Unknown", "tags": []}
+    singer_match = SINGER_PATTERN.search(text)
+    if singer_match:
+        metadata["singers"] = [s.strip() for s in SINGER_SPLIT_PATTERN.split(singer_match.group(1))]
+    movie_match = MOVIE_PATTERN.search(text)
+    if movie_match:
+        metadata["movie"] = movie_match.group(1).strip()
+    # Lowercase once; every tag scan reuses it
+    lowered = (text + title).lower()
+    for tag, keywords in TAG_KEYWORDS:
+        if any(k in lowered for k in keywords):
+            metadata["tags"].append(tag)
+    return metadata
+
+
+def content_text(text: str) -> str:
+    """A document's text without its VOLATILE_FIELDS lines: what is embedded."""
+    header, marker, description = text.partition(DESCRIPTION_MARKER)
+    lines = [line for line in header.split("\n") if line.partition(": ")[0] not in VOLATILE_FIELDS]
+    return "\n".join(lines) + marker + description
+
+
+def document_id(video: dict, text: str) -> str:
+    """Index key for a video; legacy rows without an id are keyed by content."""
+    return video.get("video_id") or f"noid-{document_hash(content_text(text))}"
+
+
+def build_document(video: dict) -> Tuple[str, str]:
+    """Render one video into its (video_id, knowledge-base text) pair."""
+    title = clean_title(video.get("title", ""))
+    desc = str(video.get("description", ""))
+    meta = extract_metadata(desc, title)
+    singers = ", ".join(meta["singers"]) if meta["singers"] else "N/A"
+    tags = ", ".join(meta["tags"]) if meta["tags"] else "General"
+    published_at = video.get("published_at", "")
+    year = published_at[:4] if published_at else "Unknown"
+    channel = infer_channel_name(video)
+    # Engagement score backs the "Viral" detection in answers
+    viral_score = calculate_engagement_score(
+        video.get('view_count', 0),
+        video.get('like_count', 0),
+        video.get('comment_count', 0)
+    )
+    text = f"TITLE: {title}\nSINGERS: {singers}\nMOVIE: {meta['movie']}\nTAGS: {tags}\nCHANNEL: {channel}\nYEAR: {year}\nVIEWS: {video.get('view_count', 0)}\nVIRAL SCORE: {viral_score}\nDESCRIPTION: {desc[:500]}\n\n"
+    return document_id(video, text), text
+
+
+def _build_chunk(videos: List[dict]) -> List[Tuple[str, str]]:
+    return [build_document(video) for video in videos]
+
+
+def build_documents(videos: List[dict], workers: Optional[int] = None, chunk_size: int = 2000,
+                    progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, str]:
+    """Build video_id -> text for every video, fanning chunks out over a process pool.
+
+    Small inputs (or workers=1) are built in-process, where pool start-up would cost
+    more than it saves. `progress(done, total)` is called after each chunk.
+    """
+    total = len(videos)
+    chunks = [videos[i:i + chunk_size] for i in range(0, total, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    docs = {}
+    done = 0
+    if workers == 1 or len(chunks) < 2:
+        results = map(_build_chunk, chunks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+        results = pool.map(_build_chunk, chunks)
+    try:
+        for chunk, built in zip(chunks, results):
+            docs.update(built)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+    finally:
+        if pool:
+            pool.shutdown()
+    return docs
+
+
+def main(argv=None):
+    """Batch entry point: build the knowledge-base documents without Streamlit."""
+    from rag_engine.snapshot import read_scraped_videos
+
+    parser = argparse.ArgumentParser(description="Build knowledge-base documents from scraped_data")
+    parser.add_argument("--data", default="scraped_data", help="Directory with scraped JSON dumps")
+    parser.add_argument("--out", default="documents.jsonl", help="Output JSONL path")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    videos = read_scraped_videos(args.data, on_error=lambda path, e: print(f"WARNING: Could not load {path}: {e}"))
+    start = time.perf_counter()
+    docs = build_documents(videos, workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    with open(args.out, 'w', encoding='utf-8') as f:
+        for video_id, text in docs.items():
+            f.write(json.dumps({"video_id": video_id, "text": text}, ensure_ascii=False) + "\n")
+    print(f"Built {len(docs)} documents in {elapsed:.2f}s ({len(docs) / max(elapsed, 1e-9):,.0f} docs/s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import multiprocessing
+import time
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Per-process model used by pool workers
+_worker_model = None
+
+
+def _load_model(model_name: str, device: str, num_threads: Optional[int]):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    return SentenceTransformer(model_name, device=device)
+
+
+def _init_worker(model_name: str, device: str, num_threads: Optional[int]):
+    global _worker_model
+    _worker_model = _load_model(model_name, device, num_threads)
+
+
+def _encode_in_worker(args) -> np.ndarray:
+    texts, batch_size = args
+    return _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+
+class EmbeddingEngine(Embeddings):
+    """Batched sentence-transformers encoder for CPU rebuilds.
+
+    Texts are sorted by length before batching so each batch pads to a similar
+    width, then restored to input order. With num_workers > 1 every worker
+    process holds its own copy of the model and encodes a contiguous slice of
+    the sorted texts. Implements the LangChain Embeddings interface and matches
+    HuggingFaceEmbeddings output, so vectors are interchangeable with it.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, batch_size: int = 64, num_threads: Optional[int] = None,
+                 num_workers: int = 1, device: str = "cpu", model=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.num_workers = max(1, num_workers)
+        self.device = device
+        self._model = model
+        self._pool = None
+        self.docs_embedded = 0
+        self.seconds = 0.0
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = _load_model(self.model_name, self.device, self.num_threads)
+        return self._model
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: forking a process that already initialised torch threads can deadlock
+            ctx = multiprocessing.get_context("spawn")
+            self._pool = ctx.Pool(self.num_workers, initializer=_init_worker,
+                                  initargs=(self.model_name, self.device, self.num_threads))
+        return self._pool
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed `texts` into a float32 matrix in input order."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        start = time.perf_counter()
+        texts = [t.replace("\n", " ") for t in texts]
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+
+        if self.num_workers > 1 and len(sorted_texts) >= self.num_workers * self.batch_size:
+            slice_size = -(-len(sorted_texts) // self.num_workers)
+            slices = [sorted_texts[i:i + slice_size] for i in range(0, len(sorted_texts), slice_size)]
+            parts = self._get_pool().map(_encode_in_worker, [(s, self.batch_size) for s in slices])
+            sorted_vectors = np.concatenate(parts)
+        else:
+            sorted_vectors = self.model.encode(sorted_texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+        vectors = np.empty_like(sorted_vectors, dtype=np.float32)
+        vectors[order] = sorted_vectors
+        self.seconds += time.perf_counter() - start
+        self.docs_embedded += len(texts)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+    def stats(self) -> dict:
+        """Throughput since the engine was created."""
+        return {
+            "docs": self.docs_embedded,
+            "seconds": round(self.seconds, 3),
+            "docs_per_sec": round(self.docs_embedded / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
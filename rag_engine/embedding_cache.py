@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Persistent, content-addressed cache of document embeddings.
+
+    Vectors live in one append-only float32/float16 matrix (`vectors.bin`) that is
+    read through a memory map; `index.json` maps hash(model_name + text) to its row
+    and the video_id it was computed for, so entries can be evicted when a video
+    disappears from scraped_data or is re-rendered with new text.
+    """
+
+    def __init__(self, path: str = ".embedding_cache", model_name: str = "sentence-transformers/all-MiniLM-L6-v2", dtype: str = "float32"):
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+        # One directory per model so vectors of different widths never share a matrix
+        self.path = os.path.join(path, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        os.makedirs(self.path, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._matrix = None
+        self._load_index()
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, "vectors.bin")
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.path, "index.json")
+
+    def _load_index(self):
+        self.dim = None
+        self.entries: Dict[str, list] = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("dtype") == self.dtype.name:
+                self.dim = meta.get("dim")
+                self.entries = meta.get("entries", {})
+        self.rows = len(self.entries)
+        # A crash between appending vectors and saving the index leaves orphan rows; drop them
+        if self.dim and os.path.exists(self._vectors_path):
+            expected = self.rows * self.dim * self.dtype.itemsize
+            if os.path.getsize(self._vectors_path) != expected:
+                with open(self._vectors_path, 'r+b') as f:
+                    f.truncate(expected)
+        elif os.path.exists(self._vectors_path):
+            os.remove(self._vectors_path)
+
+    def _save_index(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"model_name": self.model_name, "dtype": self.dtype.name, "dim": self.dim, "entries": self.entries}, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _vectors(self) -> np.ndarray:
+        if self._matrix is None or self._matrix.shape[0] != self.rows:
+            self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode='r', shape=(self.rows, self.dim))
+        return self._matrix
+
+    def key(self, text: str) -> str:
+        """Content address of `text` for this cache's model."""
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_or_embed(self, texts: List[str], video_ids: List[str], embed_fn: Callable[[List[str]], List[List[float]]]) -> np.ndarray:
+        """Return float32 vectors for `texts`, calling `embed_fn` only for cache misses."""
+        keys = [self.key(t) for t in texts]
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in self.entries and key not in missing:
+                missing[key] = i
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+
+        if missing:
+            fresh = np.asarray(embed_fn([texts[i] for i in missing.values()]), dtype=np.float32)
+            if self.dim is None:
+                self.dim = fresh.shape[1]
+            with open(self._vectors_path, 'ab') as f:
+                f.write(fresh.astype(self.dtype).tobytes())
+            for key, i in missing.items():
+                self.entries[key] = [self.rows, video_ids[i]]
+                self.rows += 1
+            self._save_index()
+
+        if not keys:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        rows = np.fromiter((self.entries[k][0] for k in keys), dtype=np.int64, count=len(keys))
+        return np.asarray(self._vectors()[rows], dtype=np.float32)
+
+    def evict(self, keep_video_ids: Iterable[str], current_texts: Optional[Dict[str, str]] = None) -> int:
+        """Drop entries whose video_id is no longer present and compact the matrix.
+
+        `current_texts` (video_id -> text just built) also drops the older
+        renderings of those videos: view counts change every scrape, so each one
+        would otherwise leave a stale vector behind.
+        """
+        keep_video_ids = set(keep_video_ids)
+        current_keys = {vid: self.key(text) for vid, text in (current_texts or {}).items()}
+        survivors = [(key, row, vid) for key, (row, vid) in self.entries.items()
+                     if vid in keep_video_ids and current_keys.get(vid, key) == key]
+        evicted = len(self.entries) - len(survivors)
+        if not evicted:
+            return 0
+        if survivors:
+            compacted = np.array(self._vectors()[[row for _, row, _ in survivors]])
+        self._matrix = None
+        tmp_path = self._vectors_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            if survivors:
+                f.write(compacted.tobytes())
+        os.replace(tmp_path, self._vectors_path)
+        self.entries = {key: [new_row, vid] for new_row, (key, _, vid) in enumerate(survivors)}
+        self.rows = len(self.entries)
+        self._save_index()
+        return evicted
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since this cache object was created."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self.rows,
+        }
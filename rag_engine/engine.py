@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from rag_engine.answer_cache import AnswerCache
+from rag_engine.builder import current_index_path
+from rag_engine.context import ContextStats, build_context
+from rag_engine.metadata import MetadataFilter
+from rag_engine.query_cache import QueryCache
+from rag_engine.streaming import CompletionTiming, stream_completion
+
+if TYPE_CHECKING:  # faiss and langchain_core load with the first knowledge base, not with the app
+    from langchain_core.documents import Document
+
+    from rag_engine.store import KnowledgeBase
+
+SYSTEM_PROMPT = ("You are AssistantBot, a Bollywood Analyst. NEVER say you don't know if context has a mention. "
+                 "Provide details HERE. If date is 2026, celebrate it!")
+CACHED_NOTE = "⚡ answered from cache"
+
+
+class IndexNotReady(RuntimeError):
+    """There is no published knowledge base to search yet."""
+
+
+def _query(question: str, mood: Optional[str]) -> str:
+    return f"{question} {mood} mood" if mood else question
+
+
+def _needs_fallback(rows: List[int], filters: Optional[MetadataFilter]) -> bool:
+    # A year / channel read from the question that matches nothing is dropped rather than answering from nothing
+    return not rows and bool(filters) and bool(filters.year or filters.channel)
+
+
+@dataclass
+class Retrieval:
+    """Documents retrieved for one question, best first."""
+    vector: np.ndarray
+    rows: List[int]
+    docs: List["Document"]
+    version: tuple
+    knowledge_base: Optional["KnowledgeBase"] = field(default=None, repr=False)  # the version `rows` refer to
+
+    @property
+    def doc_ids(self) -> List[str]:
+        return [doc.id for doc in self.docs]
+
+
+@dataclass
+class Answer:
+    """An answer being streamed: iterate `tokens`; `text` and `note` are complete once it is exhausted."""
+    tokens: Iterator[str]
+    cached: bool = False
+    sources: List[str] = field(default_factory=list)
+    text: str = ""
+    note: str = ""
+    timing: Optional[CompletionTiming] = None
+    context_stats: Optional[ContextStats] = None
+
+
+class RAGEngine:
+    """Retrieval and answering over the published knowledge base, without any UI.
+
+    The knowledge base is reopened whenever the builder publishes a new version
+    (see rag_engine.builder); with the default loader it is memory-mapped, so
+    every process serving the same index root shares one copy in the page
+    cache. Thread-safe: the caches lock internally and searches only read.
+    """
+
+    def __init__(self, index_root: str, embeddings, client, model: str,
+                 query_cache: Optional[QueryCache] = None, answer_cache: Optional[AnswerCache] = None,
+                 context_token_budget: int = 1500, timeout: Optional[float] = None, k: int = 12,
+                 loader: Optional[Callable[[str], "KnowledgeBase"]] = None):
+        self.index_root = index_root
+        self.embeddings = embeddings
+        self.client = client
+        self.model = model
+        self.query_cache = query_cache
+        self.answer_cache = answer_cache
+        self.context_token_budget = context_token_budget
+        self.timeout = timeout
+        self.k = k
+        self.loader = loader or self._open
+        self._kb: Optional["KnowledgeBase"] = None
+        self._lock = threading.Lock()
+
+    def _open(self, path: str) -> "KnowledgeBase":
+        from rag_engine.store import KnowledgeBase
+        return KnowledgeBase(path, self.embeddings)
+
+    def knowledge_base(self) -> "KnowledgeBase":
+        """The live knowledge base, reopened when a new version has been published."""
+        path = current_index_path(self.index_root)
+        if path is None:
+            raise IndexNotReady(f"No knowledge base under {self.index_root} yet")
+        with self._lock:
+            if self._kb is None or self._kb.path != path:
+                self._kb = self.loader(path)
+            return self._kb
+
+    @property
+    def version(self) -> Optional[str]:
+        path = current_index_path(self.index_root)
+        return os.path.basename(path) if path else None
+
+    def search(self, question: str, mood: Optional[str] = None, min_views: int = 0, k: Optional[int] = None) -> Retrieval:
+        """Hybrid top-k for `question`; a year / channel named in it narrows the search up front."""
+        return self._search(self.knowledge_base(), question, mood, min_views, k or self.k)
+
+    def _search(self, kb: "KnowledgeBase", question: str, mood: Optional[str], min_views: int, k: int) -> Retrieval:
+        query = _query(question, mood)
+        filters = kb.metadata.parse_filters(question, min_views=min_views) if kb.metadata else None
+        vector, rows = kb.retrieve(query, k=k, keywords=question, filters=filters, cache=self.query_cache)
+        if _needs_fallback(rows, filters):
+            vector, rows = kb.retrieve(query, k=k, keywords=question, filters=MetadataFilter(min_views=min_views), cache=self.query_cache)
+        return Retrieval(vector, rows, [kb.docstore.get(row) for row in rows], kb.version, kb)
+
+    def search_batch(self, questions: Sequence[str], moods: Optional[Sequence[Optional[str]]] = None,
+                     min_views: Optional[Sequence[int]] = None, k: Optional[int] = None,
+                     timing: Optional[Dict[str, float]] = None) -> List[Retrieval]:
+        """search() for many questions: the questions are embedded in one batch and FAISS
+        searches every group of questions sharing a filter at once. The query cache is bypassed.
+
+        `timing`, when given, receives the batch's "embed_ms" and "search_ms".
+        """
+        kb = self.knowledge_base()
+        k = k or self.k
+        moods = moods or [None] * len(questions)
+        min_views = min_views or [0] * len(questions)
+        queries = [_query(q, mood) for q, mood in zip(questions, moods)]
+        filters = [kb.metadata.parse_filters(q, min_views=v) if kb.metadata else None for q, v in zip(questions, min_views)]
+        started = time.perf_counter()
+        vectors = kb.embed_queries(queries)
+        embedded = time.perf_counter()
+        _, rows = kb.retrieve_batch(queries, k=k, keywords=questions, filters=filters, vectors=vectors)
+        retry = [i for i, f in enumerate(filters) if _needs_fallback(rows[i], f)]
+        if retry:
+            _, fallback = kb.retrieve_batch([queries[i] for i in retry], k=k, keywords=[questions[i] for i in retry],
+                                            filters=[MetadataFilter(min_views=min_views[i]) for i in retry],
+                                            vectors=vectors[retry])
+            for i, found in zip(retry, fallback):
+                rows[i] = found
+        if timing is not None:
+            timing["embed_ms"] = (embedded - started) * 1000
+            timing["search_ms"] = (time.perf_counter() - embedded) * 1000
+        return [Retrieval(vectors[i], rows[i], [kb.docstore.get(row) for row in rows[i]], kb.version, kb)
+                for i in range(len(questions))]
+
+    def ask(self, question: str, mood: Optional[str] = None, min_views: int = 0, use_cache: bool = True) -> Answer:
+        """Answer `question` from the retrieved context, streaming tokens from the LLM (or the answer cache)."""
+        # One version for the whole answer, even if a new one is published meanwhile
+        return self.answer(question, self._search(self.knowledge_base(), question, mood, min_views, self.k), use_cache)
+
+    def answer(self, question: str, retrieval: Retrieval, use_cache: bool = True) -> Answer:
+        """Answer `question` from an earlier search() / search_batch() result."""
+        kb = retrieval.knowledge_base or self.knowledge_base()
+        answer_cache = self.answer_cache if use_cache else None
+        cached = answer_cache.lookup(retrieval.vector, retrieval.doc_ids, retrieval.version) if answer_cache is not None else None
+        if cached is not None:
+            return Answer(iter([cached]), cached=True, sources=retrieval.doc_ids, text=cached, note=CACHED_NOTE)
+
+        # Re-uploads collapsed, MMR-diversified and trimmed to the token budget
+        context, context_stats = build_context([doc.page_content for doc in retrieval.docs], kb.vectors(retrieval.rows),
+                                               token_budget=self.context_token_budget, ids=retrieval.doc_ids)
+        messages = [{"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}]
+        answer = Answer(iter(()), sources=retrieval.doc_ids, timing=CompletionTiming(), context_stats=context_stats)
+        answer.tokens = self._stream(answer, messages, retrieval, answer_cache)
+        return answer
+
+    def _stream(self, answer: Answer, messages: List[Dict[str, str]], retrieval: Retrieval,
+                answer_cache: Optional[AnswerCache]) -> Iterator[str]:
+        parts = []
+        kwargs = {"timeout": self.timeout} if self.timeout else {}
+        for delta in stream_completion(self.client, messages, self.model, answer.timing, **kwargs):
+            parts.append(delta)
+            yield delta
+        answer.text = "".join(parts)
+        answer.note = f"{answer.timing.summary()} · {answer.context_stats.summary()}"
+        if answer_cache is not None:
+            answer_cache.put(retrieval.vector, retrieval.doc_ids, answer.text, retrieval.version)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "version": self.version,
+            "query_cache": self.query_cache.stats() if self.query_cache is not None else None,
+            "answer_cache": self.answer_cache.stats() if self.answer_cache is not None else None,
+        }
@@ -0,0 +1,90 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence
+
+# Must never be imported before the first page renders; they load on first use or in a warm-up thread
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "langchain_huggingface", "spacy", "langchain_core", "faiss")
+DEFAULT_APPS = ("rag.py", "business_intelligence.py")
+
+
+def app_imports(path: str) -> List[str]:
+    """Modules an app script imports at module level, in order (imports inside functions are deferred)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """Rows of `python -X importtime` output: module, depth, self and cumulative microseconds."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                     "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def profile_imports(modules: Sequence[str], cwd: Optional[str] = None, python: str = sys.executable) -> Dict[str, object]:
+    """Import `modules` in a fresh interpreter and report where the time went.
+
+    Every module is imported even when one is missing (it is listed under
+    "missing"), so a partially installed environment still gets a profile.
+    """
+    script = "\n".join(f"try:\n    import {m}\nexcept ImportError:\n    print({m!r})" for m in modules)
+    result = subprocess.run([python, "-X", "importtime", "-c", script], cwd=cwd, capture_output=True, text=True)
+    rows = parse_importtime(result.stderr)
+    top_level = [row for row in rows if row["depth"] == 0]
+    loaded = {row["module"] for row in rows}
+    return {
+        "modules": list(modules),
+        "missing": result.stdout.split(),
+        "total_seconds": round(sum(row["cumulative_us"] for row in top_level) / 1e6, 3),
+        "heavy_loaded": [m for m in HEAVY_MODULES if m in loaded],
+        "slowest": sorted(top_level, key=lambda row: row["cumulative_us"], reverse=True)[:15],
+    }
+
+
+def main(argv=None):
+    """Profile the module-level imports of the app scripts and enforce a cold-start budget."""
+    parser = argparse.ArgumentParser(description="Measure the import time of the Streamlit apps before their first render")
+    parser.add_argument("apps", nargs="*", default=list(DEFAULT_APPS))
+    parser.add_argument("--budget", type=float, default=None, help="Fail when an app's imports take longer (seconds)")
+    parser.add_argument("--runs", type=int, default=3, help="Profile this many fresh interpreters and keep the fastest")
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args(argv)
+
+    report, failed = {}, False
+    for app in args.apps:
+        cwd = os.path.dirname(os.path.abspath(app))
+        modules = app_imports(app)
+        runs = [profile_imports(modules, cwd=cwd) for _ in range(max(1, args.runs))]
+        profile = min(runs, key=lambda run: run["total_seconds"])
+        report[app] = profile
+        over_budget = args.budget is not None and profile["total_seconds"] > args.budget
+        failed |= over_budget or bool(profile["heavy_loaded"])
+        print(f"{app}: {profile['total_seconds']:.3f}s imports"
+              + (f" (budget {args.budget:.3f}s{' EXCEEDED' if over_budget else ''})" if args.budget is not None else "")
+              + (f", heavy modules loaded: {', '.join(profile['heavy_loaded'])}" if profile["heavy_loaded"] else "")
+              + (f", missing: {', '.join(profile['missing'])}" if profile["missing"] else ""))
+        for row in profile["slowest"][:8]:
+            print(f"  {row['cumulative_us'] / 1e3:9.1f} ms  {row['module']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
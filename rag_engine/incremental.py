@@ -0,0 +1,203 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from rag_engine.ann import IndexConfig, apply_search_params, create_index, load_index_config, save_index_config, train_index
+from rag_engine.bm25 import BM25Index
+from rag_engine.documents import content_text
+from rag_engine.embedder import EmbeddingEngine
+from rag_engine.layout import DOC_MAP_FILE, has_knowledge_base
+from rag_engine.manifest import document_hash
+from rag_engine.metadata import MetadataIndex
+from rag_engine.store import DocStore, save_knowledge_base
+
+# Documents embedded and added to the index per step, so the vectors are never all
+# in memory at once (the documents and docstore records still are)
+EMBED_CHUNK_SIZE = 4096
+
+
+def load_doc_map(path: str) -> Dict[str, str]:
+    """Load the video_id -> document hash sidecar for the index at `path`."""
+    map_path = os.path.join(path, DOC_MAP_FILE)
+    if not os.path.exists(map_path):
+        return {}
+    try:
+        with open(map_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_doc_map(path: str, doc_map: Dict[str, str]):
+    """Persist the sidecar map atomically so a crash never leaves half a file."""
+    map_path = os.path.join(path, DOC_MAP_FILE)
+    tmp_path = map_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(doc_map, f)
+    os.replace(tmp_path, map_path)
+
+
+def diff_documents(docs: Dict[str, str], doc_map: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """Split `docs` into (added, changed, removed) video_ids relative to the sidecar map."""
+    added, changed = [], []
+    for video_id, text in docs.items():
+        known = doc_map.get(video_id)
+        if known is None:
+            added.append(video_id)
+        elif known != document_hash(text):
+            changed.append(video_id)
+    removed = [video_id for video_id in doc_map if video_id not in docs]
+    return added, changed, removed
+
+
+def embed_documents(texts: List[str], video_ids: List[str], embeddings, cache=None) -> np.ndarray:
+    """Embed `texts`, going through the on-disk EmbeddingCache when one is given."""
+    # EmbeddingEngine returns a matrix directly; skip the list round-trip
+    embed_fn = embeddings.embed if isinstance(embeddings, EmbeddingEngine) else embeddings.embed_documents
+    if cache is None:
+        return np.asarray(embed_fn(texts), dtype=np.float32)
+    return cache.get_or_embed(texts, video_ids, embed_fn)
+
+
+def embed_in_chunks(docs: Dict[str, str], video_ids: List[str], embeddings, cache=None,
+                    chunk_size: int = None) -> Iterator[Tuple[List[str], List[str], np.ndarray]]:
+    """Yield (ids, texts, vectors) for `video_ids` one chunk at a time; only content_text is embedded."""
+    chunk_size = chunk_size or EMBED_CHUNK_SIZE
+    for i in range(0, len(video_ids), chunk_size):
+        ids = video_ids[i:i + chunk_size]
+        texts = [docs[v] for v in ids]
+        yield ids, texts, embed_documents([content_text(t) for t in texts], ids, embeddings, cache)
+
+
+def _add_chunks(index, records: List[Dict], chunks, config: IndexConfig, total: int):
+    """Stream embedded chunks into `index`, appending row-aligned docstore records.
+
+    The configured index is created on first use. Indexes that need training (IVF)
+    buffer chunks until config.train_size vectors (or all of them) have arrived,
+    train on that sample, then flush.
+    """
+    pending = []
+
+    def flush():
+        if not index.is_trained:
+            train_index(index, np.concatenate([v for _, _, v in pending]), config)
+        for ids, texts, vectors in pending:
+            index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+            records.extend({"id": video_id, "page_content": text} for video_id, text in zip(ids, texts))
+        pending.clear()
+
+    for ids, texts, vectors in chunks:
+        if index is None:
+            index = create_index(config, vectors.shape[1], n_train=min(total, config.train_size))
+        pending.append((ids, texts, vectors))
+        if index.is_trained or sum(len(p[0]) for p in pending) >= config.train_size:
+            flush()
+    if pending:
+        flush()
+    if index is not None:
+        apply_search_params(index, config)
+    return index
+
+
+def update_faiss_index(docs: Dict[str, str], embeddings, path: str = "faiss_index", cache=None,
+                       config: IndexConfig = None, compression: str = "zlib",
+                       removed: Optional[Iterable[str]] = None) -> Dict[str, object]:
+    """Bring the knowledge base at `path` in line with `docs` (video_id -> text).
+
+    Only added and changed documents are embedded, in chunks that go straight
+    into the index. Documents whose content_text is unchanged (only their view
+    counts moved) keep their rows and vectors; just their text is rewritten.
+    Rows of changed and removed videos are removed first (flat
+    indexes compact, so rows stay aligned with the docstore) and fresh documents
+    are appended. A full build happens when there is no sidecar or knowledge base
+    yet, when `config` differs from the one the index was built with, or when
+    documents must be removed from an index type that cannot remove them (see
+    IndexConfig.supports_removal); with an EmbeddingCache a full build reuses
+    every vector computed before.
+
+    Passing `removed` makes this a partial update: `docs` then holds only new
+    and changed documents (e.g. from the source manifest), `removed` lists the
+    video_ids to drop and every other indexed document is kept. If a full build
+    turns out to be needed, the kept documents are read back from the docstore.
+    """
+    config = config or IndexConfig()
+    doc_map = load_doc_map(path)
+    built_with = load_index_config(path) or IndexConfig()
+
+    partial = removed is not None
+    if partial and not has_knowledge_base(path):
+        raise ValueError(f"A partial update needs an existing knowledge base at {path}")
+    added, changed, missing = diff_documents(docs, doc_map)
+    removed = [video_id for video_id in removed if video_id in doc_map] if partial else missing
+    records, refreshed = None, []
+    if changed and doc_map and has_knowledge_base(path) and built_with.same_structure(config):
+        records = list(DocStore(path).records())
+        indexed = {record["id"]: record["page_content"] for record in records}
+        refreshed = [v for v in changed if v in indexed and content_text(indexed[v]) == content_text(docs[v])]
+        changed = [v for v in changed if v not in set(refreshed)]
+    needs_full = (not doc_map or not has_knowledge_base(path) or not built_with.same_structure(config)
+                  or ((changed or removed) and not config.supports_removal))
+
+    if needs_full:
+        if partial:
+            drop = set(removed)
+            kept = {r["id"]: r["page_content"] for r in DocStore(path).records() if r["id"] not in drop and r["id"] not in docs}
+            docs = {**kept, **docs}
+        video_ids = list(docs)
+        if not video_ids:
+            return {"mode": "noop", "added": 0, "changed": 0, "removed": 0}
+        records = []
+        index = _add_chunks(None, records, embed_in_chunks(docs, video_ids, embeddings, cache), config, len(video_ids))
+        save_knowledge_base(path, index, records, compression)
+        save_index_config(path, config)
+        save_doc_map(path, {v: document_hash(docs[v]) for v in video_ids})
+        return {"mode": "full", "added": len(video_ids), "changed": 0, "removed": 0}
+
+    # nprobe / efSearch changes need no rebuild; the loader applies the saved values
+    save_index_config(path, config)
+    stats = {"mode": "incremental", "added": len(added), "changed": len(changed), "removed": len(removed),
+             "refreshed": len(refreshed)}
+    if not (added or changed or removed or refreshed):
+        # Nothing to touch: index files are hard-linked between published versions
+        # and never modified; the builder records freshness in the source manifest
+        stats["mode"] = "noop"
+        return stats
+
+    index = faiss.read_index(os.path.join(path, "index.faiss"))
+    records = records if records is not None else list(DocStore(path).records())
+    # Knowledge bases from before a side index existed get it built from scratch on save
+    lexical = BM25Index.load(path, mmap=False)
+    metadata = MetadataIndex.load(path, mmap=False)
+    if refreshed:
+        # BM25 reads no count fields; the metadata index holds the view bucket
+        rows = {record["id"]: row for row, record in enumerate(records)}
+        refreshed_rows = [rows[v] for v in refreshed]
+        for row, video_id in zip(refreshed_rows, refreshed):
+            records[row] = {"id": video_id, "page_content": docs[video_id]}
+        if metadata is not None:
+            metadata.update_rows(refreshed_rows, [records[row] for row in refreshed_rows])
+    stale = set(changed) | set(removed)
+    stale_rows = [row for row, record in enumerate(records) if record["id"] in stale]
+    if stale_rows:
+        index.remove_ids(np.asarray(stale_rows, dtype=np.int64))
+        records = [record for record in records if record["id"] not in stale]
+        for side in (lexical, metadata):
+            if side is not None:
+                side.remove_rows(stale_rows)
+    fresh = added + changed
+    kept = len(records)
+    _add_chunks(index, records, embed_in_chunks(docs, fresh, embeddings, cache), config, len(fresh))
+    for side in (lexical, metadata):
+        if side is not None:
+            side.add(records[kept:])
+    save_knowledge_base(path, index, records, compression, lexical=lexical, metadata=metadata)
+
+    for video_id in removed:
+        doc_map.pop(video_id, None)
+    for video_id in fresh + refreshed:
+        doc_map[video_id] = document_hash(docs[video_id])
+    save_doc_map(path, doc_map)
+    return stats
@@ -0,0 +1,75 @@
+import json
+import os
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Optional
+
+INDEX_CONFIG_FILE = "index_config.json"
+INDEX_KINDS = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+
+@dataclass
+class IndexConfig:
+    """Which FAISS index the knowledge base is built with, plus its search-time knobs."""
+    kind: str = "flat"
+    sq8: bool = False          # int8 scalar quantisation for flat / hnsw / ivf_flat storage
+    nlist: int = 1024          # IVF cells (capped by training-set size)
+    nprobe: int = 16           # IVF cells visited per query
+    pq_m: int = 16             # PQ sub-quantisers; must divide the embedding width
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+    train_size: int = 50000    # vectors sampled to train IVF coarse quantiser / PQ codebooks
+
+    def __post_init__(self):
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{self.kind}', expected one of {INDEX_KINDS}")
+
+    @property
+    def supports_removal(self) -> bool:
+        # Flat indexes compact on remove_ids, which keeps row ids positional.
+        # HNSW cannot remove at all and IVF keeps sparse ids, so those rebuild instead.
+        return self.kind == "flat"
+
+    def same_structure(self, other: "IndexConfig") -> bool:
+        """True when `other` builds the same index; search-time knobs may differ."""
+        search_only = ("nprobe", "ef_search")
+        mine, theirs = asdict(self), asdict(other)
+        return all(mine[k] == theirs[k] for k in mine if k not in search_only)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "IndexConfig":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        """Read RAG_INDEX_<FIELD> environment variables, e.g. RAG_INDEX_KIND=hnsw."""
+        values = {}
+        for f in fields(cls):
+            raw = os.getenv(f"RAG_INDEX_{f.name.upper()}")
+            if raw is None:
+                continue
+            if f.type is bool:
+                values[f.name] = raw.strip().lower() in ("1", "true", "yes")
+            elif f.type is int:
+                values[f.name] = int(raw)
+            else:
+                values[f.name] = raw
+        return cls(**values)
+
+
+def save_index_config(path: str, config: IndexConfig):
+    config_path = os.path.join(path, INDEX_CONFIG_FILE)
+    tmp_path = config_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(asdict(config), f)
+    os.replace(tmp_path, config_path)
+
+
+def load_index_config(path: str) -> Optional[IndexConfig]:
+    config_path = os.path.join(path, INDEX_CONFIG_FILE)
+    if not os.path.exists(config_path):
+        return None
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return IndexConfig.from_dict(json.load(f))
@@ -0,0 +1,23 @@
+"""File names of a knowledge-base directory.
+
+Kept apart from store.py so the apps can tell whether a knowledge base exists
+without importing faiss or langchain_core.
+"""
+import os
+
+from rag_engine.bm25 import BM25_FILES
+from rag_engine.metadata import METADATA_FILES
+
+DOCS_FILE = "docs.bin"
+OFFSETS_FILE = "docs.offsets.npy"
+DOCS_META_FILE = "docs.meta.json"
+# Sidecar written next to index.faiss: video_id -> hash of the document text
+DOC_MAP_FILE = "doc_map.json"
+# Written by earlier versions; removed when a knowledge base is saved over them
+LEGACY_FILES = ("index.pkl", "docs.jsonl")
+# Docs first: a reader never pairs a new index with an older, shorter docstore
+KNOWLEDGE_BASE_FILES = (DOCS_FILE, OFFSETS_FILE, DOCS_META_FILE) + BM25_FILES + METADATA_FILES + ("index.faiss",)
+
+
+def has_knowledge_base(path: str) -> bool:
+    return all(os.path.exists(os.path.join(path, name)) for name in ("index.faiss", DOCS_FILE, OFFSETS_FILE, DOCS_META_FILE))
@@ -0,0 +1,67 @@
+import importlib
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+_MISSING = object()
+
+
+class LazyResource(Generic[T]):
+    """A heavy object (embedding model, NLP pipeline) created on first use.
+
+    warm() starts creating it in a daemon thread so the app can render while
+    torch / spaCy import; get() returns it, waiting for the warm-up if it is
+    still running. A failed warm-up is logged and retried by the next get().
+    """
+
+    def __init__(self, factory: Callable[[], T], name: str = "resource"):
+        self.factory = factory
+        self.name = name
+        self.load_seconds: Optional[float] = None
+        self._value = _MISSING
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not _MISSING
+
+    def get(self) -> T:
+        if self._value is _MISSING:
+            with self._lock:
+                if self._value is _MISSING:
+                    start = time.perf_counter()
+                    self._value = self.factory()
+                    self.load_seconds = time.perf_counter() - start
+                    logger.info("Loaded %s in %.2fs", self.name, self.load_seconds)
+        return self._value
+
+    def warm(self) -> "LazyResource[T]":
+        """Start creating the object in the background (once); returns self."""
+        with self._lock:
+            if self._thread is None and self._value is _MISSING:
+                self._thread = threading.Thread(target=self._warm, name=f"warm-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def _warm(self):
+        try:
+            self.get()
+        except Exception:
+            logger.exception("Warming up %s failed; retrying on first use", self.name)
+
+
+def lazy_import(module: str, name: str) -> Callable:
+    """A stand-in for `module.name` that imports `module` on its first call.
+
+    For app scripts: the name stays a module attribute (patchable in tests)
+    while faiss / langchain_core load only when it is used.
+    """
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+    call.__name__ = call.__qualname__ = name
+    return call
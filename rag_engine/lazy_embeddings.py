@@ -0,0 +1,19 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from rag_engine.lazy import LazyResource
+
+
+# Apart from rag_engine.lazy so apps that only need LazyResource do not import langchain_core
+class LazyEmbeddings(Embeddings):
+    """LangChain Embeddings backed by a LazyResource: free to hold, the model is only needed to embed."""
+
+    def __init__(self, resource: LazyResource[Embeddings]):
+        self.resource = resource
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.resource.get().embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.resource.get().embed_documents(texts)
@@ -0,0 +1,165 @@
+import glob
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Written next to index.faiss: per source file its stat, content hash and the videos it contributed
+MANIFEST_FILE = "manifest.json"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def document_hash(text: str) -> str:
+    """Stable fingerprint of a knowledge-base document."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def video_hash(video: dict) -> str:
+    """Fingerprint of one scraped video record, independent of key order."""
+    return hashlib.sha1(json.dumps(video, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def file_videos(path: str) -> Dict[str, str]:
+    """video_id -> record hash for every video in one scraped JSON dump (first occurrence wins)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    records = data.get("videos", []) if isinstance(data, dict) else data if isinstance(data, list) else []
+    videos = {}
+    for video in records:
+        video_id = video.get("video_id") if isinstance(video, dict) else None
+        if video_id and video_id not in videos:
+            videos[video_id] = video_hash(video)
+    return videos
+
+
+def load_manifest(index_path: str) -> Optional[Dict[str, Dict]]:
+    """The manifest saved with the index at `index_path`, or None when there is none."""
+    manifest_path = os.path.join(index_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(index_path: str, manifest: Dict[str, Dict]):
+    manifest_path = os.path.join(index_path, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def scan_sources(directory: str, previous: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+    """Manifest entries for the JSON dumps in `directory`, keyed by file name.
+
+    A file whose size and mtime match `previous` is not read at all. Otherwise
+    its content hash is compared, and only a file whose bytes really changed is
+    parsed for its videos; touched or copied files keep their old entry.
+    """
+    previous = previous or {}
+    manifest = {}
+    for json_path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        name = os.path.basename(json_path)
+        stat = os.stat(json_path)
+        old = previous.get(name)
+        if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+            manifest[name] = old
+            continue
+        digest = file_hash(json_path)
+        if old and old["sha1"] == digest:
+            videos = old["videos"]
+        else:
+            try:
+                videos = file_videos(json_path)
+            except (OSError, ValueError):
+                videos = {}
+        manifest[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest, "videos": videos}
+    return manifest
+
+
+def manifest_videos(manifest: Dict[str, Dict]) -> Dict[str, str]:
+    """video_id -> record hash across files, in the order read_scraped_videos deduplicates them."""
+    videos = {}
+    for name in sorted(manifest):
+        for video_id, digest in manifest[name]["videos"].items():
+            videos.setdefault(video_id, digest)
+    return videos
+
+
+@dataclass
+class SourceChanges:
+    """What changed in the scraped data since the index was built."""
+    manifest: Dict[str, Dict]  # the current scan; save it once the index reflects it
+    has_baseline: bool = True  # False when the index has no manifest to compare against
+    added_files: List[str] = field(default_factory=list)
+    changed_files: List[str] = field(default_factory=list)
+    removed_files: List[str] = field(default_factory=list)
+    touched_files: List[str] = field(default_factory=list)  # new stat, same bytes
+    added_videos: List[str] = field(default_factory=list)
+    changed_videos: List[str] = field(default_factory=list)
+    removed_videos: List[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return not self.has_baseline or bool(self.added_files or self.changed_files or self.removed_files)
+
+    @property
+    def stale_manifest(self) -> bool:
+        """Only the stat of some files changed: no rebuild, but the stored manifest wants refreshing."""
+        return bool(self.touched_files) and not self.has_changes
+
+    def summary(self) -> str:
+        if not self.has_baseline:
+            return "No source manifest"
+        if not self.has_changes:
+            return "Up to date"
+        files = len(self.added_files) + len(self.changed_files) + len(self.removed_files)
+        return (f"New data detected: {files} file(s) changed "
+                f"(+{len(self.added_videos)} ~{len(self.changed_videos)} -{len(self.removed_videos)} videos)")
+
+
+def diff_sources(old: Optional[Dict[str, Dict]], new: Dict[str, Dict]) -> SourceChanges:
+    """Files and videos added, changed and removed between two manifests."""
+    changes = SourceChanges(manifest=new, has_baseline=old is not None)
+    old = old or {}
+    for name, entry in new.items():
+        if name not in old:
+            changes.added_files.append(name)
+        elif entry["sha1"] != old[name]["sha1"]:
+            changes.changed_files.append(name)
+        elif (entry["size"], entry["mtime_ns"]) != (old[name]["size"], old[name]["mtime_ns"]):
+            changes.touched_files.append(name)
+    changes.removed_files = [name for name in old if name not in new]
+
+    old_videos, new_videos = manifest_videos(old), manifest_videos(new)
+    for video_id, digest in new_videos.items():
+        known = old_videos.get(video_id)
+        if known is None:
+            changes.added_videos.append(video_id)
+        elif known != digest:
+            changes.changed_videos.append(video_id)
+    changes.removed_videos = [video_id for video_id in old_videos if video_id not in new_videos]
+    return changes
+
+
+def check_sources(directory: str, index_path: str) -> SourceChanges:
+    """Compare `directory` with the manifest of the index at `index_path`.
+
+    Read-only: the index may be live and is only written by the builder. When
+    files were only touched (`stale_manifest`), the builder saves
+    `changes.manifest` so the next check is stat-only again.
+    """
+    old = load_manifest(index_path)
+    return diff_sources(old, scan_sources(directory, old))
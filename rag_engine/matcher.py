@@ -0,0 +1,148 @@
+import json
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag_engine.atomic import replace_with
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every label whose keywords occur in a text.
+
+    All keywords are compiled into one case-insensitive automaton, so a text is
+    scanned once however many labels there are; memory grows with the total
+    keyword length only. With `whole_words`, a match must not be flanked by
+    letters or digits.
+    """
+
+    def __init__(self, labels: Dict[str, Sequence[str]], whole_words: bool = False):
+        self.labels = list(labels)
+        self.whole_words = whole_words
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, int]]] = [[]]  # (label id, keyword length) ending at each node
+        for label_id, keywords in enumerate(labels.values()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                node = 0
+                for ch in keyword:
+                    if ch not in goto[node]:
+                        goto[node][ch] = len(goto)
+                        goto.append({})
+                        outputs.append([])
+                    node = goto[node][ch]
+                outputs[node].append((label_id, len(keyword)))
+
+        # Breadth-first: a node's failure target is always shallower, so it is already complete
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            outputs[node] = outputs[node] + outputs[fail[node]]
+            for ch, target in goto[node].items():
+                if node:
+                    state = fail[node]
+                    while state and ch not in goto[state]:
+                        state = fail[state]
+                    fail[target] = goto[state].get(ch, 0)
+                queue.append(target)
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(out) for out in outputs]
+
+    def find(self, text: str) -> List[int]:
+        """Sorted ids (positions in `labels`) of the labels found in `text`."""
+        text = text.lower()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        node = 0
+        for end, ch in enumerate(text):
+            target = goto[node].get(ch)
+            while target is None and node:
+                node = fail[node]
+                target = goto[node].get(ch)
+            node = target or 0
+            if outputs[node]:
+                for label_id, length in outputs[node]:
+                    if self.whole_words and not self._at_word_boundary(text, end + 1 - length, end + 1):
+                        continue
+                    found.add(label_id)
+        return sorted(found)
+
+    @staticmethod
+    def _at_word_boundary(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+ARTISTS_FILE = "artists.json"
+INDPTR_FILE = "artists.indptr.npy"
+INDICES_FILE = "artists.indices.npy"
+
+
+class TagMatrix:
+    """Sparse row × label matrix in CSR form: indices[indptr[r]:indptr[r + 1]] are row r's labels."""
+
+    def __init__(self, labels: List[str], indptr: np.ndarray, indices: np.ndarray):
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def build(cls, matcher: KeywordMatcher, texts: Iterable[str]) -> "TagMatrix":
+        indptr, indices = [0], []
+        for text in texts:
+            indices.extend(matcher.find(text))
+            indptr.append(len(indices))
+        return cls(list(matcher.labels), np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int32))
+
+    def rows(self) -> np.ndarray:
+        """Row id of every stored entry, aligned with `indices`."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+
+    def totals(self, mask: Optional[np.ndarray] = None, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-label (row count, summed weight) over the rows selected by boolean `mask`."""
+        rows, labels = self.rows(), self.indices
+        if mask is not None:
+            keep = np.asarray(mask, dtype=bool)[rows]
+            rows, labels = rows[keep], labels[keep]
+        counts = np.bincount(labels, minlength=len(self.labels))
+        sums = (np.bincount(labels, weights=np.asarray(weights, dtype=np.float64)[rows], minlength=len(self.labels))
+                if weights is not None else counts.astype(np.float64))
+        return counts, sums
+
+    def save(self, path: str):
+        # Each file is replaced whole, never rewritten, so a reader never maps a half-written array
+        replace_with(os.path.join(path, INDICES_FILE), lambda tmp_path: _save_array(tmp_path, self.indices))
+        replace_with(os.path.join(path, INDPTR_FILE), lambda tmp_path: _save_array(tmp_path, self.indptr))
+        replace_with(os.path.join(path, ARTISTS_FILE), lambda tmp_path: _save_json(tmp_path, self.labels))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> Optional["TagMatrix"]:
+        """Open the matrix saved at `path`, or None when there is none (or only part of a newer save)."""
+        if not all(os.path.exists(os.path.join(path, name)) for name in (ARTISTS_FILE, INDPTR_FILE, INDICES_FILE)):
+            return None
+        with open(os.path.join(path, ARTISTS_FILE), 'r', encoding='utf-8') as f:
+            labels = json.load(f)
+        mode = 'r' if mmap else None
+        indptr = np.load(os.path.join(path, INDPTR_FILE), mmap_mode=mode)
+        indices = np.load(os.path.join(path, INDICES_FILE), mmap_mode=mode)
+        if not len(indptr) or indptr[-1] != len(indices) or (len(indices) and indices.max() >= len(labels)):
+            return None
+        return cls(labels, indptr, indices)
+
+
+def _save_array(path: str, array: np.ndarray):
+    # A file object: np.save would append ".npy" to a temp file name
+    with open(path, 'wb') as f:
+        np.save(f, array)
+
+
+def _save_json(path: str, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False)
@@ -0,0 +1,190 @@
+import json
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TAG_KEYWORDS = (
+    ("Rap/Hip-Hop", ("rap", "hip hop", "honey singh", "badshah", "raftaar")),
+    ("Emotional/Sad", ("sad", "dard", "judai", "broken")),
+    ("Party/Dance", ("party", "dance", "club", "nachta")),
+    ("Devotional", ("bhakti", "bhajan", "devotional")),
+)
+# Bit i of a row's tag mask is TAG_KEYWORDS[i]
+TAG_BITS = {tag: 1 << i for i, (tag, _) in enumerate(TAG_KEYWORDS)}
+
+# Views are kept per 100k, the step of the sidebar "Min Views filter" slider
+VIEW_BUCKET = 100_000
+YEAR_PATTERN = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+NAME_PATTERN = re.compile(r"[^a-z0-9]+")
+# Dropped to form the short name people type, e.g. "Zee Music Company" -> "zee music"
+CHANNEL_SUFFIXES = ("company", "official", "india")
+
+CHANNELS_FILE = "meta.channels.json"
+YEAR_FILE = "meta.year.npy"
+CHANNEL_FILE = "meta.channel.npy"
+VIEWS_FILE = "meta.views.npy"
+TAGS_FILE = "meta.tags.npy"
+METADATA_FILES = (CHANNELS_FILE, YEAR_FILE, CHANNEL_FILE, VIEWS_FILE, TAGS_FILE)
+
+
+def document_fields(page_content: str) -> Dict[str, str]:
+    """The "NAME: value" header lines of a knowledge-base document, keyed by NAME."""
+    fields = {}
+    for line in page_content.split("\n"):
+        name, sep, value = line.partition(": ")
+        if not sep or not name.isupper():
+            continue
+        if name == "DESCRIPTION":
+            # Free text follows; it may contain lines that look like headers
+            break
+        fields[name] = value.strip()
+    return fields
+
+
+def has_metadata(path: str) -> bool:
+    return all(os.path.exists(os.path.join(path, name)) for name in METADATA_FILES)
+
+
+def _name_tokens(name: str) -> str:
+    return NAME_PATTERN.sub(" ", name.lower()).strip()
+
+
+@dataclass
+class MetadataFilter:
+    """Row constraints applied before vector / BM25 search."""
+    year: Optional[int] = None
+    channel: Optional[str] = None
+    min_views: int = 0
+    tags: Tuple[str, ...] = ()
+
+    def is_empty(self) -> bool:
+        return self.year is None and self.channel is None and self.min_views <= 0 and not self.tags
+
+
+class MetadataIndex:
+    """Per-row year, channel, view bucket and tag bitmask for a knowledge base.
+
+    Arrays are indexed by FAISS row id and compacted on removal the same way as
+    the flat index, so a boolean mask over them selects index rows directly.
+    """
+
+    def __init__(self, channels: List[str], year: np.ndarray, channel: np.ndarray, views: np.ndarray, tags: np.ndarray):
+        self.channels = channels
+        self.channel_codes = {name: i for i, name in enumerate(channels)}
+        self.year = year
+        self.channel = channel
+        self.views = views
+        self.tags = tags
+
+    def __len__(self):
+        return len(self.year)
+
+    @classmethod
+    def build(cls, records: Iterable[Dict]) -> "MetadataIndex":
+        index = cls([], np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int32),
+                    np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint8))
+        index.add(records)
+        return index
+
+    def add(self, records: Iterable[Dict]):
+        """Append records as rows len(self), len(self) + 1, ..."""
+        years, channels, views, tags = [], [], [], []
+        for record in records:
+            fields = document_fields(record["page_content"])
+            year = fields.get("YEAR", "")
+            years.append(int(year) if year.isdigit() else 0)
+            name = fields.get("CHANNEL", "")
+            if name not in self.channel_codes:
+                self.channel_codes[name] = len(self.channels)
+                self.channels.append(name)
+            channels.append(self.channel_codes[name])
+            count = fields.get("VIEWS", "")
+            views.append(int(count) // VIEW_BUCKET if count.isdigit() else 0)
+            tags.append(sum(TAG_BITS.get(t.strip(), 0) for t in fields.get("TAGS", "").split(",")))
+        if not years:
+            return
+        self.year = np.concatenate((self.year, np.asarray(years, dtype=np.int16)))
+        self.channel = np.concatenate((self.channel, np.asarray(channels, dtype=np.int32)))
+        self.views = np.concatenate((self.views, np.minimum(np.asarray(views, dtype=np.int64), 2**32 - 1).astype(np.uint32)))
+        self.tags = np.concatenate((self.tags, np.asarray(tags, dtype=np.uint8)))
+
+    def update_rows(self, rows: Sequence[int], records: Sequence[Dict]):
+        """Re-derive `rows` from their rewritten `records` (e.g. new view counts) in place."""
+        end = len(self)
+        self.add(records)
+        rows = np.asarray(rows, dtype=np.int64)
+        for name in ("year", "channel", "views", "tags"):
+            values = getattr(self, name)
+            values[rows] = values[end:]
+            setattr(self, name, values[:end])
+
+    def remove_rows(self, rows: Iterable[int]):
+        """Drop `rows` and shift later rows down, mirroring IndexFlat.remove_ids."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(list(rows), dtype=np.int64)] = False
+        self.year, self.channel, self.views, self.tags = (a[keep] for a in (self.year, self.channel, self.views, self.tags))
+
+    def mask(self, filters: MetadataFilter) -> np.ndarray:
+        """Boolean array over rows that satisfy `filters`.
+
+        min_views is compared per 100k bucket, which is exact for slider values.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if filters.year is not None:
+            mask &= self.year == filters.year
+        if filters.channel is not None:
+            code = self.channel_codes.get(filters.channel)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.channel == code
+        if filters.min_views > 0:
+            mask &= self.views >= math.ceil(filters.min_views / VIEW_BUCKET)
+        if filters.tags:
+            bits = sum(TAG_BITS[t] for t in filters.tags)
+            mask &= (self.tags & bits) != 0
+        return mask
+
+    def parse_filters(self, question: str, min_views: int = 0) -> MetadataFilter:
+        """Pull a year and a known channel out of a free-text question.
+
+        A year is only used when the question names exactly one; the longest
+        channel name (or its short form) found in the question wins.
+        """
+        years = set(YEAR_PATTERN.findall(question))
+        padded = f" {_name_tokens(question)} "
+        squashed = padded.replace(" ", "")
+        best, best_len = None, 0
+        for name in self.channels:
+            tokens = _name_tokens(name)
+            short = tokens
+            while short.rsplit(" ", 1)[-1] in CHANNEL_SUFFIXES and " " in short:
+                short = short.rsplit(" ", 1)[0]
+            for alias in {tokens, short}:
+                # "t series" also matches "tseries"; very short names only as whole words
+                found = f" {alias} " in padded or (len(alias) > 4 and alias.replace(" ", "") in squashed)
+                if found and len(alias) > best_len:
+                    best, best_len = name, len(alias)
+        return MetadataFilter(year=int(years.pop()) if len(years) == 1 else None, channel=best, min_views=min_views)
+
+    def save(self, path: str):
+        with open(os.path.join(path, CHANNELS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.channels, f, ensure_ascii=False)
+        np.save(os.path.join(path, YEAR_FILE), self.year)
+        np.save(os.path.join(path, CHANNEL_FILE), self.channel)
+        np.save(os.path.join(path, VIEWS_FILE), self.views)
+        np.save(os.path.join(path, TAGS_FILE), self.tags)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> Optional["MetadataIndex"]:
+        """Open the side index saved at `path`, or None when there is none."""
+        if not has_metadata(path):
+            return None
+        with open(os.path.join(path, CHANNELS_FILE), 'r', encoding='utf-8') as f:
+            channels = json.load(f)
+        mode = 'r' if mmap else None
+        arrays = [np.load(os.path.join(path, name), mmap_mode=mode) for name in (YEAR_FILE, CHANNEL_FILE, VIEWS_FILE, TAGS_FILE)]
+        return cls(channels, *arrays)
@@ -0,0 +1,77 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+SEPARATOR_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_query(text: Optional[str]) -> str:
+    """Form of a query that ignores case, whitespace and punctuation."""
+    return SEPARATOR_PATTERN.sub(" ", (text or "").lower()).strip()
+
+
+class QueryCache:
+    """Thread-safe LRU cache with a TTL, tied to one knowledge-base version.
+
+    Meant to be shared by every session in the process. Lookups carry the
+    version of the index they run against; the first lookup with a new version
+    drops every entry, so results computed for a replaced index are never served.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version: Optional[Hashable] = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_version(self, version: Hashable):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: Hashable, version: Hashable):
+        """Cached value for `key`, or None on a miss / expired entry."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value, version: Hashable):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since this cache object was created."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+        }
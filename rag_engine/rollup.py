@@ -0,0 +1,84 @@
+import math
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from rag_engine.atomic import replace_with
+from rag_engine.metadata import VIEW_BUCKET
+
+ROLLUP_FILE = "rollup.arrow"
+# Views above this many buckets share the top bucket (10M, the Min Views slider maximum)
+MAX_VIEW_BUCKET = 100
+COUNT = "count"
+
+
+def view_buckets(views) -> np.ndarray:
+    """100k-view bucket of each count, capped at MAX_VIEW_BUCKET."""
+    return np.minimum(np.asarray(views, dtype=np.int64) // VIEW_BUCKET, MAX_VIEW_BUCKET).astype(np.int16)
+
+
+def min_views_bucket(min_views: int) -> int:
+    """First bucket whose videos all have >= min_views; exact for multiples of VIEW_BUCKET up to the cap."""
+    return min(math.ceil(max(min_views, 0) / VIEW_BUCKET), MAX_VIEW_BUCKET)
+
+
+class RollupCube:
+    """Materialized group-by: one row per combination of dimension values, with a count and summed measures.
+
+    Any filter that can be stated on the dimensions is answered by selecting
+    cells and summing them, so its cost depends on the number of distinct
+    combinations, not on the number of videos.
+    """
+
+    def __init__(self, cells: pd.DataFrame, dimensions: Sequence[str], measures: Sequence[str]):
+        self.cells = cells
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+
+    def __len__(self):
+        return len(self.cells)
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, dimensions: Sequence[str], measures: Sequence[str]) -> "RollupCube":
+        aggregations = {COUNT: (dimensions[0], "size"), **{m: (m, "sum") for m in measures}}
+        cells = frame.groupby(list(dimensions), observed=True, dropna=False, sort=False).agg(**aggregations).reset_index()
+        return cls(cells, dimensions, measures)
+
+    def select(self, mask) -> "RollupCube":
+        """The cube restricted to the cells where boolean `mask` (aligned with `cells`) is set."""
+        return RollupCube(self.cells[np.asarray(mask, dtype=bool)], self.dimensions, self.measures)
+
+    def total(self, measure: str = COUNT):
+        return self.cells[measure].sum()
+
+    def rollup(self, dimension: str, measure: str = COUNT) -> pd.Series:
+        """`measure` summed per value of `dimension`, over every other dimension."""
+        return self.cells.groupby(dimension, observed=True, sort=True)[measure].sum()
+
+    def save(self, path: str):
+        table = pa.Table.from_pandas(self.cells, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b"dimensions": ",".join(self.dimensions).encode(),
+                                               b"measures": ",".join(self.measures).encode()})
+        replace_with(os.path.join(path, ROLLUP_FILE), lambda tmp_path: write_ipc_file(table, tmp_path))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RollupCube"]:
+        """Open the cube saved at `path`, or None when there is none."""
+        cube_path = os.path.join(path, ROLLUP_FILE)
+        if not os.path.exists(cube_path):
+            return None
+        table = pa.ipc.open_file(pa.memory_map(cube_path, 'r')).read_all()
+        metadata = table.schema.metadata
+        dimensions, measures = (metadata[key].decode().split(",") for key in (b"dimensions", b"measures"))
+        return cls(table.to_pandas(), dimensions, [m for m in measures if m])
+
+
+def write_ipc_file(table: pa.Table, path: str):
+    """Write `table` as an Arrow IPC file, the format the snapshot files are memory-mapped in."""
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
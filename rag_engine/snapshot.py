@@ -0,0 +1,195 @@
+import glob
+import json
+import os
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from rag_engine.atomic import replace_with
+from rag_engine.matcher import KeywordMatcher, TagMatrix
+from rag_engine.rollup import RollupCube, view_buckets, write_ipc_file
+from yt_scrape.utils import calculate_engagement_scores, deduplicate_videos, infer_channel_names
+
+SNAPSHOT_FILE = "videos.arrow"
+FINGERPRINT_FILE = "fingerprint.json"
+# Bumped whenever SCHEMA changes, so snapshots written by older code are rebuilt
+SNAPSHOT_VERSION = 4
+
+# Leaderboard artists (matched in titles) and Vibe Picker moods (title or description),
+# tagged once per snapshot build; the artist list can grow without slowing reruns
+ARTISTS = ["Arijit Singh", "Diljit Dosanjh", "Shreya Ghoshal", "Jubin Nautiyal", "Karan Aujla", "Vishal Mishra",
+           "Neha Kakkar", "Sonu Nigam", "Badshah"]
+MOODS = {
+    "Party/Dance": ["party", "dance"],
+    "Emotional/Sad": ["emotional", "sad"],
+    "Rap/Hip-Hop": ["rap", "hip-hop"],
+    "Devotional": ["devotional"],
+}
+
+TEXT_COLUMNS = ["video_id", "title", "description", "thumbnail_url"]
+COUNT_COLUMNS = ["view_count", "like_count", "comment_count"]
+
+SCHEMA = pa.schema([
+    ("video_id", pa.string()),
+    ("title", pa.string()),
+    ("description", pa.string()),
+    ("thumbnail_url", pa.string()),
+    ("published_at", pa.timestamp("s", tz="UTC")),
+    ("view_count", pa.int64()),
+    ("like_count", pa.int64()),
+    ("comment_count", pa.int64()),
+    ("channel_name", pa.dictionary(pa.int32(), pa.string())),
+    # Derived once at build time so dashboard reruns only filter
+    ("engagement_score", pa.float64()),
+    ("pub_month", pa.dictionary(pa.int32(), pa.string())),
+    ("year", pa.int16()),
+    ("moods", pa.uint8()),  # bit i set when MOODS[i] matches
+])
+
+
+def read_scraped_videos(directory: str = "scraped_data", on_error: Optional[Callable[[str, Exception], None]] = None,
+                        fingerprint: Optional[List[list]] = None) -> List[dict]:
+    """Parse every scraped JSON dump in `directory` and return deduplicated video dicts.
+
+    `fingerprint`, when given, is filled with the source_fingerprint entry of
+    each file, taken from the open file, so it describes exactly what was read.
+    """
+    all_videos = []
+    # Sorted, so the first copy of a duplicated video is the same one the source manifest records
+    for json_path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        stat = None
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                stat = os.fstat(f.fileno())
+                data = json.load(f)
+            if isinstance(data, dict): all_videos.extend(data.get("videos", []))
+            elif isinstance(data, list): all_videos.extend(data)
+        except Exception as e:
+            if on_error: on_error(json_path, e)
+        if fingerprint is not None and stat is not None:
+            fingerprint.append([os.path.basename(json_path), stat.st_size, stat.st_mtime_ns])
+    return deduplicate_videos(all_videos)
+
+
+def source_fingerprint(directory: str = "scraped_data") -> List[list]:
+    """Cheap stat-only fingerprint (name, size, mtime) of the scraped JSON files."""
+    fingerprint = []
+    for json_path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        stat = os.stat(json_path)
+        fingerprint.append([os.path.basename(json_path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def videos_to_table(videos: List[dict]) -> pa.Table:
+    """Convert raw video dicts into a typed Arrow table."""
+    frame = pd.DataFrame(videos)
+    for column in TEXT_COLUMNS + COUNT_COLUMNS + ["published_at", "channel_name"]:
+        if column not in frame.columns:
+            frame[column] = None
+    columns = {column: frame[column].fillna("").astype(str) for column in TEXT_COLUMNS}
+    for column in COUNT_COLUMNS:
+        columns[column] = pd.to_numeric(frame[column], errors='coerce').fillna(0).astype("int64")
+    published = pd.to_datetime(frame["published_at"], errors='coerce', utc=True).dt.floor("s")
+    columns["published_at"] = published
+    columns["channel_name"] = infer_channel_names(frame).astype("category")
+    columns["engagement_score"] = calculate_engagement_scores(columns["view_count"], columns["like_count"], columns["comment_count"])
+    columns["pub_month"] = published.dt.strftime("%Y-%m").astype("category")
+    columns["year"] = published.dt.year.fillna(0).astype("int16")
+    matcher = KeywordMatcher(MOODS)
+    columns["moods"] = np.fromiter(
+        (sum(1 << i for i in matcher.find(f"{title}\n{description}")) for title, description in zip(columns["title"], columns["description"])),
+        dtype=np.uint8, count=len(frame))
+    return pa.Table.from_pandas(pd.DataFrame(columns), schema=SCHEMA, preserve_index=False)
+
+
+def mood_mask(moods: np.ndarray, mood: str) -> np.ndarray:
+    """Rows of a snapshot's `moods` column tagged with `mood` (a MOODS key)."""
+    return (np.asarray(moods) & (1 << list(MOODS).index(mood))) != 0
+
+
+def artist_tags(table: pa.Table) -> TagMatrix:
+    """Sparse video × ARTISTS matrix from one Aho-Corasick pass over the titles."""
+    matcher = KeywordMatcher({artist: [artist] for artist in ARTISTS})
+    return TagMatrix.build(matcher, table.column("title").to_pylist())
+
+
+def dashboard_rollup(table: pa.Table) -> RollupCube:
+    """Channel × month × mood × view-bucket cube behind the Analytics charts."""
+    frame = table.select(["channel_name", "pub_month", "moods"] + COUNT_COLUMNS).to_pandas()
+    frame["view_bucket"] = view_buckets(frame["view_count"])
+    return RollupCube.build(frame, ["channel_name", "pub_month", "moods", "view_bucket"], COUNT_COLUMNS)
+
+
+def _fingerprint_record(sources: List[list]) -> dict:
+    return {"version": SNAPSHOT_VERSION, "artists": ARTISTS, "moods": MOODS, "sources": sources}
+
+
+def _write_json(record: dict, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(record, f)
+
+
+def build_snapshot(directory: str = "scraped_data", snapshot_dir: str = ".data_snapshot", on_error=None) -> pa.Table:
+    """Compile the scraped JSON into an Arrow IPC file, the artist tags, the dashboard rollup
+    and the fingerprint it was built from."""
+    sources = []
+    table = videos_to_table(read_scraped_videos(directory, on_error, fingerprint=sources))
+    os.makedirs(snapshot_dir, exist_ok=True)
+    artist_tags(table).save(snapshot_dir)
+    dashboard_rollup(table).save(snapshot_dir)
+    replace_with(os.path.join(snapshot_dir, SNAPSHOT_FILE), lambda path: write_ipc_file(table, path))
+    replace_with(os.path.join(snapshot_dir, FINGERPRINT_FILE), lambda path: _write_json(_fingerprint_record(sources), path))
+    return table
+
+
+def snapshot_is_current(directory: str = "scraped_data", snapshot_dir: str = ".data_snapshot") -> bool:
+    """True when the snapshot on disk was built from the current source files."""
+    fingerprint_path = os.path.join(snapshot_dir, FINGERPRINT_FILE)
+    if not os.path.exists(os.path.join(snapshot_dir, SNAPSHOT_FILE)) or not os.path.exists(fingerprint_path):
+        return False
+    try:
+        with open(fingerprint_path, 'r', encoding='utf-8') as f:
+            return json.load(f) == _fingerprint_record(source_fingerprint(directory))
+    except (OSError, ValueError):
+        return False
+
+
+def read_snapshot(snapshot_dir: str = ".data_snapshot") -> pa.Table:
+    """Open the snapshot through a memory map; column buffers stay in the page cache."""
+    source = pa.memory_map(os.path.join(snapshot_dir, SNAPSHOT_FILE), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_video_frame(directory: str = "scraped_data", snapshot_dir: str = ".data_snapshot", on_error=None) -> pd.DataFrame:
+    """Typed video DataFrame, rebuilding the snapshot only when the source files changed.
+
+    Text columns use the Arrow-backed string dtype so they are not copied out of the map.
+    """
+    if snapshot_is_current(directory, snapshot_dir):
+        table = read_snapshot(snapshot_dir)
+    else:
+        table = build_snapshot(directory, snapshot_dir, on_error)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+def load_artist_tags(snapshot_dir: str = ".data_snapshot", num_rows: Optional[int] = None) -> TagMatrix:
+    """The artist matrix written next to the snapshot by load_video_frame / build_snapshot.
+
+    With `num_rows` (the frame's length), a matrix from another rebuild of the
+    snapshot is refused rather than misaligned with the frame.
+    """
+    # Read into memory: a rebuild replaces these files
+    tags = TagMatrix.load(snapshot_dir, mmap=False)
+    if tags is None or tags.labels != ARTISTS or (num_rows is not None and len(tags) != num_rows):
+        raise FileNotFoundError(f"No current artist tags in {snapshot_dir}; call load_video_frame first")
+    return tags
+
+
+def load_rollup(snapshot_dir: str = ".data_snapshot") -> RollupCube:
+    """The dashboard rollup written next to the snapshot by load_video_frame / build_snapshot."""
+    cube = RollupCube.load(snapshot_dir)
+    if cube is None:
+        raise FileNotFoundError(f"No rollup in {snapshot_dir}; call load_video_frame first")
+    return cube
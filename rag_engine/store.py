@@ -0,0 +1,239 @@
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import zlib
+from dataclasses import astuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from rag_engine.ann import IndexConfig, apply_search_params, filtered_search_params, load_index_config
+from rag_engine.bm25 import BM25Index, reciprocal_rank_fusion
+from rag_engine.layout import DOCS_FILE, DOCS_META_FILE, KNOWLEDGE_BASE_FILES, LEGACY_FILES, OFFSETS_FILE
+from rag_engine.metadata import MetadataFilter, MetadataIndex
+from rag_engine.query_cache import QueryCache, normalize_query
+
+COMPRESSIONS = ("none", "zlib")
+
+
+def mmap_flags(config: Optional[IndexConfig]) -> int:
+    """faiss.read_index flags that map the bulk of `config`'s index instead of reading it."""
+    # IO_FLAG_MMAP maps IVF inverted lists; flat codes (flat, HNSW storage) need MMAP_IFC.
+    # The two cannot be combined for IVF, so pick per kind.
+    kind = config.kind if config else "flat"
+    if kind.startswith("ivf"):
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def encode_record(record: Dict, compression: str = "zlib") -> bytes:
+    blob = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(blob) if compression == "zlib" else blob
+
+
+def decode_record(blob: bytes, compression: str = "zlib") -> Dict:
+    return json.loads(zlib.decompress(blob) if compression == "zlib" else blob)
+
+
+def write_docstore(path: str, records: Iterable[Dict], compression: str = "zlib"):
+    """Write records (FAISS row order) as one blob file plus an int64 offset table."""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported docstore compression: {compression}")
+    offsets = [0]
+    with open(os.path.join(path, DOCS_FILE), 'wb') as f:
+        for record in records:
+            blob = encode_record(record, compression)
+            f.write(blob)
+            offsets.append(offsets[-1] + len(blob))
+    np.save(os.path.join(path, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+    with open(os.path.join(path, DOCS_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"compression": compression, "count": len(offsets) - 1}, f)
+
+
+class DocStore:
+    """Read-only document store keyed by FAISS row id.
+
+    Records live in one memory-mapped file, so several worker processes share a
+    page-cache copy and only the rows a query returns are decoded.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, DOCS_META_FILE), 'r', encoding='utf-8') as f:
+            self.compression = json.load(f)["compression"]
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode='r')
+        with open(os.path.join(path, DOCS_FILE), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def record(self, row: int) -> Dict:
+        return decode_record(self._data[self.offsets[row]:self.offsets[row + 1]], self.compression)
+
+    def get(self, row: int) -> Document:
+        record = self.record(int(row))
+        return Document(id=record["id"], page_content=record["page_content"], metadata=record.get("metadata", {}))
+
+    def records(self) -> Iterator[Dict]:
+        for row in range(len(self)):
+            yield self.record(row)
+
+
+def save_knowledge_base(path: str, index: faiss.Index, records: List[Dict], compression: str = "zlib",
+                        lexical: Optional[BM25Index] = None, metadata: Optional[MetadataIndex] = None):
+    """Persist `index`, its row-aligned `records` and their BM25 and metadata side indexes.
+
+    Side indexes are built from `records` when not given. Files are written to a
+    staging directory and renamed into place, so processes that have the
+    previous index.faiss / docs.bin mapped keep a valid copy.
+    """
+    os.makedirs(path, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=path)
+    try:
+        faiss.write_index(index, os.path.join(staging, "index.faiss"))
+        write_docstore(staging, records, compression)
+        (lexical if lexical is not None else BM25Index.build(records)).save(staging)
+        (metadata if metadata is not None else MetadataIndex.build(records)).save(staging)
+        for name in KNOWLEDGE_BASE_FILES:
+            os.replace(os.path.join(staging, name), os.path.join(path, name))
+        for name in LEGACY_FILES:
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+class KnowledgeBase:
+    """FAISS index plus row-keyed DocStore, BM25 and metadata indexes, opened for querying.
+
+    With mmap=True (the default) neither the index nor the documents are read
+    into RAM up front. Knowledge bases saved before a side index existed search
+    without it (dense only / unfiltered).
+    """
+
+    def __init__(self, path: str, embeddings, mmap: bool = True):
+        self.path = path
+        self.embeddings = embeddings
+        self.config = load_index_config(path)
+        index_file = os.path.join(path, "index.faiss")
+        self.index = faiss.read_index(index_file, mmap_flags(self.config)) if mmap else faiss.read_index(index_file)
+        apply_search_params(self.index, self.config)
+        self.docstore = DocStore(path)
+        self.lexical = BM25Index.load(path, mmap=mmap)
+        self.metadata = MetadataIndex.load(path, mmap=mmap)
+        # Every save replaces index.faiss, so its inode + mtime identify this build
+        stat = os.stat(index_file)
+        self.version = (os.path.abspath(path), stat.st_ino, stat.st_mtime_ns)
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def filter_mask(self, filters: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        """Rows allowed by `filters`, or None when nothing is filtered."""
+        if filters is None or filters.is_empty() or self.metadata is None:
+            return None
+        return self.metadata.mask(filters)
+
+    def _dense_search(self, vectors: np.ndarray, k: int, mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        if mask is None:
+            return self.index.search(vectors, k)
+        # FAISS skips masked-out rows itself instead of over-fetching and discarding
+        return self.index.search(vectors, k, params=filtered_search_params(self.config, mask))
+
+    def _dense_rows(self, vector, k: int, mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        distances, rows = self._dense_search(np.asarray([vector], dtype=np.float32), k, mask)
+        return distances[0], rows[0]
+
+    def search_by_vector(self, vector, k: int = 12, mask: Optional[np.ndarray] = None) -> List[Tuple[Document, float]]:
+        """Top-k (document, L2 distance) pairs for an already embedded query."""
+        distances, rows = self._dense_rows(vector, k, mask)
+        return [(self.docstore.get(row), float(dist)) for dist, row in zip(distances, rows) if row != -1]
+
+    def hybrid_rows(self, vector, keywords: str, k: int = 12, fetch_k: int = 50, mask: Optional[np.ndarray] = None) -> List[int]:
+        """Rows ranked by reciprocal-rank fusion of dense and BM25 candidates."""
+        _, dense = self._dense_rows(vector, max(k, fetch_k), mask)
+        return self._fuse(dense, keywords, k, fetch_k, mask)
+
+    def _fuse(self, dense: np.ndarray, keywords: str, k: int, fetch_k: int, mask: Optional[np.ndarray]) -> List[int]:
+        dense_rows = [int(row) for row in dense if row != -1]
+        lexical_rows = [row for row, _ in self.lexical.search(keywords, max(k, fetch_k), mask=mask)]
+        return reciprocal_rank_fusion([dense_rows, lexical_rows])[:k]
+
+    def vectors(self, rows: List[int]) -> Optional[np.ndarray]:
+        """Stored embeddings of `rows`, or None when the index cannot reconstruct them (IVF)."""
+        if not rows:
+            return None
+        try:
+            return self.index.reconstruct_batch(np.asarray(rows, dtype=np.int64))
+        except RuntimeError:
+            return None
+
+    def retrieve(self, query: str, k: int = 12, keywords: Optional[str] = None, hybrid: bool = True,
+                 filters: Optional[MetadataFilter] = None, cache: Optional[QueryCache] = None) -> Tuple[np.ndarray, List[int]]:
+        """Query vector and top-k rows for `query`, restricted to rows matching `filters`.
+
+        `keywords` is what BM25 sees (defaults to `query`), so callers can keep
+        prompt decoration such as the mood out of exact-name matching. With a
+        QueryCache, repeated queries skip both embedding and search.
+        """
+        key = (normalize_query(query), normalize_query(keywords), k, hybrid,
+               astuple(filters) if filters is not None else None)
+        if cache is not None:
+            cached = cache.get(key, self.version)
+            if cached is not None:
+                return cached
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        mask = self.filter_mask(filters)
+        if mask is not None and not mask.any():
+            rows = []
+        elif not hybrid or self.lexical is None:
+            _, dense = self._dense_rows(vector, k, mask)
+            rows = [int(row) for row in dense if row != -1]
+        else:
+            rows = self.hybrid_rows(vector, keywords or query, k, mask=mask)
+        if cache is not None:
+            cache.put(key, (vector, rows), self.version)
+        return vector, rows
+
+    def embed_queries(self, queries: Sequence[str]) -> np.ndarray:
+        """Query vectors for `queries` from one embedding batch, one row per query."""
+        return np.asarray(self.embeddings.embed_documents(list(queries)), dtype=np.float32).reshape(len(queries), -1)
+
+    def retrieve_batch(self, queries: Sequence[str], k: int = 12, keywords: Optional[Sequence[str]] = None,
+                       hybrid: bool = True, filters: Optional[Sequence[Optional[MetadataFilter]]] = None,
+                       fetch_k: int = 50, vectors: Optional[np.ndarray] = None) -> Tuple[np.ndarray, List[List[int]]]:
+        """retrieve() for many queries at once: one embedding batch and one FAISS search per distinct filter.
+
+        Returns the query vectors (one row per query; pass `vectors` to skip
+        embedding) and each query's top-k rows, identical to what retrieve()
+        returns for it alone.
+        """
+        keywords = keywords if keywords is not None else queries
+        filters = filters if filters is not None else [None] * len(queries)
+        if vectors is None:
+            vectors = self.embed_queries(queries)
+        groups: Dict[object, List[int]] = {}
+        for i, f in enumerate(filters):
+            groups.setdefault(astuple(f) if f is not None and not f.is_empty() else None, []).append(i)
+
+        rows: List[List[int]] = [[] for _ in queries]
+        fuse = hybrid and self.lexical is not None
+        for members in groups.values():
+            mask = self.filter_mask(filters[members[0]])
+            if mask is not None and not mask.any():
+                continue
+            _, dense = self._dense_search(vectors[members], max(k, fetch_k) if fuse else k, mask)
+            for i, found in zip(members, dense):
+                rows[i] = self._fuse(found, keywords[i], k, fetch_k, mask) if fuse else [int(row) for row in found if row != -1]
+        return vectors, rows
+
+    def search(self, query: str, k: int = 12, keywords: Optional[str] = None, hybrid: bool = True,
+               filters: Optional[MetadataFilter] = None, cache: Optional[QueryCache] = None) -> List[Document]:
+        """Top-k documents for `query`; see retrieve()."""
+        _, rows = self.retrieve(query, k, keywords, hybrid, filters, cache)
+        return [self.docstore.get(row) for row in rows]
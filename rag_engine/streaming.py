@@ -0,0 +1,43 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+
+@dataclass
+class CompletionTiming:
+    """Wall-clock timings of one streamed chat completion, in milliseconds."""
+    started: float = field(default_factory=time.perf_counter)
+    first_token_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    chunks: int = 0
+
+    def summary(self) -> str:
+        if self.first_token_ms is None:
+            return "⏱️ no tokens received"
+        return f"⏱️ first token {self.first_token_ms:.0f} ms · total {self.total_ms / 1000:.2f} s"
+
+
+def stream_completion(client, messages: List[Dict[str, str]], model: str, timing: Optional[CompletionTiming] = None,
+                      **kwargs) -> Iterator[str]:
+    """Yield the text deltas of a streamed chat completion as they arrive.
+
+    Works with any OpenAI-compatible client (Groq included). `timing` is filled
+    in while the generator is consumed: time to first token when the first
+    non-empty delta arrives, total time when the stream ends or is closed.
+    """
+    timing = timing if timing is not None else CompletionTiming()
+    timing.started = time.perf_counter()
+    stream = client.chat.completions.create(messages=messages, model=model, stream=True, **kwargs)
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if timing.first_token_ms is None:
+                timing.first_token_ms = (time.perf_counter() - timing.started) * 1000
+            timing.chunks += 1
+            yield delta
+    finally:
+        timing.total_ms = (time.perf_counter() - timing.started) * 1000
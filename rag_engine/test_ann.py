@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from rag_engine.ann import IndexConfig, build_index, evaluate_configs, filtered_search_params
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).random((2000, 32), dtype=np.float32)
+
+
+@pytest.mark.parametrize("config", [
+    IndexConfig("flat"),
+    IndexConfig("flat", sq8=True),
+    IndexConfig("hnsw", hnsw_m=16),
+    IndexConfig("ivf_flat", nlist=16, nprobe=16),
+    IndexConfig("ivf_pq", nlist=16, nprobe=16, pq_m=8),
+])
+def test_build_index_finds_itself(vectors, config):
+    index = build_index(vectors, config)
+    assert index.ntotal == len(vectors)
+    _, ids = index.search(vectors[:5], 5)
+    assert (ids[:, :5] == np.arange(5)[:, None]).any(axis=1).all()
+
+
+def test_unknown_kind_rejected():
+    with pytest.raises(ValueError):
+        IndexConfig("annoy")
+
+
+def test_same_structure_ignores_search_knobs():
+    assert IndexConfig("hnsw", ef_search=16).same_structure(IndexConfig("hnsw", ef_search=256))
+    assert not IndexConfig("hnsw").same_structure(IndexConfig("hnsw", hnsw_m=8))
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("RAG_INDEX_KIND", "ivf_pq")
+    monkeypatch.setenv("RAG_INDEX_NPROBE", "4")
+    monkeypatch.setenv("RAG_INDEX_SQ8", "true")
+    assert IndexConfig.from_env() == IndexConfig("ivf_pq", nprobe=4, sq8=True)
+
+
+def test_evaluate_configs_reports_recall(vectors):
+    report = evaluate_configs(vectors, [IndexConfig("flat"), IndexConfig("ivf_flat", nlist=16, nprobe=1)], k=10, n_queries=50)
+    assert report[0]["recall@10"] == 1.0
+    assert 0 < report[1]["recall@10"] <= 1.0
+    assert report[1]["index_bytes"] > 0
+
+
+@pytest.mark.parametrize("config", [
+    IndexConfig("flat"),
+    IndexConfig("hnsw", hnsw_m=16),
+    IndexConfig("ivf_flat", nlist=16, nprobe=16),
+])
+def test_filtered_search_params(vectors, config):
+    index = build_index(vectors, config)
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[1::7] = True
+    _, ids = index.search(vectors[:3], 5, params=filtered_search_params(config, mask))
+    assert mask[ids[ids != -1]].all()
+    # Row 1 is allowed and searches for itself
+    assert ids[1][0] == 1
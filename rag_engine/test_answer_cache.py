@@ -0,0 +1,40 @@
+import numpy as np
+
+from rag_engine import answer_cache
+from rag_engine.answer_cache import AnswerCache
+
+
+def test_similar_question_hits():
+    cache = AnswerCache(threshold=0.9)
+    cache.put([1.0, 0.0, 0.0], ["a", "b"], "Kesariya", version=1)
+    assert cache.lookup([0.95, 0.1, 0.0], ["a", "b"], version=1) == "Kesariya"
+    assert cache.lookup([0.0, 1.0, 0.0], ["a", "b"], version=1) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_different_documents_miss():
+    cache = AnswerCache(threshold=0.9, min_doc_overlap=0.5)
+    cache.put([1.0, 0.0], ["a", "b", "c", "d"], "answer", version=1)
+    assert cache.lookup([1.0, 0.0], ["a", "b", "c"], version=1) == "answer"
+    assert cache.lookup([1.0, 0.0], ["a", "x", "y", "z"], version=1) is None
+
+
+def test_new_index_version_clears():
+    cache = AnswerCache()
+    cache.put([1.0, 0.0], ["a"], "old", version=1)
+    assert cache.lookup([1.0, 0.0], ["a"], version=2) is None
+    assert len(cache) == 0
+
+
+def test_eviction_and_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(max_entries=2, ttl=60)
+    for i, vector in enumerate(np.eye(3)):
+        cache.put(vector, [], f"answer {i}", version=1)
+    assert len(cache) == 2
+    assert cache.lookup(np.eye(3)[0], [], version=1) is None
+    assert cache.lookup(np.eye(3)[2], [], version=1) == "answer 2"
+    now[0] = 61
+    assert cache.lookup(np.eye(3)[2], [], version=1) is None
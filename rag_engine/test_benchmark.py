@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.benchmark import (compare, generate_queries, load_queries, main, query_set_id, ranking_metrics,
+                                  run_benchmark, synthetic_videos)
+
+
+def make_videos(n=40):
+    singers = ["Arijit Singh", "Shreya Ghoshal", "Sonu Nigam", "Neha Kakkar", "Jubin Nautiyal", "Sunidhi Chauhan"]
+    return [{"video_id": f"v{i}", "title": f"Song{i} Title{i} Full Video | T-Series",
+             "description": f"Singer: {singers[i % len(singers)]}\nMovie: Film{i}", "channel_title": "T-Series",
+             "view_count": 1000 * (i + 1), "published_at": "2026-01-01T00:00:00Z"} for i in range(n)]
+
+
+def test_ranking_metrics():
+    metrics = ranking_metrics([["a", "b", "c"], ["x", "y", "z"], ["d", "e", "f"]], [["b"], ["z", "q"], ["nope"]], ks=(1, 3))
+    assert metrics == {"recall@1": 0.0, "recall@3": round((1 + 0.5 + 0) / 3, 4), "mrr": round((1 / 2 + 1 / 3) / 3, 4)}
+
+
+def test_synthetic_and_generated_sets():
+    videos = make_videos(40)
+    scaled = synthetic_videos(videos, 3)
+    assert len(scaled) == 120 and len({v["video_id"] for v in scaled}) == 120
+    assert scaled[:40] == videos
+
+    queries = generate_queries(videos, n=20)
+    assert queries == generate_queries(videos, n=20)
+    assert len(queries) == 20 and {q["kind"] for q in queries} == {"title", "singer"}
+    singer = next(q for q in queries if q["kind"] == "singer")
+    assert 2 <= len(singer["relevant"]) <= 10 and singer["query"].startswith("songs sung by ")
+
+
+def test_load_queries(tmp_path):
+    path = tmp_path / "q.jsonl"
+    path.write_text('{"query": "Kesariya", "relevant": ["v1"]}\n\n', encoding='utf-8')
+    assert load_queries(str(path)) == [{"query": "Kesariya", "relevant": ["v1"], "kind": "labelled"}]
+    path.write_text('{"query": "Kesariya"}\n', encoding='utf-8')
+    with pytest.raises(ValueError, match="q.jsonl:1"):
+        load_queries(str(path))
+
+
+def test_run_benchmark_and_compare(tmp_path):
+    videos = make_videos(40)
+    queries = generate_queries(videos, n=20)
+    embeddings = DeterministicFakeEmbedding(size=16)
+    result = run_benchmark(synthetic_videos(videos, 2), queries, embeddings, str(tmp_path / "hybrid"))
+    dense = run_benchmark(synthetic_videos(videos, 2), queries, embeddings, str(tmp_path / "dense"), hybrid=False)
+
+    assert result["corpus"] == {"videos": 80, "documents": 80}
+    assert result["query_set"] == query_set_id(queries)
+    assert set(result["quality"]) == {"recall@1", "recall@5", "recall@10", "mrr"}
+    # Fake embeddings rank at random, so only the BM25 half of the fusion finds anything
+    assert result["quality"]["mrr"] > dense["quality"]["mrr"] and result["quality"]["recall@10"] > 0.5
+    assert set(result["latency_ms"]["total"]) == {"p50", "p95", "p99", "mean"}
+    assert result["build_seconds"] > 0 and result["index_bytes"] > 0 and result["peak_rss_mb"] > 0
+
+    assert not any(row["regressed"] for row in compare(result, result))
+    worse = json.loads(json.dumps(result))
+    worse["quality"]["mrr"] -= 0.1
+    worse["latency_ms"]["total"]["p95"] *= 2
+    rows = {row["metric"]: row for row in compare(worse, result)}
+    assert rows["quality.mrr"]["regressed"] and rows["latency_ms.total.p95"]["regressed"]
+    assert not rows["quality.recall@1"]["regressed"] and not rows["index_bytes"]["regressed"]
+    assert not any(row["regressed"] for row in compare(result, worse))
+
+
+def test_main_needs_data(tmp_path, capsys):
+    assert main(["--data", str(tmp_path)]) == 2
+    assert "No videos" in capsys.readouterr().err
@@ -0,0 +1,74 @@
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.bm25 import BM25Index, field_text, reciprocal_rank_fusion
+from rag_engine.incremental import update_faiss_index
+from rag_engine.store import KnowledgeBase
+
+
+def doc(title, singers="N/A", movie="Unknown", channel="T-Series", description=""):
+    return f"TITLE: {title}\nSINGERS: {singers}\nMOVIE: {movie}\nTAGS: General\nCHANNEL: {channel}\nYEAR: 2024\nDESCRIPTION: {description}\n\n"
+
+
+def records(*texts):
+    return [{"id": str(i), "page_content": text} for i, text in enumerate(texts)]
+
+
+def test_field_text_skips_placeholders_and_description():
+    text = field_text(doc("Kesariya", singers="Arijit Singh", description="Satya 2"))
+    assert text == "Kesariya Arijit Singh T-Series"
+
+
+def test_exact_names_rank_first():
+    index = BM25Index.build(records(
+        doc("Tum Hi Ho", singers="Arijit Singh"),
+        doc("Satya 2 Title Track", movie="Satya 2"),
+        doc("Kala Chashma", singers="Badshah"),
+    ))
+    assert index.search("arijit singh songs")[0][0] == 0
+    assert index.search("Satya 2")[0][0] == 1
+    assert index.search("nothing matches") == []
+
+
+def test_incremental_matches_full_build():
+    texts = [doc(f"Song {i}", singers="Singer " + "ABC"[i % 3]) for i in range(10)]
+    index = BM25Index.build(records(*texts))
+    index.remove_rows([2, 5])
+    index.add(records(doc("Song 42", singers="Singer Z")))
+
+    kept = [t for i, t in enumerate(texts) if i not in (2, 5)] + [doc("Song 42", singers="Singer Z")]
+    full = BM25Index.build(records(*kept))
+    for query in ("singer a", "song 42", "singer z song 7"):
+        assert index.search(query) == full.search(query)
+
+
+def test_postings_budget_keeps_rarest_terms():
+    index = BM25Index.build(records(*[doc(f"Song {i}") for i in range(100)]), max_postings=10)
+    # "song" has 100 postings and is skipped; "42" still ranks its row first
+    assert index.search("song 42") == [(42, index.search("42")[0][1])]
+    assert index.search("song") == []
+
+
+def test_reciprocal_rank_fusion():
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]])[:2] == [1, 3]
+
+
+def test_hybrid_search_finds_exact_names(tmp_path):
+    path = str(tmp_path)
+    embeddings = DeterministicFakeEmbedding(size=16)
+    docs = {f"vid{i}": doc(f"Song {i}", singers="Shreya Ghoshal") for i in range(50)}
+    docs["satya"] = doc("Satya 2 Title Track", movie="Satya 2")
+    update_faiss_index(docs, embeddings, path=path)
+
+    kb = KnowledgeBase(path, embeddings)
+    # Fake embeddings rank at random; BM25 alone must pull the exact name in
+    assert "satya" in [d.id for d in kb.search("Satya 2 songs mood", k=2, keywords="Satya 2")]
+
+    # Incremental updates keep BM25 rows aligned with the vector index
+    del docs["vid0"]
+    docs["arijit"] = doc("Kesariya", singers="Arijit Singh")
+    update_faiss_index(docs, embeddings, path=path)
+    kb = KnowledgeBase(path, embeddings)
+    assert len(kb.lexical) == len(kb) == 51
+    assert "arijit" in [d.id for d in kb.search("arijit", k=2)]
+    assert np.all(np.diff(kb.lexical.offsets) >= 0)
@@ -0,0 +1,138 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import rag_engine.builder as builder_module
+from rag_engine.builder import (CURRENT_FILE, KEEP_VERSIONS, VERSIONS_DIR, BuildLock, build_index_version,
+                                check_rebuild_needed, current_index_path)
+from rag_engine.documents import build_documents
+from rag_engine.incremental import update_faiss_index
+from rag_engine.store import DocStore, KnowledgeBase
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+def write_dump(path, ids):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"videos": [{"video_id": i, "title": f"Song {i}", "view_count": 1} for i in ids]}, f)
+
+
+def indexed_ids(path):
+    return sorted(record["id"] for record in DocStore(path).records())
+
+
+def test_builds_versions_and_swaps_current(tmp_path, embeddings):
+    root, data = str(tmp_path / "index"), tmp_path / "data"
+    data.mkdir()
+    # Nothing to build from: the app must not start builders
+    assert check_rebuild_needed(root, str(data))[:2] == (False, "No data")
+    write_dump(data / "a.json", ["1", "2"])
+    assert current_index_path(root) is None
+    assert check_rebuild_needed(root, str(data))[:2] == (True, "Index missing")
+
+    first = build_index_version(root, embeddings, str(data))
+    assert first["mode"] == "full"
+    live = current_index_path(root)
+    assert live == os.path.join(root, VERSIONS_DIR, first["version"])
+    assert indexed_ids(live) == ["1", "2"]
+    assert build_index_version(root, embeddings, str(data))["mode"] == "noop"
+    # Touched, not changed: checking leaves the live manifest alone, a noop build refreshes it
+    stat = os.stat(data / "a.json")
+    os.utime(data / "a.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert check_rebuild_needed(root, str(data))[2].stale_manifest
+    assert check_rebuild_needed(root, str(data))[2].stale_manifest
+    assert build_index_version(root, embeddings, str(data))["mode"] == "noop"
+    assert not check_rebuild_needed(root, str(data))[2].stale_manifest
+    assert current_index_path(root) == live
+
+    # A reader of the first version is unaffected by the next build
+    reader = KnowledgeBase(live, embeddings)
+    write_dump(data / "b.json", ["3"])
+    second = build_index_version(root, embeddings, str(data))
+    assert second["mode"] == "incremental" and second["added"] == 1
+    assert indexed_ids(current_index_path(root)) == ["1", "2", "3"]
+    assert indexed_ids(live) == ["1", "2"]
+    assert reader.docstore.get(1).id == "2"
+    assert not check_rebuild_needed(root, str(data))[0]
+
+    write_dump(data / "c.json", ["4"])
+    build_index_version(root, embeddings, str(data))
+    assert len(os.listdir(os.path.join(root, VERSIONS_DIR))) == KEEP_VERSIONS
+    assert not os.path.exists(live)
+
+
+def test_busy_while_locked(tmp_path, embeddings):
+    root, data = str(tmp_path / "index"), tmp_path / "data"
+    data.mkdir()
+    write_dump(data / "a.json", ["1"])
+    with BuildLock(root) as lock:
+        assert lock.acquire()
+        assert BuildLock(root).is_held()
+        assert build_index_version(root, embeddings, str(data)) == {"mode": "busy"}
+    assert not BuildLock(root).is_held()
+    assert build_index_version(root, embeddings, str(data))["mode"] == "full"
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_lock_probe_does_not_take_the_lock(tmp_path, monkeypatch):
+    root = str(tmp_path / "index")
+    lock = BuildLock(root)
+    assert lock.acquire()
+    assert BuildLock(root).holder() == os.getpid()
+    lock.release()
+    if builder_module.fcntl is not None:
+        monkeypatch.setattr(builder_module.fcntl, "flock", lambda *args: pytest.fail("is_held took the lock"))
+    assert not BuildLock(root).is_held()
+    # A holder that died without releasing
+    with open(os.path.join(root, ".build.lock"), 'w', encoding='utf-8') as f:
+        f.write(str(dead_pid()))
+    assert not BuildLock(root).is_held()
+
+
+def test_lock_file_fallback_reclaims_stale_locks(tmp_path, monkeypatch):
+    monkeypatch.setattr(builder_module, "fcntl", None)
+    root = str(tmp_path / "index")
+    first = BuildLock(root)
+    assert first.acquire()
+    assert BuildLock(root).is_held() and not BuildLock(root).acquire()
+    first.release()
+    assert not os.path.exists(first.path)
+
+    os.makedirs(root, exist_ok=True)
+    with open(first.path, 'w', encoding='utf-8') as f:
+        f.write(str(dead_pid()))
+    assert not BuildLock(root).is_held()
+    with BuildLock(root) as second:
+        assert second.acquire() and second.holder() == os.getpid()
+    assert os.listdir(root) == []
+
+
+def test_migrates_unversioned_index(tmp_path, embeddings):
+    root, data = str(tmp_path / "index"), tmp_path / "data"
+    data.mkdir()
+    write_dump(data / "a.json", ["1", "2"])
+    # A knowledge base saved straight into the root, as before versioning
+    videos = [{"video_id": i, "title": f"Song {i}", "view_count": 1} for i in ("1", "2")]
+    update_faiss_index(build_documents(videos), embeddings, path=root)
+    assert current_index_path(root) == root
+    # Someone else's files in a shared root
+    (tmp_path / "index" / "notes.txt").write_text("keep me")
+    (tmp_path / "index" / "exports").mkdir()
+
+    stats = build_index_version(root, embeddings, str(data), full=True)
+    assert stats["mode"] == "full"
+    assert sorted(os.listdir(root)) == [".build.lock", CURRENT_FILE, "exports", "notes.txt", VERSIONS_DIR]
+    assert indexed_ids(current_index_path(root)) == ["1", "2"]
+    assert "notes.txt" not in os.listdir(current_index_path(root))
@@ -0,0 +1,77 @@
+import numpy as np
+
+from rag_engine.context import (build_context, collapse_duplicates, estimate_tokens, minhash_signature,
+                                minhash_similarity, mmr_order, song_key)
+
+
+def doc(title, movie="Unknown", description="A song."):
+    return f"TITLE: {title}\nSINGERS: N/A\nMOVIE: {movie}\nTAGS: General\nCHANNEL: T-Series\nYEAR: 2025\nDESCRIPTION: {description}\n\n"
+
+
+def test_song_key_ignores_version_markers():
+    assert song_key(doc("Sahiba 8K Full Video Song")) == song_key(doc("Sahiba (Lyrical Visualizer) : Aditya Rikhari")) == "sahiba"
+    assert song_key(doc("Kesariya 8K/4K Music Video")) == song_key(doc("Kesariya - Brahmastra Acoustic")) == "kesariya"
+    assert song_key(doc("Kesariya - Official Audio", movie="Brahmastra")) == "kesariya|brahmastra"
+    assert song_key(doc("Kesariya", movie="Other Film")) != song_key(doc("Kesariya", movie="Brahmastra"))
+
+
+def test_song_key_without_a_song_name_is_the_video():
+    generic = doc("Official Video (Lyrical) | T-Series", movie="Brahmastra")
+    assert song_key(generic, "v1") == "v1"
+    assert song_key(generic) == ""
+    assert song_key(doc("Kesariya", movie="Brahmastra"), "v1") == "kesariya|brahmastra"
+    # Two different songs with generic titles are not collapsed into one
+    other = doc("Full Video Song #trending", movie="Brahmastra", description="Another song.")
+    assert collapse_duplicates([generic, other], ids=["v1", "v2"]) == [0, 1]
+    same_title = doc("Official Video (Lyrical) | T-Series", movie="Brahmastra").replace("SINGERS: N/A", "SINGERS: Arijit Singh")
+    assert collapse_duplicates([generic, same_title], ids=["v1", "v2"]) == [0, 1]
+    assert collapse_duplicates([generic, generic], ids=["v1", "v1"]) == [0]
+
+
+def test_minhash_estimates_jaccard():
+    a = minhash_signature("Tere Hawaale 8K Video Song")
+    assert minhash_similarity(a, minhash_signature("Tere Hawaale 8K Video Song")) == 1.0
+    assert minhash_similarity(a, minhash_signature("Tere Hawaale Video Song 8K")) > 0.5
+    assert minhash_similarity(a, minhash_signature("Kala Chashma")) < 0.2
+
+
+def test_collapse_duplicates_keeps_first_version():
+    texts = [doc("Sahiba (Lyrical)"), doc("Kala Chashma"), doc("Sahiba 8K Full Video Song"), doc("Sahiba Audio")]
+    assert collapse_duplicates(texts) == [0, 1]
+
+
+def test_mmr_prefers_diverse_documents():
+    vectors = np.array([[1.0, 0.0], [0.99, 0.05], [0.7, 0.7]], dtype=np.float32)
+    assert mmr_order([0, 1, 2], vectors, ["a", "b", "c"], mmr_lambda=0.3) == [0, 2, 1]
+    # Without vectors, near-identical texts are pushed back the same way
+    texts = [doc("Kesariya"), doc("Kesariya"), doc("Kala Chashma")]
+    assert mmr_order([0, 1, 2], None, texts, mmr_lambda=0.3) == [0, 2, 1]
+
+
+SONGS = ["Kesariya", "Tum Hi Ho", "Kala Chashma", "Apna Bana Le", "Raataan Lambiyan", "Chaleya",
+         "Heeriye", "Satranga", "Tere Vaaste", "Jhoome Jo Pathaan", "Malang Sajna", "Pehle Bhi Main"]
+
+
+def test_build_context_fits_budget():
+    texts = [doc(title, description="word " * 400) for title in SONGS] + [doc("Kesariya (Lyrical)")]
+    context, stats = build_context(texts, token_budget=600)
+
+    assert estimate_tokens(context) <= 600
+    assert stats.docs_in == 13
+    assert stats.duplicates == 1
+    assert stats.docs_out == 12
+    assert stats.tokens_saved > 1000
+    assert context.count("TITLE:") == 12
+    assert "…" in context
+
+
+def test_build_context_drops_docs_that_cannot_fit():
+    context, stats = build_context([doc(title) for title in SONGS], token_budget=100)
+    assert 0 < stats.docs_out < len(SONGS)
+    assert estimate_tokens(context) <= 100
+
+
+def test_build_context_empty():
+    context, stats = build_context([])
+    assert context == ""
+    assert (stats.docs_out, stats.tokens_saved) == (0, 0)
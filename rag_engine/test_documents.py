@@ -0,0 +1,29 @@
+from rag_engine.documents import extract_metadata, build_document, build_documents
+
+
+def test_extract_metadata():
+    meta = extract_metadata("Singers: Arijit Singh, Shreya Ghoshal & Sonu Nigam\nMovie: Satya 2 | Official", "Dard Bhara Party Song")
+    assert meta["singers"] == ["Arijit Singh", "Shreya Ghoshal", "Sonu Nigam"]
+    assert meta["movie"] == "Satya 2"
+    assert meta["tags"] == ["Emotional/Sad", "Party/Dance"]
+
+
+def test_build_document():
+    video_id, text = build_document({"video_id": "abc", "title": "Song | T-Series", "description": "Movie: Jawan",
+                                     "published_at": "2026-02-01T00:00:00Z", "view_count": 1000, "like_count": 10, "comment_count": 5})
+    assert video_id == "abc"
+    assert text.startswith("TITLE: Song\nSINGERS: N/A\nMOVIE: Jawan\nTAGS: General\nCHANNEL: T-Series\nYEAR: 2026\nVIEWS: 1000\nVIRAL SCORE: 35.0")
+
+
+def test_build_document_without_id_is_keyed_by_content():
+    video_id, _ = build_document({"title": "Untitled"})
+    assert video_id.startswith("noid-")
+
+
+def test_build_documents_parallel_matches_serial():
+    videos = [{"video_id": str(i), "title": f"Song {i}", "description": "Singer: Badshah"} for i in range(50)]
+    progress = []
+    parallel = build_documents(videos, workers=2, chunk_size=7, progress=lambda done, total: progress.append(done))
+    assert parallel == build_documents(videos, workers=1)
+    assert list(parallel) == [str(i) for i in range(50)]
+    assert progress[-1] == 50
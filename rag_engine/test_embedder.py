@@ -0,0 +1,28 @@
+import numpy as np
+
+from rag_engine.embedder import EmbeddingEngine
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size, convert_to_numpy, show_progress_bar):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count(" ")] for t in texts], dtype=np.float32)
+
+
+def test_embed_sorts_by_length_and_restores_order():
+    model = FakeModel()
+    engine = EmbeddingEngine(model=model, batch_size=2)
+    vectors = engine.embed(["ccc", "a", "bb\nb"])
+
+    assert model.calls == [["a", "ccc", "bb b"]]
+    assert vectors.tolist() == [[3, 0], [1, 0], [4, 1]]
+    assert vectors.dtype == np.float32
+
+
+def test_langchain_interface():
+    engine = EmbeddingEngine(model=FakeModel())
+    assert engine.embed_documents(["ab"]) == [[2.0, 0.0]]
+    assert engine.embed_query("a b") == [3.0, 1.0]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from rag_engine.embedding_cache import EmbeddingCache
+
+
+class CountingEmbed:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += len(texts)
+        return [[float(len(t)), float(i), 1.0] for i, t in enumerate(texts)]
+
+
+@pytest.fixture
+def embed_fn():
+    return CountingEmbed()
+
+
+def test_hits_and_misses(tmp_path, embed_fn):
+    cache = EmbeddingCache(str(tmp_path), model_name="m")
+    first = cache.get_or_embed(["aa", "bbb"], ["v1", "v2"], embed_fn)
+    second = cache.get_or_embed(["bbb", "aa", "c"], ["v2", "v1", "v3"], embed_fn)
+
+    assert embed_fn.calls == 3
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 3
+    np.testing.assert_array_equal(second[0], first[1])
+    np.testing.assert_array_equal(second[1], first[0])
+
+
+def test_persists_across_instances(tmp_path, embed_fn):
+    EmbeddingCache(str(tmp_path), model_name="m").get_or_embed(["aa"], ["v1"], embed_fn)
+    reopened = EmbeddingCache(str(tmp_path), model_name="m")
+    vectors = reopened.get_or_embed(["aa"], ["v1"], embed_fn)
+    assert embed_fn.calls == 1
+    assert vectors.dtype == np.float32
+    assert vectors.tolist() == [[2.0, 0.0, 1.0]]
+
+
+def test_keys_include_model_name(tmp_path):
+    assert EmbeddingCache(str(tmp_path), model_name="a").key("x") != EmbeddingCache(str(tmp_path), model_name="b").key("x")
+
+
+def test_evict_compacts(tmp_path, embed_fn):
+    cache = EmbeddingCache(str(tmp_path), model_name="m", dtype="float16")
+    cache.get_or_embed(["aa", "bbb", "cccc"], ["v1", "v2", "v3"], embed_fn)
+    assert cache.evict(["v1", "v3"]) == 1
+    assert cache.stats()["entries"] == 2
+
+    reopened = EmbeddingCache(str(tmp_path), model_name="m", dtype="float16")
+    vectors = reopened.get_or_embed(["cccc", "aa"], ["v3", "v1"], embed_fn)
+    assert embed_fn.calls == 3
+    assert vectors.tolist() == [[4.0, 2.0, 1.0], [2.0, 0.0, 1.0]]
+
+
+def test_evict_drops_old_renderings(tmp_path, embed_fn):
+    cache = EmbeddingCache(str(tmp_path), model_name="m")
+    cache.get_or_embed(["v1 views 10", "v2 views 20"], ["v1", "v2"], embed_fn)
+    # Next scrape: v1's view count changed, v2 was not rebuilt (partial build)
+    cache.get_or_embed(["v1 views 11"], ["v1"], embed_fn)
+    assert cache.stats()["entries"] == 3
+
+    assert cache.evict(["v1", "v2"], current_texts={"v1": "v1 views 11"}) == 1
+    assert set(cache.entries) == {cache.key("v1 views 11"), cache.key("v2 views 20")}
+    assert cache.get_or_embed(["v1 views 11", "v2 views 20"], ["v1", "v2"], embed_fn).tolist() == [[11.0, 0.0, 1.0], [11.0, 1.0, 1.0]]
+    assert embed_fn.calls == 3
@@ -0,0 +1,98 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.answer_cache import AnswerCache
+from rag_engine.builder import build_index_version
+from rag_engine.engine import CACHED_NOTE, IndexNotReady, RAGEngine
+from rag_engine.query_cache import QueryCache
+
+
+class FakeClient:
+    def __init__(self, reply="Kesariya is a hit"):
+        self.calls = []
+        self.reply = reply
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return iter(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+                    for word in self.reply.split())
+
+
+def write_dump(path, titles):
+    videos = [{"video_id": f"v{i}", "title": title, "channel_title": "T-Series", "view_count": 1000 * (i + 1),
+               "published_at": "2026-01-0%dT00:00:00Z" % (i + 1)} for i, title in enumerate(titles)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"videos": videos}, f)
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+@pytest.fixture
+def engine(tmp_path, embeddings):
+    return RAGEngine(str(tmp_path / "index"), embeddings, FakeClient(), "llama", query_cache=QueryCache(), answer_cache=AnswerCache())
+
+
+@pytest.fixture
+def publish(tmp_path, embeddings):
+    def build(titles):
+        data = tmp_path / "data"
+        data.mkdir(exist_ok=True)
+        write_dump(data / "a.json", titles)
+        return build_index_version(str(tmp_path / "index"), embeddings, str(data))
+    return build
+
+
+def test_no_index_yet(engine):
+    assert engine.version is None
+    with pytest.raises(IndexNotReady):
+        engine.search("Kesariya")
+
+
+def test_ask_streams_then_answers_from_cache(engine, publish):
+    publish(["Kesariya", "Tum Hi Ho", "Apna Bana Le"])
+    answer = engine.ask("Tell me about Kesariya", mood="Romantic")
+    assert not answer.cached and answer.text == ""
+    assert "".join(answer.tokens).strip() == "Kesariya is a hit"
+    assert answer.text.strip() == "Kesariya is a hit"
+    assert "context" in answer.note
+    prompt = engine.client.calls[0]["messages"][-1]["content"]
+    assert "Kesariya" in prompt and prompt.endswith("Question: Tell me about Kesariya")
+
+    again = engine.ask("Tell me about Kesariya", mood="Romantic")
+    assert again.cached and again.note == CACHED_NOTE
+    assert "".join(again.tokens) == answer.text
+    assert len(engine.client.calls) == 1
+    assert (engine.stats()["answer_cache"]["hits"], engine.stats()["answer_cache"]["misses"]) == (1, 1)
+    assert not engine.ask("Tell me about Kesariya", mood="Romantic", use_cache=False).cached
+
+
+def test_picks_up_new_versions(engine, publish):
+    publish(["Kesariya"])
+    first = engine.version
+    assert [doc.page_content for doc in engine.search("Kesariya").docs][0].startswith("TITLE: Kesariya")
+    publish(["Kesariya", "Chaleya"])
+    assert engine.version != first
+    assert len(engine.search("Chaleya", k=5).docs) == 2
+    assert engine.stats()["version"] == engine.version
+
+
+def test_search_batch_matches_search(engine, publish):
+    publish(["Kesariya", "Tum Hi Ho", "Apna Bana Le", "Chaleya"])
+    questions = ["Kesariya", "Chaleya songs from 1990", "Tum Hi Ho"]
+    timing = {}
+    batch = engine.search_batch(questions, moods=[None, None, "Sad"], k=3, timing=timing)
+    assert set(timing) == {"embed_ms", "search_ms"}
+    for question, mood, retrieval in zip(questions, [None, None, "Sad"], batch):
+        assert retrieval.doc_ids == engine.search(question, mood=mood, k=3).doc_ids
+    assert batch[1].doc_ids  # the 1990 filter matched nothing and was dropped
+
+    answer = engine.answer(questions[0], batch[0], use_cache=False)
+    assert "".join(answer.tokens).strip() == "Kesariya is a hit"
+    assert answer.timing.first_token_ms is not None and answer.context_stats is not None
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.builder import build_index_version
+from rag_engine.importtime import DEFAULT_APPS, HEAVY_MODULES, app_imports, parse_importtime, profile_imports
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# What rag.py runs on every rerun before a tab renders
+STARTUP = """
+import json, sys
+from index_builder import build_status, last_build_failure
+from rag_engine.builder import check_rebuild_needed, current_index_path
+from rag_engine.engine import RAGEngine
+from rag_engine.importtime import HEAVY_MODULES
+root, data = sys.argv[1:]
+assert current_index_path(root) is not None
+check_rebuild_needed(root, data)
+build_status(root), last_build_failure(root)
+RAGEngine(root, None, None, "llama").version
+print(json.dumps(sorted(set(sys.modules) & set(HEAVY_MODULES))))
+"""
+
+
+def test_app_imports_skip_deferred_imports(tmp_path):
+    script = tmp_path / "app.py"
+    script.write_text("import os, json\nfrom pandas import DataFrame\nfrom . import x\n\n"
+                      "def load():\n    import torch\n\nimport os\n")
+    assert app_imports(str(script)) == ["os", "json", "pandas"]
+
+
+def test_parse_importtime():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   numpy.core\n"
+              "import time:       300 |        420 | numpy\n")
+    rows = parse_importtime(stderr)
+    assert [(r["module"], r["depth"], r["cumulative_us"]) for r in rows] == [("numpy.core", 1, 120), ("numpy", 0, 420)]
+
+
+def test_profile_reports_missing_modules():
+    profile = profile_imports(["json", "no_such_module_xyz"])
+    assert profile["missing"] == ["no_such_module_xyz"]
+    assert profile["heavy_loaded"] == []
+
+
+@pytest.mark.parametrize("app", DEFAULT_APPS)
+def test_apps_start_without_heavy_modules(app):
+    # torch / faiss / langchain load on first use or in the warm-up thread, never at import
+    profile = profile_imports(app_imports(os.path.join(REPO_ROOT, app)), cwd=REPO_ROOT)
+    assert not set(profile["heavy_loaded"]) & set(HEAVY_MODULES)
+
+
+def test_startup_path_does_not_load_heavy_modules(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.json").write_text(json.dumps({"videos": [{"video_id": "1", "title": "Kesariya", "view_count": 1}]}))
+    build_index_version(str(tmp_path / "index"), DeterministicFakeEmbedding(size=8), str(data))
+    result = subprocess.run([sys.executable, "-c", STARTUP, str(tmp_path / "index"), str(data)], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == []
@@ -0,0 +1,147 @@
+import os
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.incremental import update_faiss_index, diff_documents, load_doc_map, document_hash
+from rag_engine.store import KnowledgeBase
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbedding(size=16)
+
+
+def test_diff_documents():
+    doc_map = {"a": document_hash("A"), "b": document_hash("B"), "c": document_hash("C")}
+    added, changed, removed = diff_documents({"a": "A", "b": "B2", "d": "D"}, doc_map)
+    assert added == ["d"]
+    assert changed == ["b"]
+    assert removed == ["c"]
+
+
+def test_first_build_is_full(tmp_path, embeddings):
+    stats = update_faiss_index({"a": "A", "b": "B"}, embeddings, path=str(tmp_path))
+    assert stats["mode"] == "full"
+    assert embeddings.embedded == 2
+    assert set(load_doc_map(str(tmp_path))) == {"a", "b"}
+
+
+def test_update_embeds_only_delta(tmp_path, embeddings):
+    path = str(tmp_path)
+    update_faiss_index({"a": "A", "b": "B", "c": "C"}, embeddings, path=path)
+    embeddings.embedded = 0
+
+    stats = update_faiss_index({"a": "A", "b": "B changed", "d": "D"}, embeddings, path=path)
+
+    assert stats == {"mode": "incremental", "added": 1, "changed": 1, "removed": 1, "refreshed": 0}
+    assert embeddings.embedded == 2
+    kb = KnowledgeBase(path, embeddings)
+    assert [record["id"] for record in kb.docstore.records()] == ["a", "d", "b"]
+    assert kb.docstore.get(2).page_content == "B changed"
+    assert len(kb) == 3
+    # Rows stay aligned with the docstore after removal
+    assert kb.search("B changed", k=1)[0].id == "b"
+
+
+def test_partial_update_keeps_unlisted_docs(tmp_path, embeddings):
+    path = str(tmp_path)
+    update_faiss_index({"a": "A", "b": "B", "c": "C"}, embeddings, path=path)
+    embeddings.embedded = 0
+    stats = update_faiss_index({"b": "B changed", "d": "D"}, embeddings, path=path, removed=["c", "unknown"])
+
+    assert stats == {"mode": "incremental", "added": 1, "changed": 1, "removed": 1, "refreshed": 0}
+    assert embeddings.embedded == 2
+    assert set(load_doc_map(path)) == {"a", "b", "d"}
+    assert len(KnowledgeBase(path, embeddings)) == 3
+
+
+def test_new_view_counts_are_not_re_embedded(tmp_path, embeddings):
+    from rag_engine.ann import IndexConfig
+    from rag_engine.documents import build_documents
+    from rag_engine.metadata import MetadataFilter
+    path = str(tmp_path)
+    # HNSW cannot remove rows, so a "changed" document would force a full build
+    config = IndexConfig("hnsw", hnsw_m=8)
+    videos = [{"video_id": v, "title": f"Song {v}", "view_count": 1000} for v in ("a", "b", "c")]
+    update_faiss_index(build_documents(videos, workers=1), embeddings, path=path, config=config)
+    embeddings.embedded = 0
+
+    videos[1]["view_count"] = 5_000_000
+    stats = update_faiss_index(build_documents(videos, workers=1), embeddings, path=path, config=config)
+    assert stats == {"mode": "incremental", "added": 0, "changed": 0, "removed": 0, "refreshed": 1}
+    assert embeddings.embedded == 0
+    kb = KnowledgeBase(path, embeddings)
+    assert "VIEWS: 5000000" in kb.docstore.get(1).page_content
+    assert kb.filter_mask(MetadataFilter(min_views=1_000_000)).tolist() == [False, True, False]
+    assert update_faiss_index(build_documents(videos, workers=1), embeddings, path=path, config=config)["mode"] == "noop"
+
+
+def test_partial_update_falls_back_to_docstore_for_full_builds(tmp_path, embeddings):
+    from rag_engine.ann import IndexConfig
+    path = str(tmp_path)
+    config = IndexConfig("hnsw", hnsw_m=8)
+    update_faiss_index({"a": "A", "b": "B", "c": "C"}, embeddings, path=path, config=config)
+    stats = update_faiss_index({"d": "D"}, embeddings, path=path, config=config, removed=["b"])
+
+    assert stats["mode"] == "full"
+    kb = KnowledgeBase(path, embeddings)
+    assert sorted(record["id"] for record in kb.docstore.records()) == ["a", "c", "d"]
+    with pytest.raises(ValueError):
+        update_faiss_index({"a": "A"}, embeddings, path=str(tmp_path / "empty"), removed=[])
+
+
+def test_unchanged_docs_are_noop(tmp_path, embeddings):
+    path = str(tmp_path)
+    update_faiss_index({"a": "A"}, embeddings, path=path)
+    embeddings.embedded = 0
+    before = os.stat(os.path.join(path, "index.faiss"))
+    assert update_faiss_index({"a": "A"}, embeddings, path=path)["mode"] == "noop"
+    assert embeddings.embedded == 0
+    # Published versions share this inode; a noop must not touch it
+    assert os.stat(os.path.join(path, "index.faiss")).st_mtime_ns == before.st_mtime_ns
+
+
+def test_full_rebuild_reuses_cached_vectors(tmp_path, embeddings):
+    from rag_engine.embedding_cache import EmbeddingCache
+    cache = EmbeddingCache(str(tmp_path / "cache"), model_name="fake")
+    index_path = str(tmp_path / "index")
+    update_faiss_index({"a": "A", "b": "B"}, embeddings, path=index_path, cache=cache)
+
+    embeddings.embedded = 0
+    update_faiss_index({"a": "A", "b": "B"}, embeddings, path=str(tmp_path / "fresh"), cache=cache)
+    assert embeddings.embedded == 0
+    assert cache.stats()["hits"] == 2
+
+
+def test_non_flat_index_rebuilds_on_removal(tmp_path, embeddings):
+    from rag_engine.ann import IndexConfig
+    path = str(tmp_path)
+    config = IndexConfig("hnsw", hnsw_m=8)
+    update_faiss_index({"a": "A", "b": "B", "c": "C"}, embeddings, path=path, config=config)
+    assert update_faiss_index({"a": "A", "b": "B", "c": "C", "d": "D"}, embeddings, path=path, config=config)["mode"] == "incremental"
+
+    stats = update_faiss_index({"a": "A", "d": "D"}, embeddings, path=path, config=config)
+    assert stats["mode"] == "full"
+    kb = KnowledgeBase(path, embeddings)
+    assert len(kb) == 2
+    assert kb.search("D", k=1)[0].page_content == "D"
+
+
+def test_ivf_index_trains_on_streamed_chunks(tmp_path, embeddings, monkeypatch):
+    from rag_engine import incremental
+    from rag_engine.ann import IndexConfig
+    monkeypatch.setattr(incremental, "EMBED_CHUNK_SIZE", 50)
+    docs = {str(i): f"doc {i}" for i in range(200)}
+    update_faiss_index(docs, embeddings, path=str(tmp_path), config=IndexConfig("ivf_flat", nlist=4, nprobe=4, train_size=120))
+    kb = KnowledgeBase(str(tmp_path), embeddings)
+    assert len(kb) == 200
+    assert kb.search("doc 7", k=1)[0].page_content == "doc 7"
@@ -0,0 +1,70 @@
+import sys
+import threading
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.lazy import LazyResource, lazy_import
+from rag_engine.lazy_embeddings import LazyEmbeddings
+
+
+def test_created_once_on_first_use():
+    calls = []
+    resource = LazyResource(lambda: calls.append(1) or len(calls))
+    assert not resource.ready and calls == []
+    assert resource.get() == 1
+    assert resource.get() == 1
+    assert resource.ready and resource.load_seconds is not None
+
+
+def test_get_waits_for_warm_up():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "model"
+
+    resource = LazyResource(factory).warm()
+    assert started.wait(5)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(resource.get()))
+    reader.start()
+    release.set()
+    reader.join(5)
+    assert result == ["model"]
+    assert calls == [1]
+
+
+def test_failed_warm_up_is_retried():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("offline")
+        return "model"
+
+    resource = LazyResource(factory).warm()
+    resource._thread.join(5)
+    assert not resource.ready
+    assert resource.get() == "model"
+    assert len(attempts) == 2
+
+
+def test_lazy_embeddings_delegate():
+    model = DeterministicFakeEmbedding(size=8)
+    resource = LazyResource(lambda: model)
+    embeddings = LazyEmbeddings(resource)
+    assert not resource.ready
+    assert embeddings.embed_query("Kesariya") == model.embed_query("Kesariya")
+    assert embeddings.embed_documents(["a", "b"]) == model.embed_documents(["a", "b"])
+
+
+def test_lazy_import_defers_the_module(monkeypatch):
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    to_hls = lazy_import("colorsys", "rgb_to_hls")
+    assert to_hls.__name__ == "rgb_to_hls" and "colorsys" not in sys.modules
+    assert to_hls(1.0, 0.0, 0.0) == (0.0, 0.5, 1.0)
+    assert "colorsys" in sys.modules
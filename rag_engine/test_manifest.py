@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+
+import rag_engine.manifest as manifest_module
+from rag_engine.manifest import check_sources, load_manifest, save_manifest, scan_sources
+
+
+def write_dump(path, videos):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"videos": videos}, f)
+
+
+def video(video_id, views=1):
+    return {"video_id": video_id, "title": f"Song {video_id}", "view_count": views}
+
+
+def indexed(data_dir, index_dir):
+    save_manifest(str(index_dir), scan_sources(str(data_dir)))
+
+
+def test_no_manifest_means_full_build(tmp_path):
+    write_dump(tmp_path / "a.json", [video("1")])
+    changes = check_sources(str(tmp_path), str(tmp_path / "missing"))
+    assert not changes.has_baseline
+    assert changes.has_changes
+    assert changes.added_videos == ["1"]
+
+
+def test_touched_and_copied_files_are_not_changes(tmp_path, monkeypatch):
+    data_dir, index_dir = tmp_path / "data", tmp_path / "index"
+    data_dir.mkdir()
+    index_dir.mkdir()
+    write_dump(data_dir / "a.json", [video("1"), video("2")])
+    indexed(data_dir, index_dir)
+
+    stat = os.stat(data_dir / "a.json")
+    os.utime(data_dir / "a.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    shutil.copy(data_dir / "a.json", tmp_path / "copy.json")
+    shutil.move(tmp_path / "copy.json", data_dir / "a.json")
+    changes = check_sources(str(data_dir), str(index_dir))
+    assert changes.has_baseline and not changes.has_changes
+    assert changes.touched_files == ["a.json"] and changes.stale_manifest
+    assert changes.summary() == "Up to date"
+    # Read-only: refreshing the stored manifest is the builder's job
+    assert load_manifest(str(index_dir)) != changes.manifest
+
+    # With the refreshed stat saved, the next check does not hash at all
+    save_manifest(str(index_dir), changes.manifest)
+    hashed = []
+    monkeypatch.setattr(manifest_module, "file_hash", lambda path: hashed.append(path))
+    assert not check_sources(str(data_dir), str(index_dir)).has_changes
+    assert hashed == []
+
+
+def test_reports_exact_file_and_video_changes(tmp_path):
+    data_dir, index_dir = tmp_path / "data", tmp_path / "index"
+    data_dir.mkdir()
+    index_dir.mkdir()
+    write_dump(data_dir / "a.json", [video("1"), video("2")])
+    write_dump(data_dir / "b.json", [video("3")])
+    write_dump(data_dir / "c.json", [video("4")])
+    indexed(data_dir, index_dir)
+
+    write_dump(data_dir / "a.json", [video("1"), video("2", views=99), video("5")])
+    os.remove(data_dir / "c.json")
+    write_dump(data_dir / "d.json", [video("6"), video("3")])
+    changes = check_sources(str(data_dir), str(index_dir))
+
+    assert (changes.added_files, changes.changed_files, changes.removed_files) == (["d.json"], ["a.json"], ["c.json"])
+    assert sorted(changes.added_videos) == ["5", "6"]
+    assert changes.changed_videos == ["2"]
+    assert changes.removed_videos == ["4"]
+    assert changes.summary() == "New data detected: 3 file(s) changed (+2 ~1 -1 videos)"
+    # Nothing is saved until the index has caught up
+    assert set(load_manifest(str(index_dir))) == {"a.json", "b.json", "c.json"}
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+from rag_engine.matcher import KeywordMatcher, TagMatrix
+
+
+def test_finds_overlapping_keywords():
+    matcher = KeywordMatcher({"he": ["he"], "she": ["she"], "his": ["his"], "hers": ["hers"]})
+    assert matcher.find("uSHErs") == [0, 1, 3]
+    assert matcher.find("ahis") == [2]
+    assert matcher.find("") == []
+
+
+def test_labels_with_several_keywords():
+    matcher = KeywordMatcher({"Party/Dance": ["party", "dance"], "Rap/Hip-Hop": ["rap", "hip-hop"]})
+    assert matcher.find("Desi HIP-HOP party anthem") == [0, 1]
+    assert matcher.find("Dance Dance") == [0]
+
+
+def test_whole_words():
+    matcher = KeywordMatcher({"Badshah": ["badshah"], "Rap": ["rap"]}, whole_words=True)
+    assert matcher.find("Badshah - Rap God") == [0, 1]
+    assert matcher.find("Badshahs of Rapture") == []
+
+
+def test_matches_substring_search():
+    rng = np.random.default_rng(0)
+    names = ["arijit singh", "neha kakkar", "badshah", "sonu nigam", "rit", "sin"]
+    matcher = KeywordMatcher({name: [name] for name in names})
+    alphabet = list("arijt sngheakbdsouim")
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet, size=60))
+        assert matcher.find(text) == [i for i, name in enumerate(names) if name in text]
+
+
+def test_tag_matrix_totals(tmp_path):
+    matcher = KeywordMatcher({"Arijit Singh": ["arijit singh"], "Badshah": ["badshah"], "Sonu Nigam": ["sonu nigam"]})
+    tags = TagMatrix.build(matcher, ["Kesariya | Arijit Singh", "Badshah x Arijit Singh", "Kala Chashma", "Badshah"])
+    assert tags.indptr.tolist() == [0, 1, 3, 3, 4]
+
+    counts, views = tags.totals(weights=np.array([10, 20, 30, 40]))
+    assert counts.tolist() == [2, 2, 0]
+    assert views.tolist() == [30, 60, 0]
+    counts, views = tags.totals(mask=np.array([False, True, True, True]), weights=np.array([10, 20, 30, 40]))
+    assert counts.tolist() == [1, 2, 0]
+    assert views.tolist() == [20, 60, 0]
+
+    tags.save(str(tmp_path))
+    loaded = TagMatrix.load(str(tmp_path))
+    assert loaded.labels == tags.labels
+    assert loaded.indices.tolist() == tags.indices.tolist()
+    assert sorted(os.listdir(tmp_path)) == ["artists.indices.npy", "artists.indptr.npy", "artists.json"]
+    assert TagMatrix.load(str(tmp_path / "missing")) is None
+
+    # Arrays from two different saves (a reader between a rebuild's renames) are refused
+    (tmp_path / "other").mkdir()
+    TagMatrix(tags.labels, np.array([0, 1], dtype=np.int64), np.array([0], dtype=np.int32)).save(str(tmp_path / "other"))
+    os.replace(tmp_path / "other" / "artists.indptr.npy", tmp_path / "artists.indptr.npy")
+    assert TagMatrix.load(str(tmp_path)) is None
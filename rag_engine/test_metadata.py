@@ -0,0 +1,88 @@
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.incremental import update_faiss_index
+from rag_engine.metadata import MetadataFilter, MetadataIndex, document_fields
+from rag_engine.store import KnowledgeBase
+
+
+def doc(title, channel="T-Series", year="2025", views=0, tags="General", description=""):
+    return (f"TITLE: {title}\nSINGERS: N/A\nMOVIE: Unknown\nTAGS: {tags}\nCHANNEL: {channel}\n"
+            f"YEAR: {year}\nVIEWS: {views}\nVIRAL SCORE: 1.0\nDESCRIPTION: {description}\n\n")
+
+
+def records(*texts):
+    return [{"id": str(i), "page_content": text} for i, text in enumerate(texts)]
+
+
+def test_document_fields_stop_at_description():
+    fields = document_fields(doc("Kesariya", description="YEAR: 1999\nCHANNEL: Fake"))
+    assert fields["YEAR"] == "2025"
+    assert fields["CHANNEL"] == "T-Series"
+    assert "DESCRIPTION" not in fields
+
+
+def test_mask():
+    index = MetadataIndex.build(records(
+        doc("a", year="2026", views=5_000_000, tags="Party/Dance"),
+        doc("b", channel="Zee Music Company", year="2026", views=50_000),
+        doc("c", year="Unknown", views=200_000, tags="Rap/Hip-Hop, Party/Dance"),
+    ))
+    assert index.mask(MetadataFilter(year=2026)).tolist() == [True, True, False]
+    assert index.mask(MetadataFilter(channel="T-Series", min_views=100_000)).tolist() == [True, False, True]
+    assert index.mask(MetadataFilter(tags=("Party/Dance",))).tolist() == [True, False, True]
+    assert not index.mask(MetadataFilter(channel="YRF")).any()
+
+
+def test_parse_filters():
+    index = MetadataIndex.build(records(doc("a"), doc("b", channel="Zee Music Company"), doc("c", channel="Tips Music"),
+                                        doc("d", channel="Tips Official")))
+    assert index.parse_filters("top T-Series songs of 2026") == MetadataFilter(year=2026, channel="T-Series")
+    assert index.parse_filters("best of tseries").channel == "T-Series"
+    assert index.parse_filters("zee music hits").channel == "Zee Music Company"
+    assert index.parse_filters("new from tips music").channel == "Tips Music"
+    assert index.parse_filters("sad songs 2025 vs 2026", min_views=100_000) == MetadataFilter(min_views=100_000)
+
+
+def test_remove_rows_keeps_alignment():
+    index = MetadataIndex.build(records(*[doc(str(i), year=str(2000 + i)) for i in range(5)]))
+    index.remove_rows([1, 3])
+    index.add(records(doc("x", year="2030")))
+    assert index.year.tolist() == [2000, 2002, 2004, 2030]
+
+
+def test_filtered_search(tmp_path):
+    path = str(tmp_path)
+    embeddings = DeterministicFakeEmbedding(size=16)
+    docs = {f"vid{i}": doc(f"Song {i}", year="2026" if i % 10 == 0 else "2025", views=i * 100_000) for i in range(100)}
+    update_faiss_index(docs, embeddings, path=path)
+
+    kb = KnowledgeBase(path, embeddings)
+    hits = kb.search("Song", k=12, filters=MetadataFilter(year=2026, min_views=3_000_000))
+    assert sorted(d.id for d in hits) == ["vid30", "vid40", "vid50", "vid60", "vid70", "vid80", "vid90"]
+    assert kb.search("Song", filters=MetadataFilter(year=1990)) == []
+
+    # Incremental updates carry the side index along
+    docs["new"] = doc("New", year="2031")
+    update_faiss_index(docs, embeddings, path=path)
+    kb = KnowledgeBase(path, embeddings)
+    assert [d.id for d in kb.search("Song", filters=MetadataFilter(year=2031))] == ["new"]
+    assert np.count_nonzero(kb.metadata.year == 2026) == 10
+
+
+def test_batch_retrieval_matches_single_queries(tmp_path):
+    path = str(tmp_path)
+    embeddings = DeterministicFakeEmbedding(size=16)
+    docs = {f"vid{i}": doc(f"Song {i}", year="2026" if i % 10 == 0 else "2025", views=i * 100_000) for i in range(100)}
+    update_faiss_index(docs, embeddings, path=path)
+
+    kb = KnowledgeBase(path, embeddings)
+    queries = ["Song 7", "Song 42", "Song 3", "Song 90", "Song 1"]
+    filters = [None, MetadataFilter(year=2026), MetadataFilter(min_views=5_000_000), MetadataFilter(year=2026), MetadataFilter(year=1990)]
+    vectors, rows = kb.retrieve_batch(queries, k=5, filters=filters)
+    assert vectors.shape == (5, 16)
+    for i, (query, f) in enumerate(zip(queries, filters)):
+        vector, expected = kb.retrieve(query, k=5, filters=f)
+        assert rows[i] == expected
+        np.testing.assert_allclose(vectors[i], vector)
+    assert rows[4] == []
@@ -0,0 +1,71 @@
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine import query_cache
+from rag_engine.incremental import update_faiss_index
+from rag_engine.metadata import MetadataFilter
+from rag_engine.query_cache import QueryCache, normalize_query
+from rag_engine.store import KnowledgeBase
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    queries: int = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+def test_normalize_query():
+    assert normalize_query("  Top  SAD songs? Romantic mood") == normalize_query("top sad songs romantic mood")
+    assert normalize_query("T-Series hits!") == "t series hits"
+    assert normalize_query(None) == ""
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", 1, version=1)
+    cache.put("b", 2, version=1)
+    assert cache.get("a", version=1) == 1
+    cache.put("c", 3, version=1)
+    assert cache.get("b", version=1) is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 2, "evictions": 1}
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = QueryCache(ttl=10)
+    cache.put("a", 1, version=1)
+    now[0] += 11
+    assert cache.get("a", version=1) is None
+    assert len(cache) == 0
+
+
+def test_version_change_clears():
+    cache = QueryCache()
+    cache.put("a", 1, version="v1")
+    assert cache.get("a", version="v2") is None
+    cache.put("b", 2, version="v2")
+    assert len(cache) == 1
+
+
+def test_knowledge_base_uses_cache(tmp_path):
+    path = str(tmp_path)
+    embeddings = CountingEmbedding(size=16)
+    update_faiss_index({f"vid{i}": f"TITLE: Song {i}" for i in range(20)}, embeddings, path=path)
+    kb = KnowledgeBase(path, embeddings)
+    cache = QueryCache()
+
+    first = kb.search("Song 3 sad mood", k=5, cache=cache)
+    again = kb.search("song 3  SAD mood?", k=5, cache=cache)
+    assert [d.id for d in again] == [d.id for d in first]
+    assert embeddings.queries == 1
+    # Different filters are a different entry
+    kb.search("Song 3 sad mood", k=5, cache=cache, filters=MetadataFilter(min_views=100_000))
+    assert embeddings.queries == 2
+    assert cache.stats()["hits"] == 1
+
+    # A rebuilt index has a new version, so nothing stale is served
+    update_faiss_index({"only": "TITLE: Only"}, embeddings, path=path)
+    kb = KnowledgeBase(path, embeddings)
+    assert [d.id for d in kb.search("Song 3 sad mood", k=5, cache=cache)] == ["only"]
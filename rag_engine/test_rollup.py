@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from rag_engine.rollup import MAX_VIEW_BUCKET, RollupCube, min_views_bucket, view_buckets
+
+
+def videos(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "channel_name": pd.Categorical(rng.choice(["T-Series", "Zee Music Company", "Tips Music"], n)),
+        "pub_month": pd.Categorical(rng.choice(["2025-11", "2025-12", "2026-01", None], n)),
+        "moods": rng.integers(0, 16, n).astype(np.uint8),
+        "view_count": rng.integers(0, 30_000_000, n),
+        "like_count": rng.integers(0, 10_000, n),
+    })
+
+
+def test_view_buckets():
+    assert view_buckets([0, 99_999, 100_000, 2_500_000, 10**9]).tolist() == [0, 0, 1, 25, MAX_VIEW_BUCKET]
+    assert (min_views_bucket(0), min_views_bucket(100_000), min_views_bucket(150_000), min_views_bucket(10**9)) == (0, 1, 2, MAX_VIEW_BUCKET)
+
+
+def test_cube_answers_match_scans():
+    frame = videos()
+    frame["view_bucket"] = view_buckets(frame["view_count"])
+    cube = RollupCube.build(frame, ["channel_name", "pub_month", "moods", "view_bucket"], ["view_count", "like_count"])
+    assert len(cube) < len(frame)
+    assert cube.total() == len(frame)
+
+    # Min Views slider values are multiples of the bucket size
+    for min_views in (0, 100_000, 5_000_000, 10_000_000):
+        for bit in (None, 0, 3):
+            rows = frame["view_count"] >= min_views
+            cells = cube.cells["view_bucket"] >= min_views_bucket(min_views)
+            if bit is not None:
+                rows &= (frame["moods"] & (1 << bit)) != 0
+                cells &= (cube.cells["moods"] & (1 << bit)) != 0
+            selected = cube.select(cells)
+            assert selected.total() == rows.sum()
+            assert selected.total("like_count") == frame.loc[rows, "like_count"].sum()
+            expected = frame[rows].groupby("channel_name", observed=True)["view_count"].sum()
+            pd.testing.assert_series_equal(selected.rollup("channel_name", "view_count"), expected)
+            expected = frame[rows].groupby("pub_month", observed=True).size()
+            assert selected.rollup("pub_month").to_dict() == expected.to_dict()
+
+
+def test_save_and_load(tmp_path):
+    frame = videos(50)
+    cube = RollupCube.build(frame, ["channel_name", "pub_month"], ["view_count"])
+    # Another app's save in flight: its temp file is not ours to write into
+    (tmp_path / "rollup.arrow.tmp").write_text("theirs")
+    cube.save(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["rollup.arrow", "rollup.arrow.tmp"]
+    assert (tmp_path / "rollup.arrow.tmp").read_text() == "theirs"
+    loaded = RollupCube.load(str(tmp_path))
+    assert (loaded.dimensions, loaded.measures) == (["channel_name", "pub_month"], ["view_count"])
+    pd.testing.assert_frame_equal(loaded.cells, cube.cells)
+    assert RollupCube.load(str(tmp_path / "missing")) is None
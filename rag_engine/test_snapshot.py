@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+import rag_engine.snapshot as snapshot_module
+from rag_engine.snapshot import build_snapshot, load_artist_tags, load_rollup, load_video_frame, mood_mask, snapshot_is_current
+
+
+def write_dump(directory, name, videos):
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+        json.dump({"videos": videos}, f)
+
+
+def test_snapshot_types(tmp_path):
+    data_dir, snap_dir = tmp_path / "data", tmp_path / "snap"
+    data_dir.mkdir()
+    write_dump(data_dir, "a.json", [
+        {"video_id": "1", "title": "Song | T-Series", "description": "x", "published_at": "2026-01-05T10:00:00Z",
+         "view_count": "1200", "like_count": 10, "comment_count": None, "channel_name": "T-Series"},
+        {"video_id": "2", "title": "Old Song", "description": "Zee Music presents", "view_count": 5},
+        {"video_id": "1", "title": "Duplicate"},
+    ])
+
+    df = load_video_frame(str(data_dir), str(snap_dir))
+
+    assert list(df["video_id"]) == ["1", "2"]
+    assert df["view_count"].dtype == "int64"
+    assert df["comment_count"].tolist() == [0, 0]
+    assert str(df["published_at"].dtype).startswith("datetime64")
+    assert df["channel_name"].dtype == "category"
+    assert df["channel_name"].tolist() == ["T-Series", "Zee Music Company"]
+    # Derived columns are precomputed for the dashboard
+    assert df["engagement_score"].tolist() == [8.33, 0.0]
+    assert df["pub_month"].astype(object).where(df["pub_month"].notna(), None).tolist() == ["2026-01", None]
+    assert df["year"].tolist() == [2026, 0]
+
+
+def test_snapshot_tags_moods_and_artists(tmp_path):
+    data_dir, snap_dir = tmp_path / "data", tmp_path / "snap"
+    data_dir.mkdir()
+    write_dump(data_dir, "a.json", [
+        {"video_id": "1", "title": "Kesariya | Arijit Singh", "description": "A sad love song", "view_count": 100},
+        {"video_id": "2", "title": "Party Anthem | Badshah", "description": "Hip-Hop", "view_count": 50},
+        {"video_id": "3", "title": "Tum Hi Ho - Arijit Singh", "description": "", "view_count": 10},
+    ])
+
+    df = load_video_frame(str(data_dir), str(snap_dir))
+    assert mood_mask(df["moods"], "Emotional/Sad").tolist() == [True, False, False]
+    assert mood_mask(df["moods"], "Rap/Hip-Hop").tolist() == [False, True, False]
+
+    tags = load_artist_tags(str(snap_dir), num_rows=len(df))
+    with pytest.raises(FileNotFoundError):
+        load_artist_tags(str(snap_dir), num_rows=len(df) + 1)
+    counts, views = tags.totals(df["view_count"].to_numpy() >= 20, df["view_count"].to_numpy())
+    assert counts[tags.labels.index("Arijit Singh")] == 1
+    assert views[tags.labels.index("Badshah")] == 50
+
+    rollup = load_rollup(str(snap_dir))
+    assert rollup.total() == 3
+    assert rollup.select(mood_mask(rollup.cells["moods"], "Emotional/Sad")).total("view_count") == 100
+
+
+def test_snapshot_rebuilt_only_when_sources_change(tmp_path):
+    data_dir, snap_dir = tmp_path / "data", tmp_path / "snap"
+    data_dir.mkdir()
+    write_dump(data_dir, "a.json", [{"video_id": "1", "title": "One"}])
+    assert not snapshot_is_current(str(data_dir), str(snap_dir))
+
+    build_snapshot(str(data_dir), str(snap_dir))
+    assert snapshot_is_current(str(data_dir), str(snap_dir))
+
+    write_dump(data_dir, "b.json", [{"video_id": "2", "title": "Two"}])
+    assert not snapshot_is_current(str(data_dir), str(snap_dir))
+    assert len(load_video_frame(str(data_dir), str(snap_dir))) == 2
+
+
+def test_snapshot_fingerprint_matches_what_was_read(tmp_path, monkeypatch):
+    data_dir, snap_dir = tmp_path / "data", tmp_path / "snap"
+    data_dir.mkdir()
+    write_dump(data_dir, "a.json", [{"video_id": "1", "title": "One"}])
+    # Another app's build left its temp file behind; this build must not touch it
+    snap_dir.mkdir()
+    (snap_dir / "videos.arrow.tmp").write_text("theirs")
+    real_read = snapshot_module.read_scraped_videos
+
+    def read_then_rewrite(directory, on_error=None, fingerprint=None):
+        videos = real_read(directory, on_error, fingerprint)
+        # The scraper rewrites the file right after it was read
+        write_dump(data_dir, "a.json", [{"video_id": "1", "title": "One"}, {"video_id": "2", "title": "Two"}])
+        return videos
+
+    monkeypatch.setattr(snapshot_module, "read_scraped_videos", read_then_rewrite)
+    assert len(build_snapshot(str(data_dir), str(snap_dir))) == 1
+    assert not snapshot_is_current(str(data_dir), str(snap_dir))
+    assert (snap_dir / "videos.arrow.tmp").read_text() == "theirs"
+    assert not [name for name in os.listdir(snap_dir) if name.endswith(".tmp") and name != "videos.arrow.tmp"]
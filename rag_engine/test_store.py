@@ -0,0 +1,66 @@
+import os
+
+import faiss
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from rag_engine.ann import IndexConfig
+from rag_engine.incremental import update_faiss_index
+from rag_engine.layout import has_knowledge_base
+from rag_engine.store import DocStore, KnowledgeBase, save_knowledge_base
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_docstore_roundtrip(tmp_path, compression):
+    index = faiss.IndexFlatL2(2)
+    index.add(np.zeros((2, 2), dtype=np.float32))
+    records = [{"id": "a", "page_content": "TITLE: Kesariya ✨"}, {"id": "b", "page_content": "TITLE: Apna Bana Le"}]
+    save_knowledge_base(str(tmp_path), index, records, compression=compression)
+
+    store = DocStore(str(tmp_path))
+    assert len(store) == 2
+    doc = store.get(1)
+    assert (doc.id, doc.page_content) == ("b", "TITLE: Apna Bana Le")
+    assert list(store.records()) == records
+
+
+@pytest.mark.parametrize("config", [IndexConfig("flat"), IndexConfig("hnsw", hnsw_m=8), IndexConfig("ivf_flat", nlist=2, nprobe=2)])
+def test_knowledge_base_search(tmp_path, embeddings, config):
+    path = str(tmp_path)
+    docs = {f"vid{i}": f"TITLE: Song {i} ✨" for i in range(100)}
+    update_faiss_index(docs, embeddings, path=path, config=config)
+    assert has_knowledge_base(path)
+    assert not os.path.exists(os.path.join(path, "index.pkl"))
+
+    hit = KnowledgeBase(path, embeddings).search("TITLE: Song 42 ✨", k=1)[0]
+    assert hit.page_content == "TITLE: Song 42 ✨"
+    assert hit.id == "vid42"
+
+
+def test_rebuild_keeps_open_readers_valid(tmp_path, embeddings):
+    path = str(tmp_path)
+    update_faiss_index({"a": "A", "b": "B"}, embeddings, path=path)
+    reader = KnowledgeBase(path, embeddings)
+
+    update_faiss_index({"a": "A", "c": "C", "d": "D"}, embeddings, path=path)
+
+    assert [r["id"] for r in reader.docstore.records()] == ["a", "b"]
+    assert reader.search("B", k=1)[0].id == "b"
+    assert len(KnowledgeBase(path, embeddings)) == 3
+    assert not [name for name in os.listdir(path) if name.startswith(".staging-")]
+
+
+def test_legacy_pickle_index_is_rebuilt(tmp_path, embeddings):
+    path = str(tmp_path)
+    update_faiss_index({"a": "A"}, embeddings, path=path)
+    os.remove(os.path.join(path, "docs.bin"))
+    open(os.path.join(path, "index.pkl"), "wb").close()
+
+    assert update_faiss_index({"a": "A"}, embeddings, path=path)["mode"] == "full"
+    assert not os.path.exists(os.path.join(path, "index.pkl"))
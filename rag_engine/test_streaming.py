@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from rag_engine.streaming import CompletionTiming, stream_completion
+
+
+def chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeClient:
+    def __init__(self, chunks):
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self._chunks = chunks
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return iter(self._chunks)
+
+
+def test_stream_completion_yields_deltas_and_times():
+    client = FakeClient([chunk(None), chunk("Kesa"), SimpleNamespace(choices=[]), chunk("riya"), chunk("")])
+    timing = CompletionTiming()
+
+    text = "".join(stream_completion(client, [{"role": "user", "content": "hi"}], "llama", timing, temperature=0))
+
+    assert text == "Kesariya"
+    assert client.calls[0]["stream"] is True
+    assert client.calls[0]["temperature"] == 0
+    assert timing.chunks == 2
+    assert 0 <= timing.first_token_ms <= timing.total_ms
+    assert timing.summary().startswith("⏱️ first token")
+
+
+def test_empty_stream_still_records_total():
+    timing = CompletionTiming()
+    assert list(stream_completion(FakeClient([]), [], "llama", timing)) == []
+    assert timing.first_token_ms is None
+    assert timing.total_ms is not None
+    assert timing.summary() == "⏱️ no tokens received"
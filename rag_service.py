@@ -0,0 +1,239 @@
+"""Async HTTP service for retrieval and question answering over the published knowledge base.
+
+Wraps rag_engine.engine.RAGEngine in an aiohttp app so other services (and the
+Streamlit UI, as a thin client) can search and ask without running the
+Streamlit script. Every worker process memory-maps the same index version, so
+the OS page cache holds one copy however many workers run, and they share the
+port through SO_REUSEPORT. New versions published by index_builder.py are
+picked up on the next request.
+
+    python index_builder.py --watch &
+    python rag_service.py --port 8600 --workers 4
+    RAG_SERVICE_URL=http://127.0.0.1:8600 streamlit run rag.py
+
+GET /health, GET /metrics, POST /search {"question", "mood", "min_views", "k"},
+POST /ask {"question", "mood", "min_views", "use_cache", "stream"} (SSE when stream is true).
+Query / answer caches and /metrics are per worker process.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from index_builder import EMBEDDING_MODEL, INDEX_ROOT
+from llm_gateway import LatencyHistogram, LLMError, get_gateway
+from rag_engine.answer_cache import AnswerCache
+from rag_engine.embedder import EmbeddingEngine
+from rag_engine.engine import IndexNotReady, RAGEngine
+from rag_engine.lazy import LazyResource
+from rag_engine.lazy_embeddings import LazyEmbeddings
+from rag_engine.query_cache import QueryCache
+
+load_dotenv()
+MODEL_NAME = os.getenv('RAG_MODEL', "llama-3.3-70b-versatile")
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '1024'))
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', '600'))
+ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92'))
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '512'))
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '3600'))
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+# Embedding, FAISS search and the sync LLM stream run here, off the event loop
+SERVICE_THREADS = int(os.getenv('RAG_SERVICE_THREADS', '8'))
+MAX_K = 50
+
+ENGINE_KEY = web.AppKey("engine", RAGEngine)
+METRICS_KEY = web.AppKey("metrics", dict)
+EXECUTOR_KEY = web.AppKey("executor", ThreadPoolExecutor)
+
+logger = logging.getLogger(__name__)
+_DONE = object()
+
+
+def load_query_embeddings() -> EmbeddingEngine:
+    embeddings = EmbeddingEngine(EMBEDDING_MODEL, batch_size=1)
+    embeddings.model  # load now, in the warm-up thread
+    return embeddings
+
+
+def create_engine(index_root: str = INDEX_ROOT) -> RAGEngine:
+    """The engine as the service configures it from the environment (same knobs as rag.py)."""
+    embeddings = LazyEmbeddings(LazyResource(load_query_embeddings, name="embedding model").warm())
+    client = get_gateway().client("groq", api_key=os.getenv('GROQ_API_KEY', ''))
+    return RAGEngine(index_root, embeddings, client, MODEL_NAME,
+                     query_cache=QueryCache(max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL),
+                     answer_cache=AnswerCache(threshold=ANSWER_CACHE_THRESHOLD, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL),
+                     context_token_budget=CONTEXT_TOKEN_BUDGET, timeout=LLM_TIMEOUT)
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({"error": message}, status=status)
+
+
+def _bad_request(message: str) -> web.HTTPBadRequest:
+    return web.HTTPBadRequest(text=json.dumps({"error": message}), content_type="application/json")
+
+
+async def _query(request: web.Request) -> Dict[str, object]:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise _bad_request("Body must be JSON")
+    question = str(body.get("question") or "").strip() if isinstance(body, dict) else ""
+    if not question:
+        raise _bad_request("question is required")
+    try:
+        min_views = int(body.get("min_views") or 0)
+        k = min(int(body["k"]), MAX_K) if body.get("k") else None
+    except (TypeError, ValueError):
+        raise _bad_request("min_views and k must be integers")
+    return {"question": question, "mood": body.get("mood") or None, "min_views": min_views, "k": k,
+            "use_cache": body.get("use_cache", True) is not False, "stream": bool(body.get("stream"))}
+
+
+def _run(request: web.Request, fn, *args):
+    return asyncio.get_running_loop().run_in_executor(request.app[EXECUTOR_KEY], fn, *args)
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    metrics = request.app[METRICS_KEY]
+    route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unmatched"
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        endpoint = metrics.setdefault(route, {"requests": 0, "errors": 0, "latency": LatencyHistogram()})
+        endpoint["requests"] += 1
+        endpoint["errors"] += status >= 400
+        endpoint["latency"].observe((time.perf_counter() - started) * 1000)
+
+
+async def health(request: web.Request) -> web.Response:
+    engine = request.app[ENGINE_KEY]
+    version = engine.version
+    return web.json_response({"status": "ok" if version else "no_index", "version": version, "pid": os.getpid()},
+                             status=200 if version else 503)
+
+
+async def metrics(request: web.Request) -> web.Response:
+    endpoints = {route: {"requests": m["requests"], "errors": m["errors"], "latency": m["latency"].snapshot()}
+                 for route, m in request.app[METRICS_KEY].items()}
+    return web.json_response({"pid": os.getpid(), "endpoints": endpoints, "engine": request.app[ENGINE_KEY].stats(),
+                              "llm": get_gateway().stats()})
+
+
+async def search(request: web.Request) -> web.Response:
+    query = await _query(request)
+    engine = request.app[ENGINE_KEY]
+    try:
+        retrieval = await _run(request, engine.search, query["question"], query["mood"], query["min_views"], query["k"])
+    except IndexNotReady as e:
+        return _error(503, str(e))
+    return web.json_response({"version": os.path.basename(retrieval.version[0]),
+                              "results": [{"id": doc.id, "page_content": doc.page_content} for doc in retrieval.docs]})
+
+
+async def ask(request: web.Request) -> web.StreamResponse:
+    query = await _query(request)
+    engine = request.app[ENGINE_KEY]
+    try:
+        answer = await _run(request, engine.ask, query["question"], query["mood"], query["min_views"], query["use_cache"])
+    except IndexNotReady as e:
+        return _error(503, str(e))
+
+    if not query["stream"]:
+        try:
+            await _run(request, lambda: list(answer.tokens))
+        except LLMError as e:
+            return _error(502, str(e))
+        return web.json_response({"answer": answer.text, "cached": answer.cached, "note": answer.note, "sources": answer.sources})
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+
+    async def send(event: Dict[str, object]):
+        await response.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+
+    await send({"type": "meta", "cached": answer.cached, "sources": answer.sources, "text": answer.text if answer.cached else ""})
+    tokens = answer.tokens
+    try:
+        while True:
+            delta = await _run(request, next, tokens, _DONE)
+            if delta is _DONE:
+                break
+            await send({"type": "token", "text": delta})
+        await send({"type": "done", "note": answer.note})
+    except LLMError as e:
+        await send({"type": "error", "error": str(e)})
+    finally:
+        # Also runs when the client went away mid-stream: release the upstream connection
+        close = getattr(tokens, "close", None)
+        if close is not None:
+            await _run(request, close)
+    await response.write_eof()
+    return response
+
+
+def create_app(engine: Optional[RAGEngine] = None, threads: int = SERVICE_THREADS) -> web.Application:
+    app = web.Application(middlewares=[metrics_middleware])
+    app[ENGINE_KEY] = engine or create_engine()
+    app[METRICS_KEY] = {}
+    app[EXECUTOR_KEY] = ThreadPoolExecutor(threads, thread_name_prefix="rag")
+
+    async def shutdown(app: web.Application):
+        app[EXECUTOR_KEY].shutdown(wait=False, cancel_futures=True)
+
+    app.on_cleanup.append(shutdown)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_post("/search", search)
+    app.router.add_post("/ask", ask)
+    return app
+
+
+def serve(host: str, port: int, index_root: str, reuse_port: bool):
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s %(levelname)s [{os.getpid()}] %(message)s")
+    web.run_app(create_app(create_engine(index_root)), host=host, port=port, reuse_port=reuse_port, print=None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve retrieval and question answering over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=1, help="Processes sharing the port (SO_REUSEPORT) and the mmap'd index")
+    parser.add_argument("--root", default=INDEX_ROOT)
+    args = parser.parse_args(argv)
+
+    if args.workers <= 1:
+        serve(args.host, args.port, args.root, reuse_port=False)
+        return
+    # spawn: workers import torch themselves instead of inheriting half-initialised threads
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=serve, args=(args.host, args.port, args.root, True), daemon=True) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,11 @@ import os
 API_KEY = os.getenv("YOUTUBE_API_KEY", "").strip()
 YOUTUBE_API_SERVICE_NAME = 'youtube'
 YOUTUBE_API_VERSION = 'v3'
+# Point at a stand-in such as mock_server.py for offline load tests
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "").strip()
 
-youtube = build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=API_KEY)
+youtube = build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=API_KEY,
+                **({"client_options": {"api_endpoint": YOUTUBE_API_BASE_URL}} if YOUTUBE_API_BASE_URL else {}))
 
 def get_recent_videos(channel_id, years=3, max_results=200):
     three_years_ago = (datetime.utcnow() - timedelta(days=365*years)).isoformat("T") + "Z"
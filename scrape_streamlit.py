@@ -1,5 +1,4 @@
 import streamlit as st
-from groq import Groq
 import requests
 import json
 import os
@@ -10,6 +9,7 @@ import pandas as pd
 import re
 from dotenv import load_dotenv
 import time
+from llm_gateway import get_gateway
 
 # Load environment variables
 load_dotenv()
@@ -29,6 +29,8 @@ class APIConfig:
     # Automatically fetch keys from .env file using environment variables
     GROQ_API_KEY = os.environ.get('GROQ_API_KEY', 'your_groq_api_key_here')
     YOUTUBE_API_KEY = os.environ.get('YOUTUBE_API_KEY', 'your_youtube_api_key_here')
+    # Point at a stand-in such as mock_server.py for offline load tests
+    YOUTUBE_API_BASE_URL = os.environ.get('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com').rstrip('/')
     MONGODB_CONNECTION = os.environ.get('MONGODB_CONNECTION', 'mongodb://localhost:27017/local/yt_videodata')
     
     @classmethod
@@ -127,10 +129,10 @@ def check_api_configuration():
     return True
 
 def configure_groq():
-    """Configure Groq client"""
+    """Configure Groq client (served by the shared LLM gateway)"""
     try:
         if 'groq_client' not in st.session_state:
-            st.session_state.groq_client = Groq(api_key=APIConfig.GROQ_API_KEY)
+            st.session_state.groq_client = get_gateway().client("groq", api_key=APIConfig.GROQ_API_KEY)
         return True
     except Exception as e:
         st.error(f"❌ Error configuring Groq: {str(e)}")
@@ -171,6 +173,7 @@ def generate_smart_query(prompt):
                 }
             ],
             model="llama-3.3-70b-versatile",
+            timeout=30,
         )
         
         return chat_completion.choices[0].message.content.strip().replace('"', '')
@@ -183,7 +186,7 @@ def get_channel_info(channel_identifier):
     """Get channel information by channel ID or username"""
     try:
         # Try to get channel by ID first
-        url = "https://www.googleapis.com/youtube/v3/channels"
+        url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/channels"
         params = {
             'part': 'snippet,statistics',
             'key': APIConfig.YOUTUBE_API_KEY
@@ -221,7 +224,7 @@ def get_channel_info(channel_identifier):
 def search_channels(query):
     """Search for channels based on query"""
     try:
-        url = "https://www.googleapis.com/youtube/v3/search"
+        url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/search"
         params = {
             'part': 'snippet',
             'q': query,
@@ -248,7 +251,7 @@ def search_channels(query):
 
 def get_uploads_playlist_id(channel_id):
     """Get the uploads playlist ID for a channel"""
-    url = "https://www.googleapis.com/youtube/v3/channels"
+    url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/channels"
     params = {
         'part': 'contentDetails',
         'id': channel_id,
@@ -279,7 +282,7 @@ def fetch_channel_videos_paginated(channel_id, max_results_per_page=50, delay_be
             status_placeholder.info(f"📥 Fetching page {page_count}... ({len(all_videos)} videos so far)")
             
             # Search for videos in the channel
-            search_url = "https://www.googleapis.com/youtube/v3/search"
+            search_url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/search"
             search_params = {
                 'part': 'snippet',
                 'channelId': channel_id,
@@ -308,7 +311,7 @@ def fetch_channel_videos_paginated(channel_id, max_results_per_page=50, delay_be
             video_ids = [item['id']['videoId'] for item in search_data['items']]
             
             # Get detailed statistics for this batch
-            stats_url = "https://www.googleapis.com/youtube/v3/videos"
+            stats_url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/videos"
             stats_params = {
                 'part': 'statistics,snippet,contentDetails',
                 'id': ','.join(video_ids),
@@ -376,7 +379,7 @@ def fetch_youtube_data(query, max_results=10):
     """Fetch video data from YouTube API (original function for search)"""
     try:
         # Search for videos
-        search_url = "https://www.googleapis.com/youtube/v3/search"
+        search_url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/search"
         search_params = {
             'part': 'snippet',
             'q': query,
@@ -401,7 +404,7 @@ def fetch_youtube_data(query, max_results=10):
         video_ids = [item['id']['videoId'] for item in search_data['items']]
         
         # Get detailed statistics for videos
-        stats_url = "https://www.googleapis.com/youtube/v3/videos"
+        stats_url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/videos"
         stats_params = {
             'part': 'statistics,snippet,contentDetails',
             'id': ','.join(video_ids),
@@ -1056,7 +1059,7 @@ def fetch_all_videos_from_playlist(
             page_count += 1
             status_placeholder.info(f"📥 Fetching page {page_count}... ({len(all_videos)} videos so far)")
 
-            url = "https://www.googleapis.com/youtube/v3/playlistItems"
+            url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/playlistItems"
             params = {
                 'part': 'snippet,contentDetails',
                 'playlistId': playlist_id,
@@ -1079,7 +1082,7 @@ def fetch_all_videos_from_playlist(
             # Get detailed statistics for this batch
             batch_videos = []
             if video_ids:
-                stats_url = "https://www.googleapis.com/youtube/v3/videos"
+                stats_url = f"{APIConfig.YOUTUBE_API_BASE_URL}/youtube/v3/videos"
                 stats_params = {
                     'part': 'statistics,snippet,contentDetails',
                     'id': ','.join(video_ids),
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from batch_qa import load_questions, run_batch, summarize
+from llm_gateway import LLMError
+from rag_engine.builder import build_index_version
+from rag_engine.engine import RAGEngine
+
+
+class SlowClient:
+    """Replies with the first word of the question after a pause; counts calls in flight."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        question = messages[-1]["content"].rsplit("Question: ", 1)[1]
+        if "broken" in question:
+            raise LLMError("upstream said no", provider="groq", status=400)
+        if "offline" in question:
+            raise ConnectionError("connection reset")
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=f"About {question.split()[0]}"))])])
+
+
+@pytest.fixture
+def engine(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=16)
+    (tmp_path / "data").mkdir()
+    videos = [{"video_id": f"v{i}", "title": title, "channel_title": "T-Series", "view_count": 1000 * (i + 1)}
+              for i, title in enumerate(["Kesariya", "Tum Hi Ho", "Apna Bana Le", "Chaleya"])]
+    with open(tmp_path / "data" / "a.json", 'w', encoding='utf-8') as f:
+        json.dump({"videos": videos}, f)
+    build_index_version(str(tmp_path / "index"), embeddings, str(tmp_path / "data"))
+    return RAGEngine(str(tmp_path / "index"), embeddings, SlowClient(), "llama")
+
+
+def test_load_questions(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text('"Who sang Kesariya?"\n\n{"id": "q2", "question": " Chaleya ", "mood": "Happy", "min_views": 5}\n',
+                    encoding='utf-8')
+    assert load_questions(str(path)) == [
+        {"id": 1, "question": "Who sang Kesariya?", "mood": None, "min_views": 0},
+        {"id": "q2", "question": "Chaleya", "mood": "Happy", "min_views": 5},
+    ]
+    path.write_text('{"id": 1}\n', encoding='utf-8')
+    with pytest.raises(ValueError, match="questions.jsonl:1"):
+        load_questions(str(path))
+
+
+def test_run_batch_in_order_with_bounded_concurrency(engine):
+    questions = [{"id": i, "question": q, "mood": None, "min_views": 0}
+                 for i, q in enumerate(["Kesariya", "Chaleya", "broken Tum Hi Ho", "Apna Bana Le", "Kesariya again", "Tum Hi Ho",
+                                        "offline Chaleya"])]
+    records = list(run_batch(engine, questions, concurrency=2, k=3))
+
+    assert [record["id"] for record in records] == list(range(7))
+    assert records[0]["answer"] == "About Kesariya" and records[1]["answer"] == "About Chaleya"
+    assert records[2]["answer"] is None and "upstream said no" in records[2]["error"]
+    assert records[6]["answer"] is None and records[6]["error"] == "ConnectionError: connection reset"
+    assert all(len(record["retrieved_ids"]) == 3 for record in records)
+    assert records[0]["retrieved_ids"] == engine.search("Kesariya", k=3).doc_ids
+    assert engine.client.peak == 2
+
+    latency = records[0]["latency_ms"]
+    assert latency["embed_ms"] == records[1]["latency_ms"]["embed_ms"]  # one batch, shared evenly
+    assert latency["first_token_ms"] is not None and latency["total_ms"] >= latency["llm_ms"] >= 50
+    summary = summarize(records, wall_seconds=1.0)
+    assert (summary["questions"], summary["errors"], summary["cached"]) == (7, 2, 0)
+    assert summary["latency"]["llm_ms"]["count"] == 5
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import index_builder
+from index_builder import build_once, last_build_failure, retry_after, start_background_build
+from rag_engine.builder import read_build_status, write_build_status
+
+
+class FakePopen:
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, command, **kwargs):
+        self.commands.append(command)
+
+
+@pytest.fixture
+def popen(monkeypatch):
+    fake = FakePopen()
+    monkeypatch.setattr(index_builder.subprocess, "Popen", fake)
+    return fake
+
+
+def test_retry_after_backs_off_per_failure(monkeypatch):
+    monkeypatch.setattr(index_builder, "BUILD_RETRY_SECONDS", 60)
+    monkeypatch.setattr(index_builder, "BUILD_RETRY_MAX_SECONDS", 200)
+    assert retry_after({}) == 0
+    assert retry_after({"state": "ok", "finished": 0}) == 0
+    assert retry_after({"state": "failed", "failures": 1, "finished": 100}, now=130) == 30
+    assert retry_after({"state": "failed", "failures": 2, "finished": 100}, now=130) == 90
+    assert retry_after({"state": "failed", "failures": 5, "finished": 100}, now=130) == 170
+    assert retry_after({"state": "starting", "started": 100}, now=130) == index_builder.BUILD_START_GRACE_SECONDS - 30
+
+
+def test_start_does_not_respawn_failing_builds(tmp_path, popen):
+    root = str(tmp_path / "index")
+    assert start_background_build(root)
+    # Reruns while that builder starts up
+    assert not start_background_build(root)
+    assert len(popen.commands) == 1
+
+    write_build_status(root, {"state": "failed", "finished": time.time(), "failures": 3, "error": "OSError: offline"})
+    assert not start_background_build(root)
+    assert "OSError: offline (3 failed in a row; retrying in" in last_build_failure(root)
+    # An explicit rebuild skips the back-off, keeping the failure count
+    assert start_background_build(root, full=True, force=True)
+    assert popen.commands[-1][-1] == "--full"
+    assert read_build_status(root)["failures"] == 3
+
+    write_build_status(root, {"state": "failed", "finished": time.time() - 10 ** 6, "failures": 3, "error": "x"})
+    assert start_background_build(root)
+    assert len(popen.commands) == 3
+
+
+def test_build_once_records_outcome(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = str(tmp_path / "index")
+
+    def fail(*args, **kwargs):
+        raise OSError("couldn't connect to huggingface.co")
+
+    monkeypatch.setattr(index_builder, "build_index_version", fail)
+    for failures in (1, 2):
+        with pytest.raises(OSError):
+            build_once(root, str(tmp_path))
+        assert read_build_status(root)["failures"] == failures
+    assert "couldn't connect" in last_build_failure(root)
+
+    monkeypatch.setattr(index_builder, "build_index_version", lambda *args, **kwargs: {"mode": "full", "version": "v1"})
+    build_once(root, str(tmp_path))
+    assert read_build_status(root)["state"] == "ok" and last_build_failure(root) is None
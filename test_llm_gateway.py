@@ -0,0 +1,204 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from llm_gateway import LatencyHistogram, LLMError, LLMGateway, Provider
+
+
+def completion(content):
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+def sse(*deltas):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': d}}]})}\n\n" for d in deltas]
+    return "".join(lines) + "data: [DONE]\n\n"
+
+
+def make_gateway(handler, **provider_kwargs):
+    provider = Provider("groq", "https://llm.test/v1", "TEST_LLM_KEY", **provider_kwargs)
+    return LLMGateway({"groq": provider}, backoff_base=0.01, backoff_max=0.05, transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def gateways():
+    created = []
+    yield lambda handler, **kw: created.append(make_gateway(handler, **kw)) or created[-1]
+    for gateway in created:
+        gateway.close()
+
+
+def test_chat_returns_content_and_sends_key(gateways, monkeypatch):
+    monkeypatch.setenv("TEST_LLM_KEY", "secret")
+    seen = {}
+
+    def handler(request):
+        seen["auth"] = request.headers["authorization"]
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, json=completion("Kesariya"))
+
+    gateway = gateways(handler)
+    assert gateway.chat("groq", [{"role": "user", "content": "hi"}], "llama", temperature=0) == "Kesariya"
+    assert seen["auth"] == "Bearer secret"
+    assert seen["body"]["temperature"] == 0
+    assert gateway.stats()["groq"]["latency"]["count"] == 1
+
+
+def test_retries_429_then_succeeds(gateways):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) < 3:
+            return httpx.Response(429, headers={"retry-after": "0"})
+        return httpx.Response(200, json=completion("ok"))
+
+    gateway = gateways(handler)
+    assert gateway.chat("groq", [], "llama") == "ok"
+    stats = gateway.stats()["groq"]
+    assert (stats["requests"], stats["retries"], stats["rate_limited"]) == (3, 2, 2)
+
+
+def test_client_errors_are_not_retried(gateways):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(401, json={"error": "bad key"})
+
+    gateway = gateways(handler)
+    with pytest.raises(LLMError) as info:
+        gateway.chat("groq", [], "llama")
+    assert info.value.status == 401
+    assert len(calls) == 1
+
+
+def test_retries_stop_at_deadline(gateways):
+    gateway = gateways(lambda request: httpx.Response(503), max_retries=1000)
+    with pytest.raises(LLMError):
+        gateway.chat("groq", [], "llama", timeout=0.2)
+    assert gateway.stats()["groq"]["requests"] < 1000
+
+
+def test_stream_yields_deltas(gateways):
+    gateway = gateways(lambda request: httpx.Response(200, text=sse("Kesa", "", "riya")))
+    assert "".join(gateway.stream("groq", [], "llama")) == "Kesariya"
+    assert gateway.stats()["groq"]["first_token"]["count"] == 1
+
+
+def test_chat_client_matches_sdk_shape(gateways):
+    def handler(request):
+        body = json.loads(request.content)
+        return httpx.Response(200, text=sse("a", "b")) if body.get("stream") else httpx.Response(200, json=completion("ab"))
+
+    client = gateways(handler).client("groq", api_key="k")
+    assert client.chat.completions.create(messages=[], model="llama").choices[0].message.content == "ab"
+    chunks = client.chat.completions.create(messages=[], model="llama", stream=True)
+    assert "".join(c.choices[0].delta.content for c in chunks) == "ab"
+
+
+def test_concurrency_is_capped_per_provider(gateways):
+    active, peak = [0], [0]
+
+    async def handler(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+        return httpx.Response(200, json=completion("ok"))
+
+    gateway = gateways(handler, max_concurrency=2)
+
+    async def fan_out():
+        return await asyncio.gather(*(gateway.achat("groq", [], "llama") for _ in range(6)))
+
+    assert gateway.run(fan_out()) == ["ok"] * 6
+    assert peak[0] == 2
+
+
+def test_queueing_counts_against_the_deadline(gateways):
+    async def handler(request):
+        await asyncio.sleep(0.3)
+        return httpx.Response(200, json=completion("ok"))
+
+    gateway = gateways(handler, max_concurrency=1)
+
+    async def queued():
+        slow = asyncio.ensure_future(gateway.achat("groq", [], "llama"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(LLMError, match="free slot"):
+            await gateway.achat("groq", [], "llama", timeout=0.1)
+        return await slow
+
+    assert gateway.run(queued()) == "ok"
+    # The slot was given back: another call goes through
+    assert gateway.chat("groq", [], "llama") == "ok"
+    assert gateway.stats()["groq"]["in_flight"] == 0
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield sse("Kesa").split("data: [DONE]")[0].encode()
+        raise httpx.ReadError("connection reset")
+
+
+def test_stream_errors_midway_are_llm_errors(gateways):
+    gateway = gateways(lambda request: httpx.Response(200, stream=BrokenStream()), max_concurrency=1)
+    deltas = []
+    with pytest.raises(LLMError, match="ReadError"):
+        for delta in gateway.stream("groq", [], "llama"):
+            deltas.append(delta)
+    assert deltas == ["Kesa"]
+    assert gateway.stats()["groq"]["errors"] == 1
+    # The slot was given back, so the next stream is not stuck behind the broken one
+    with pytest.raises(LLMError, match="ReadError"):
+        list(gateway.stream("groq", [], "llama", timeout=1))
+    assert gateway.stats()["groq"]["in_flight"] == 0
+
+
+def test_malformed_bodies_are_llm_errors(gateways):
+    gateway = gateways(lambda request: httpx.Response(200, text="<html>oops</html>"))
+    with pytest.raises(LLMError, match="Malformed completion"):
+        gateway.chat("groq", [], "llama")
+    gateway = gateways(lambda request: httpx.Response(200, json={"error": "no choices"}))
+    with pytest.raises(LLMError, match="Malformed completion"):
+        gateway.chat("groq", [], "llama")
+    gateway = gateways(lambda request: httpx.Response(200, text="data: {not json\n\n"))
+    with pytest.raises(LLMError, match="Malformed stream chunk"):
+        list(gateway.stream("groq", [], "llama"))
+    assert gateway.stats()["groq"]["errors"] == 1
+
+
+def test_retry_after_is_honoured_beyond_backoff_max(gateways, monkeypatch):
+    slept = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        slept.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(429, headers={"retry-after": "12"}) if len(calls) == 1 else httpx.Response(200, json=completion("ok"))
+
+    gateway = gateways(handler)
+    assert gateway.chat("groq", [], "llama", timeout=30) == "ok"
+    assert slept == [12.0]
+    # A wait the deadline cannot cover is not cut short: the call gives up instead
+    calls.clear()
+    with pytest.raises(LLMError, match="last status 429"):
+        gateway.chat("groq", [], "llama", timeout=5)
+    assert len(calls) == 1
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram(bounds=(10, 100))
+    for ms in (5, 5, 50, 500):
+        histogram.observe(ms)
+    assert histogram.percentile(50) == 10
+    assert histogram.percentile(75) == 100
+    assert histogram.percentile(100) == float("inf")
@@ -0,0 +1,125 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from llm_gateway import LLMError, LLMGateway, Provider
+from mock_server import Catalog, MockConfig, MockServer
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(config=None, catalog=None, replies=None):
+        server = MockServer(config or MockConfig(seed=1), catalog or Catalog.synthetic(videos_per_channel=30), replies).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def gateway_for():
+    gateways = []
+
+    def make(server):
+        provider = Provider("groq", f"{server.url}/openai/v1", "TEST_LLM_KEY", max_retries=2)
+        gateways.append(LLMGateway({"groq": provider}, backoff_base=0.01, backoff_max=0.05))
+        return gateways[-1]
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+def test_chat_json_and_stream_agree(serve, gateway_for):
+    server = serve(replies=[{"match": "kesariya", "content": "Kesariya is by Arijit Singh."}])
+    gateway = gateway_for(server)
+    messages = [{"role": "user", "content": "Who sang Kesariya?"}]
+
+    assert gateway.chat("groq", messages, "llama") == "Kesariya is by Arijit Singh."
+    assert "".join(gateway.stream("groq", messages, "llama")) == "Kesariya is by Arijit Singh."
+    assert "Tum Hi Ho" in gateway.chat("groq", [{"role": "user", "content": "Tum Hi Ho?"}], "llama")
+    assert server.state.stats()["requests"]["chat.completions"] == 3
+
+
+def test_injected_errors_are_retried_then_surface(serve, gateway_for):
+    server = serve(MockConfig(error_rate=1.0, error_statuses=(503,), seed=1))
+    gateway = gateway_for(server)
+    with pytest.raises(LLMError) as info:
+        gateway.chat("groq", [], "llama", timeout=5)
+    assert info.value.status == 503
+    assert gateway.stats()["groq"]["requests"] == 3
+
+
+def test_latency_is_added(serve):
+    server = serve(MockConfig(latency_ms=80))
+    started = time.perf_counter()
+    httpx.get(f"{server.url}/youtube/v3/videos", params={"id": "x", "part": "snippet"})
+    assert time.perf_counter() - started >= 0.08
+
+
+def test_playlist_pagination_covers_channel(serve):
+    server = serve()
+    channel_id = next(iter(server.state.catalog.channels))
+    with httpx.Client(base_url=f"{server.url}/youtube/v3") as client:
+        channel = client.get("/channels", params={"part": "contentDetails,statistics", "id": channel_id}).json()["items"][0]
+        assert channel["statistics"]["videoCount"] == "30"
+        uploads = channel["contentDetails"]["relatedPlaylists"]["uploads"]
+
+        video_ids, token = [], None
+        while True:
+            page = client.get("/playlistItems", params={"part": "snippet", "playlistId": uploads, "maxResults": 12,
+                                                        **({"pageToken": token} if token else {})}).json()
+            video_ids += [item["snippet"]["resourceId"]["videoId"] for item in page["items"]]
+            token = page.get("nextPageToken")
+            if not token:
+                break
+        assert len(set(video_ids)) == 30
+
+        videos = client.get("/videos", params={"part": "statistics,contentDetails", "id": ",".join(video_ids[:5])}).json()
+        assert [v["id"] for v in videos["items"]] == video_ids[:5]
+        assert set(videos["items"][0]) == {"kind", "id", "statistics", "contentDetails"}
+
+
+def test_quota_exhaustion(serve):
+    server = serve(MockConfig(quota=150))
+    search = {"part": "snippet", "q": "kesariya", "type": "video"}
+    assert httpx.get(f"{server.url}/youtube/v3/search", params=search).status_code == 200
+    response = httpx.get(f"{server.url}/youtube/v3/search", params=search)
+    assert response.status_code == 403
+    assert response.json()["error"]["errors"][0]["reason"] == "quotaExceeded"
+    # Cheaper calls still fit in what is left
+    assert httpx.get(f"{server.url}/youtube/v3/channels", params={"forHandle": "@TSeries"}).json()["items"]
+    assert httpx.get(f"{server.url}/mock/stats").json()["quota_used"] == 101
+
+
+def test_replays_scraped_data(tmp_path):
+    dump = {"channel_name": "T-Series", "videos": [
+        {"video_id": "Ew1TXeMEvGc", "title": "Satake Thoko 8K Video Song", "published_at": "2026-04-17T13:18:12Z",
+         "view_count": 6825, "like_count": 149, "comment_count": 41, "duration": "PT4M15S"}]}
+    path = tmp_path / "T-Series.json"
+    path.write_text(json.dumps(dump))
+    catalog = Catalog.from_scraped([str(path)])
+    assert catalog.by_id["Ew1TXeMEvGc"]["channel_id"].startswith("UC")
+    assert catalog.find_channel("@t-series")["videos"][0]["title"] == "Satake Thoko 8K Video Song"
+
+
+def test_youtube_scraper_runs_against_mock(serve, monkeypatch):
+    pytest.importorskip("googleapiclient")
+    from yt_scrape.youtube_scraper import YouTubeScraper
+
+    server = serve()
+    monkeypatch.setenv("YOUTUBE_API_BASE_URL", server.url)
+    monkeypatch.setattr("yt_scrape.youtube_scraper.time.sleep", lambda s: None)
+    scraper = YouTubeScraper("test-key")
+    channel_id = scraper.get_channel_id_from_name("@Tips Music")
+    videos = scraper.scrape_channel(channel_id, batch_size=10, max_videos=25)
+
+    assert len(videos) == 25
+    assert {v["channel_name"] for v in videos} == {"Tips Music"}
+    assert all(v["view_count"] > 0 and v["duration"].startswith("PT") for v in videos)
@@ -32,27 +32,32 @@ def test_get_embeddings_instance():
     embeddings = get_embeddings()
     assert isinstance(embeddings, HuggingFaceEmbeddings)
 
-@patch('rag.FAISS')
-def test_create_faiss_vector_store(mock_faiss):
-    mock_vs = MagicMock()
-    mock_faiss.from_texts.return_value = mock_vs
+@patch('rag.save_knowledge_base')
+@patch('rag.get_embeddings')
+def test_create_faiss_vector_store(mock_get_embeddings, mock_save):
+    mock_get_embeddings.return_value.embed_documents.return_value = [[0.1, 0.2, 0.3]]
     
     texts = ["Sample text"]
     path = "test_faiss_index"
     
-    create_faiss_vector_store(texts, path=path)
+    with patch('rag.save_index_config'):
+        create_faiss_vector_store(texts, path=path)
     
-    # It should use the cached embeddings
-    mock_faiss.from_texts.assert_called_once()
-    mock_vs.save_local.assert_called_once_with(path)
+    # Index and row-aligned records go to the pickle-free store
+    mock_save.assert_called_once()
+    saved_path, index, records = mock_save.call_args[0]
+    assert saved_path == path
+    assert index.ntotal == 1
+    assert records[0]["page_content"] == "Sample text"
 
-@patch('rag.FAISS')
-def test_load_faiss_vector_store(mock_faiss):
+@patch('rag.KnowledgeBase')
+def test_load_faiss_vector_store(mock_kb):
     mock_vs = MagicMock()
-    mock_faiss.load_local.return_value = mock_vs
+    mock_kb.return_value = mock_vs
     
     path = "test_faiss_index"
     vs = load_faiss_vector_store(path=path)
     
-    mock_faiss.load_local.assert_called_once()
+    mock_kb.assert_called_once()
+    assert mock_kb.call_args[0][0] == path
     assert vs == mock_vs
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+from aiohttp import web
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from llm_gateway import LLMError, LLMGateway, Provider
+from mock_server import Catalog, MockConfig, MockServer
+from rag_engine.answer_cache import AnswerCache
+from rag_engine.builder import build_index_version
+from rag_engine.client import RAGServiceClient
+from rag_engine.engine import IndexNotReady, RAGEngine
+from rag_engine.query_cache import QueryCache
+from rag_service import create_app
+
+
+class ServiceThread:
+    """create_app() served on an ephemeral port from a background event loop."""
+
+    def __init__(self, app: web.Application):
+        self.loop = asyncio.new_event_loop()
+        self.runner = web.AppRunner(app)
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.runner.setup())
+            self.loop.run_until_complete(web.TCPSite(self.runner, "127.0.0.1", 0).start())
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait(10)
+        host, port = self.runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+
+
+def write_dump(path, titles):
+    videos = [{"video_id": f"v{i}", "title": title, "channel_title": "T-Series", "view_count": 1000 * (i + 1)}
+              for i, title in enumerate(titles)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"videos": videos}, f)
+
+
+@pytest.fixture
+def service(tmp_path):
+    llm = MockServer(MockConfig(seed=1), Catalog([]), [{"match": "kesariya", "content": "Kesariya is by Arijit Singh."}]).start()
+    gateway = LLMGateway({"groq": Provider("groq", f"{llm.url}/openai/v1", "TEST_LLM_KEY", max_retries=1)})
+    embeddings = DeterministicFakeEmbedding(size=16)
+    engine = RAGEngine(str(tmp_path / "index"), embeddings, gateway.client("groq"), "llama",
+                       query_cache=QueryCache(), answer_cache=AnswerCache())
+    server = ServiceThread(create_app(engine, threads=4))
+    client = RAGServiceClient(server.url)
+
+    def publish(titles):
+        (tmp_path / "data").mkdir(exist_ok=True)
+        write_dump(tmp_path / "data" / "a.json", titles)
+        build_index_version(str(tmp_path / "index"), embeddings, str(tmp_path / "data"))
+
+    yield server, client, publish
+    client.close()
+    server.stop()
+    gateway.close()
+    llm.stop()
+
+
+def test_health_and_no_index(service):
+    server, client, publish = service
+    assert client.health()["status"] == "no_index"
+    with pytest.raises(IndexNotReady):
+        client.ask("Who sang Kesariya?")
+    publish(["Kesariya", "Tum Hi Ho"])
+    assert client.health()["status"] == "ok"
+    assert client.version is not None
+
+
+def test_search_and_streamed_ask(service):
+    server, client, publish = service
+    publish(["Kesariya", "Tum Hi Ho", "Chaleya"])
+
+    results = client.search("Kesariya", k=2)
+    assert len(results.docs) == 2 and results.docs[0].page_content.startswith("TITLE: Kesariya")
+    assert results.doc_ids[0] == "v0" and results.version == (client.version,)
+
+    answer = client.ask("Who sang Kesariya?", mood="Romantic")
+    assert not answer.cached
+    assert "".join(answer.tokens) == "Kesariya is by Arijit Singh."
+    assert answer.text == "Kesariya is by Arijit Singh." and "first token" in answer.note
+
+    again = client.ask("Who sang Kesariya?", mood="Romantic")
+    assert again.cached and again.text == answer.text
+    assert "".join(again.tokens) == answer.text
+
+    body = httpx.post(f"{server.url}/ask", json={"question": "Who sang Kesariya?", "use_cache": False}).json()
+    assert body["answer"] == answer.text and not body["cached"]
+
+    stats = httpx.get(f"{server.url}/metrics").json()
+    assert stats["endpoints"]["/ask"]["requests"] == 3
+    assert stats["engine"]["answer_cache"]["hits"] == 1
+    assert client.stats()["version"] == client.version
+
+
+def test_bad_requests(service):
+    server, client, publish = service
+    response = httpx.post(f"{server.url}/search", json={"mood": "Sad"})
+    assert response.status_code == 400 and response.json()["error"] == "question is required"
+    assert httpx.post(f"{server.url}/ask", content=b"not json").status_code == 400
+    assert httpx.post(f"{server.url}/search", json={"question": "x", "k": "many"}).status_code == 400
+
+
+def test_unreachable_service():
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = RAGServiceClient("http://rag.invalid", transport=httpx.MockTransport(refuse))
+    with pytest.raises(IndexNotReady):
+        client.ask("Who sang Kesariya?")
+    with pytest.raises(IndexNotReady):
+        client.search("Kesariya")
+    assert client.health()["status"] == "unreachable"
+
+
+def test_stream_failures_raise_llm_error():
+    def handler(request):
+        if request.url.path == "/search":
+            return httpx.Response(502, json={"error": "upstream down"})
+        events = [{"type": "meta", "cached": False, "sources": []}, {"type": "token", "text": "Kesariya"},
+                  {"type": "error", "error": "groq: retries exhausted"}]
+        return httpx.Response(200, content="".join(f"data: {json.dumps(event)}\n\n" for event in events).encode())
+
+    client = RAGServiceClient("http://rag.test", transport=httpx.MockTransport(handler))
+    with pytest.raises(LLMError):
+        client.search("Kesariya")
+    answer = client.ask("Who sang Kesariya?")
+    tokens = iter(answer.tokens)
+    assert next(tokens) == "Kesariya"
+    with pytest.raises(LLMError, match="retries exhausted"):
+        next(tokens)
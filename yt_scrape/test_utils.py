@@ -1,5 +1,6 @@
 import pytest
-from yt_scrape.utils import clean_title, deduplicate_videos, prepare_leaderboard, calculate_engagement_score
+from yt_scrape.utils import (clean_title, deduplicate_videos, prepare_leaderboard, calculate_engagement_score,
+                             calculate_engagement_scores, infer_channel_name, infer_channel_names)
 import pandas as pd
 
 def test_calculate_engagement_score():
@@ -14,6 +15,22 @@ def test_calculate_engagement_score_zero_views():
 def test_calculate_engagement_score_none_handling():
     assert calculate_engagement_score(None, None, None) == 0.0
 
+def test_calculate_engagement_scores_matches_scalar():
+    views, likes, comments = [1000, 0, None, 333, "12"], [10, 10, None, 7, 1], [5, 5, None, 1, None]
+    expected = [calculate_engagement_score(*args) for args in zip(views, likes, comments)]
+    assert calculate_engagement_scores(views, likes, comments).tolist() == expected
+
+def test_infer_channel_names_matches_scalar():
+    rows = [
+        {"channel_name": "Tips Music", "title": "x", "description": ""},
+        {"channel_name": None, "title": "Song | T-Series", "description": ""},
+        {"channel_name": "nan", "title": "Old", "description": "Zee Music presents"},
+        {"channel_name": " ", "title": "A Yash Raj film", "description": None},
+        {"channel_name": None, "title": "Unknown", "description": "nothing"},
+    ]
+    result = infer_channel_names(pd.DataFrame(rows))
+    assert result.tolist() == [infer_channel_name(r) for r in rows] == ["Tips Music", "T-Series", "Zee Music Company", "YRF", "Other/Legacy"]
+
 def test_prepare_leaderboard():
     input_data = [
         {"Artist": "Artist A", "Total Views": 100},
@@ -1,5 +1,6 @@
 import re
 import os
+import numpy as np
 import pandas as pd
 from typing import Optional
 import streamlit as st
@@ -80,6 +81,58 @@ def calculate_engagement_score(views, likes, comments) -> float:
     except (ValueError, TypeError):
         return 0.0
 
+# (label, keywords) checked in order against title + description of legacy rows without a channel
+CHANNEL_KEYWORDS = [
+    ("T-Series", ["t-series"]),
+    ("Zee Music Company", ["zee music"]),
+    ("Sony Music India", ["sony music"]),
+    ("Tips Music", ["tips"]),
+    ("Saregama Music", ["saregama"]),
+    ("Eros Now", ["eros now"]),
+    ("YRF", ["yrf", "yash raj"]),
+]
+UNKNOWN_CHANNEL = "Other/Legacy"
+
+def calculate_engagement_scores(views, likes, comments) -> np.ndarray:
+    """Vectorized calculate_engagement_score over whole columns (missing counts count as 0)."""
+    v = pd.to_numeric(pd.Series(views), errors='coerce').fillna(0).to_numpy(dtype=float)
+    l = pd.to_numeric(pd.Series(likes), errors='coerce').fillna(0).to_numpy(dtype=float)
+    c = pd.to_numeric(pd.Series(comments), errors='coerce').fillna(0).to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(v > 0, (l * 10 + c * 50) / (v / 100), 0.0)
+    return np.round(scores, 2)
+
+def infer_channel_name(row) -> str:
+    """Return the video's channel, inferring the label from title/description for legacy data."""
+    channel_name = row.get('channel_name') if isinstance(row, dict) else row['channel_name']
+    if channel_name and str(channel_name).strip() != "" and str(channel_name).lower() != "nan":
+        return channel_name
+    title = row.get('title', '') if isinstance(row, dict) else row['title']
+    description = row.get('description', '') if isinstance(row, dict) else row['description']
+    desc_title = f"{title} {description}".lower()
+    for label, keywords in CHANNEL_KEYWORDS:
+        if any(k in desc_title for k in keywords):
+            return label
+    return UNKNOWN_CHANNEL
+
+def infer_channel_names(frame: pd.DataFrame) -> pd.Series:
+    """Vectorized infer_channel_name over a frame with channel_name/title/description columns."""
+    def column(name):
+        return frame[name].astype(object) if name in frame.columns else pd.Series([None] * len(frame), index=frame.index, dtype=object)
+
+    names = column('channel_name')
+    text = names.where(names.notna(), "").astype(str).str.strip()
+    known = (text != "") & (text.str.lower() != "nan")
+    result = names.where(known, UNKNOWN_CHANNEL)
+    missing = ~known
+    if missing.any():
+        # Only legacy rows pay for the substring scans
+        desc_title = (column('title')[missing].fillna("").astype(str) + " " +
+                      column('description')[missing].fillna("").astype(str)).str.lower()
+        conditions = [desc_title.str.contains("|".join(re.escape(k) for k in keywords), regex=True) for _, keywords in CHANNEL_KEYWORDS]
+        result[missing] = np.select(conditions, [label for label, _ in CHANNEL_KEYWORDS], default=UNKNOWN_CHANNEL)
+    return result
+
 def extract_channel_id(channel_input: str) -> Optional[str]:
     """Extract channel ID from various YouTube channel formats"""
     if not channel_input:
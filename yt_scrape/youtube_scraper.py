@@ -1,3 +1,4 @@
+import os
 from googleapiclient.discovery import build
 from datetime import datetime, timedelta
 import pandas as pd
@@ -43,10 +44,15 @@ def _st_error(msg):
             pass
     print(f"ERROR: {msg}")
 
+def youtube_client_options():
+    """Extra build() kwargs; YOUTUBE_API_BASE_URL points the client at a stand-in such as mock_server.py"""
+    base_url = os.getenv("YOUTUBE_API_BASE_URL", "").strip()
+    return {'client_options': {'api_endpoint': base_url}} if base_url else {}
+
 class YouTubeScraper:
     def __init__(self, api_key):
         self.api_key = api_key
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.youtube = build('youtube', 'v3', developerKey=api_key, **youtube_client_options())
         self.quota_used = 0
         self.max_quota = 10000  # Daily quota limit
     